@@ -1,25 +1,55 @@
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_mail import Mail
-from config import Config
+from config import obtener_config
 
 
 db = SQLAlchemy()
-migrate = Migrate()
 login = LoginManager()
 mail = Mail()
 
-def create_app(config_class=Config):
+def create_app(config_class=None):
     app = Flask(__name__)
-    app.config.from_object(config_class)
-    
+    app.config.from_object(config_class or obtener_config())
+    if app.config.get('PROXY_SALTOS'):
+        # IP, esquema y host reales del cliente detrás de nginx (límites e ip_origen)
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        saltos = app.config['PROXY_SALTOS']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=saltos, x_proto=saltos, x_host=saltos)
+    # Flask-Migrate (Alembic) y los comandos sólo hacen falta en `flask ...`:
+    # los workers no los importan (ver app/arranque.py)
+    linea_de_comandos = app.config.get('CARGAR_MIGRACIONES') or click.get_current_context(silent=True) is not None
+
+    from app.base_datos import verificar_url, configurar_motores
+    verificar_url(app)
     db.init_app(app)
-    migrate.init_app(app, db)
+    configurar_motores(app, db)
+    from app import metricas
+    metricas.configurar(app, db)
+    from app import carga_relaciones  # noqa: F401 (registra el modo estricto)
+    if linea_de_comandos:
+        from flask_migrate import Migrate
+        Migrate(app, db)
     login.init_app(app)
     app.login_manager = login
     mail.init_app(app)
+
+    from app.identidad import identidades
+    identidades.configurar(max_entradas=app.config['IDENTIDAD_CACHE_MAX'],
+                           ttl=app.config['IDENTIDAD_CACHE_TTL'])
+    from app.catalogo import catalogo
+    catalogo.configurar(ttl=app.config['CATALOGO_CACHE_TTL'])
+    from app.fragmentos import tarjetas
+    tarjetas.configurar(max_entradas=app.config['FRAGMENTOS_CACHE_MAX'],
+                        ttl=app.config['FRAGMENTOS_CACHE_TTL'])
+    from app.limites import limitador
+    limitador.configurar(app)
+    from app import estaticos
+    estaticos.configurar(app)
+    from app.arranque import configurar_plantillas
+    configurar_plantillas(app)
     
     # Registrar blueprints - SOLO MAIN por ahora
     from app.routes.main import bp as main_bp
@@ -35,13 +65,18 @@ def create_app(config_class=Config):
     from app.routes.publico import bp as publico_bp
     app.register_blueprint(publico_bp, url_prefix='/publico')
 
+    if linea_de_comandos:
+        from app.commands import register_commands
+        register_commands(app)
+
     return app
 
 from app.models.prestador import Prestador
-from app.models import usuario_admin, prestador, usuario_prestador, solicitud_visita, visita_prestador
+from app.models import usuario_admin, prestador, usuario_prestador, solicitud_visita, visita_prestador, contador_estado, resumen_diario, correo_saliente
 
 @login.user_loader
 def load_user(user_id):
-    return Prestador.query.get(int(user_id))
+    from app.identidad import cargar_identidad
+    return cargar_identidad(user_id)
 
 
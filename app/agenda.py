@@ -0,0 +1,245 @@
+"""Índice de franjas horarias por prestador y fecha para detectar conflictos.
+
+Cada (prestador, fecha) guarda sus visitas ordenadas por hora de inicio. Para
+saber qué visitas se superponen con [inicio, fin) alcanza con buscar por
+bisección las que empiezan antes de `fin` y después de `inicio - duración
+máxima del día`: O(log n + k), con k las visitas que efectivamente se cruzan.
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import time
+
+# Duración que se asume cuando la visita no tiene hora de fin
+DURACION_POR_DEFECTO = 60
+
+# Franjas (en minutos) según horario_preferido de la solicitud
+VENTANAS = {
+    'mañana': (8 * 60 + 30, 12 * 60 + 30),
+    'tarde': (13 * 60 + 30, 18 * 60),
+}
+VENTANA_COMPLETA = (8 * 60 + 30, 18 * 60)
+
+
+def a_minutos(t):
+    return t.hour * 60 + t.minute
+
+
+def minutos_a_texto(m):
+    return f'{m // 60:02d}:{m % 60:02d}'
+
+
+def minutos_a_hora(m):
+    return time(m // 60, m % 60)
+
+
+def ventana_para(horario_preferido):
+    texto = (horario_preferido or '').lower()
+    for clave, ventana in VENTANAS.items():
+        if clave in texto:
+            return ventana
+    return VENTANA_COMPLETA
+
+
+class _Franjas:
+    """Visitas de un prestador en un día, ordenadas por inicio"""
+
+    def __init__(self):
+        self.items = []  # (inicio, fin, clave, visitantes)
+        self.inicios = []
+        self.duracion_max = 0
+
+    def agregar(self, inicio, fin, clave, visitantes):
+        item = (inicio, fin, clave, visitantes)
+        pos = bisect_right(self.inicios, inicio)
+        self.inicios.insert(pos, inicio)
+        self.items.insert(pos, item)
+        self.duracion_max = max(self.duracion_max, fin - inicio)
+
+    def quitar(self, clave):
+        for pos, item in enumerate(self.items):
+            if item[2] == clave:
+                del self.items[pos]
+                del self.inicios[pos]
+                return
+
+    def superpuestas(self, inicio, fin, excluir=None):
+        desde = bisect_left(self.inicios, inicio - self.duracion_max)
+        hasta = bisect_left(self.inicios, fin)
+        return [it for it in self.items[desde:hasta]
+                if it[1] > inicio and it[2] != excluir]
+
+
+class Agenda:
+    """Agenda en memoria de uno o varios prestadores para un conjunto de fechas"""
+
+    def __init__(self, prestadores):
+        self.prestadores = {p.id: p for p in prestadores}
+        self._franjas = defaultdict(_Franjas)
+
+    @classmethod
+    def cargar(cls, prestadores, fechas):
+        """Carga en una sola consulta las visitas activas de esos prestadores y fechas"""
+        from app.models.visita_prestador import VisitaPrestador
+        from app.models.solicitud_visita import SolicitudVisita
+        from app import db
+
+        agenda = cls(prestadores)
+        if not agenda.prestadores or not fechas:
+            return agenda
+        filas = db.session.query(
+            VisitaPrestador.id, VisitaPrestador.prestador_id, VisitaPrestador.fecha_confirmada,
+            VisitaPrestador.hora_inicio, VisitaPrestador.hora_fin,
+            VisitaPrestador.visitantes_reales, SolicitudVisita.cantidad_alumnos,
+            SolicitudVisita.cantidad_docentes,
+        ).join(SolicitudVisita, SolicitudVisita.id == VisitaPrestador.solicitud_id).filter(
+            VisitaPrestador.prestador_id.in_(list(agenda.prestadores)),
+            VisitaPrestador.fecha_confirmada.in_(list(set(fechas))),
+            db.or_(VisitaPrestador.estado_visita.is_(None), VisitaPrestador.estado_visita != 'CANCELADA'),
+        )
+        for f in filas:
+            visitantes = f.visitantes_reales or (f.cantidad_alumnos or 0) + (f.cantidad_docentes or 0)
+            agenda.agregar(f.prestador_id, f.fecha_confirmada, f.hora_inicio, f.hora_fin,
+                           clave=f.id, visitantes=visitantes)
+        return agenda
+
+    def _rango(self, prestador_id, inicio, fin):
+        ini = a_minutos(inicio)
+        if fin is not None:
+            return ini, a_minutos(fin)
+        prestador = self.prestadores.get(prestador_id)
+        duracion = prestador.get_duracion_minutos() if prestador else None
+        return ini, ini + (duracion or DURACION_POR_DEFECTO)
+
+    def agregar(self, prestador_id, fecha, inicio, fin, clave, visitantes=0):
+        ini, fi = self._rango(prestador_id, inicio, fin)
+        self._franjas[(prestador_id, fecha)].agregar(ini, fi, clave, visitantes)
+
+    def quitar(self, prestador_id, fecha, clave):
+        self._franjas[(prestador_id, fecha)].quitar(clave)
+
+    def _simultaneos_max(self, cruces, ini, fi):
+        """Máximo de visitas en curso a la vez dentro de [ini, fi)"""
+        eventos = sorted([(max(c[0], ini), 1) for c in cruces] + [(min(c[1], fi), -1) for c in cruces],
+                         key=lambda e: (e[0], e[1]))
+        en_curso = maximo = 0
+        for _, delta in eventos:
+            en_curso += delta
+            maximo = max(maximo, en_curso)
+        return maximo
+
+    def _admitidos(self, prestador_id):
+        prestador = self.prestadores.get(prestador_id)
+        return (prestador.recorridos_por_turno if prestador is not None else None) or 1
+
+    def primer_hueco(self, prestador_id, fecha, desde, duracion, hasta):
+        """Primer inicio (en minutos) >= desde donde entra una visita de `duracion` antes de `hasta`"""
+        franjas = self._franjas[(prestador_id, fecha)]
+        admitidos = self._admitidos(prestador_id)
+        inicio = desde
+        while inicio + duracion <= hasta:
+            cruces = franjas.superpuestas(inicio, inicio + duracion)
+            if not cruces or self._simultaneos_max(cruces, inicio, inicio + duracion) < admitidos:
+                return inicio
+            inicio = min(c[1] for c in cruces)
+        return None
+
+    def verificar(self, prestador_id, fecha, inicio, fin=None, visitantes=0, excluir=None):
+        """Devuelve None si la franja entra, o un mensaje con el motivo del rechazo.
+
+        Valida que fin > inicio, el cupo `visitantes_maximo` y que no se
+        superen `recorridos_por_turno` visitas simultáneas.
+        """
+        prestador = self.prestadores.get(prestador_id)
+        ini, fi = self._rango(prestador_id, inicio, fin)
+        if fi <= ini:
+            return 'La hora de fin debe ser posterior a la de inicio'
+        if prestador is not None and prestador.visitantes_maximo and visitantes > prestador.visitantes_maximo:
+            return f'El grupo ({visitantes}) supera la capacidad máxima del prestador ({prestador.visitantes_maximo})'
+
+        cruces = self._franjas[(prestador_id, fecha)].superpuestas(ini, fi, excluir=excluir)
+        if not cruces:
+            return None
+        simultaneos = self._admitidos(prestador_id)
+        if self._simultaneos_max(cruces, ini, fi) + 1 > simultaneos:
+            primero = cruces[0]
+            return (f'Se superpone con otra visita ({minutos_a_texto(primero[0])} - '
+                    f'{minutos_a_texto(primero[1])}) y el prestador admite {simultaneos} a la vez')
+        return None
+
+    def validar_tablero(self, propuestas):
+        """Valida un conjunto de asignaciones en orden, sumando las aceptadas a la agenda.
+
+        Cada propuesta es un dict con prestador_id, fecha, hora_inicio,
+        hora_fin, visitantes y opcionalmente clave (id de visita existente
+        que se reemplaza). Devuelve una lista de None / mensaje de error.
+        """
+        resultados = []
+        for i, p in enumerate(propuestas):
+            clave = p.get('clave')
+            error = self.verificar(p['prestador_id'], p['fecha'], p['hora_inicio'], p.get('hora_fin'),
+                                   visitantes=p.get('visitantes', 0), excluir=clave)
+            if error is None:
+                if clave is not None:
+                    self.quitar(p['prestador_id'], p['fecha'], clave)
+                self.agregar(p['prestador_id'], p['fecha'], p['hora_inicio'], p.get('hora_fin'),
+                             clave=clave if clave is not None else ('nueva', i),
+                             visitantes=p.get('visitantes', 0))
+            resultados.append(error)
+        return resultados
+
+
+def proponer_itinerario(solicitud, traslado=15):
+    """Arma un recorrido sin superposiciones para los prestadores pedidos.
+
+    Respeta la franja de horario_preferido, la duración de cada visita, las
+    reservas ya confirmadas de cada prestador, su capacidad y `traslado`
+    minutos entre un lugar y el siguiente. En cada paso elige el prestador
+    que puede terminar antes (heurística de fin más temprano). Devuelve
+    (itinerario, sin_lugar): el primero con prestador_id, prestador_nombre,
+    hora_inicio y hora_fin ('HH:MM'); el segundo con prestador_nombre y motivo.
+    """
+    prestadores = list(solicitud.prestadores)
+    fecha = solicitud.fecha_solicitada
+    visitantes = solicitud.get_total_visitantes()
+    desde, hasta = ventana_para(solicitud.horario_preferido)
+
+    agenda = Agenda.cargar(prestadores, [fecha])
+    # las visitas actuales de esta solicitud se vuelven a planificar
+    for v in solicitud.visitas_asignadas:
+        agenda.quitar(v.prestador_id, v.fecha_confirmada, v.id)
+
+    sin_lugar = []
+    pendientes = []
+    for p in prestadores:
+        if p.visitantes_maximo and visitantes > p.visitantes_maximo:
+            sin_lugar.append({'prestador_nombre': p.razon_social,
+                              'motivo': f'El grupo ({visitantes}) supera la capacidad ({p.visitantes_maximo})'})
+        else:
+            pendientes.append((p, p.get_duracion_minutos() or DURACION_POR_DEFECTO))
+
+    itinerario = []
+    actual = desde
+    while pendientes:
+        mejor = None
+        for i, (p, duracion) in enumerate(pendientes):
+            inicio = agenda.primer_hueco(p.id, fecha, actual, duracion, hasta)
+            if inicio is not None and (mejor is None or inicio + duracion < mejor[1] + mejor[2]):
+                mejor = (i, inicio, duracion)
+        if mejor is None:
+            break
+        i, inicio, duracion = mejor
+        p, _ = pendientes.pop(i)
+        agenda.agregar(p.id, fecha, minutos_a_hora(inicio), minutos_a_hora(inicio + duracion),
+                       clave=('propuesta', p.id), visitantes=visitantes)
+        itinerario.append({
+            'prestador_id': p.id,
+            'prestador_nombre': p.razon_social,
+            'hora_inicio': minutos_a_texto(inicio),
+            'hora_fin': minutos_a_texto(inicio + duracion),
+        })
+        actual = inicio + duracion + traslado
+
+    for p, _ in pendientes:
+        sin_lugar.append({'prestador_nombre': p.razon_social,
+                          'motivo': 'No hay horario libre dentro de la franja preferida'})
+    return itinerario, sin_lugar
@@ -0,0 +1,135 @@
+"""Arranque rápido de los workers.
+
+- El esquema no se crea ni se inspecciona al importar la app: sólo se compara
+  la revisión de alembic_version con la cabeza de migrations/versions, que se
+  obtiene leyendo las líneas revision/down_revision de cada archivo (sin
+  importar Alembic ni los módulos de migración).
+- Flask-Migrate (Alembic, Mako, ...) y los comandos de `flask` se cargan sólo
+  cuando la app se crea desde la línea de comandos (ver create_app).
+- Las plantillas compiladas se guardan en disco (PLANTILLAS_CACHE); con
+  `flask arranque precompilar` en el despliegue ningún worker compila Jinja.
+- `flask arranque medir` mide en procesos nuevos el tiempo de importación,
+  de create_app() y de la primera respuesta.
+"""
+import glob
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+import click
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import inspect, text
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO_MIGRACIONES = os.path.join(RAIZ, 'migrations', 'versions')
+
+_REVISION = re.compile(r"^revision\s*=\s*['\"]([^'\"]+)['\"]", re.MULTILINE)
+_ANTERIOR = re.compile(r"^down_revision\s*=\s*(.+)$", re.MULTILINE)
+
+
+# REVISIÓN DEL ESQUEMA
+
+def revisiones(directorio=DIRECTORIO_MIGRACIONES):
+    """{revisión: (revisiones anteriores,)} leídas del texto de cada migración"""
+    grafo = {}
+    for ruta in glob.glob(os.path.join(directorio, '*.py')):
+        with open(ruta, encoding='utf-8') as archivo:
+            fuente = archivo.read()
+        revision, anterior = _REVISION.search(fuente), _ANTERIOR.search(fuente)
+        if revision:
+            grafo[revision.group(1)] = tuple(re.findall(r"['\"]([^'\"]+)['\"]", anterior.group(1))) if anterior else ()
+    return grafo
+
+
+def cabezas(directorio=DIRECTORIO_MIGRACIONES):
+    grafo = revisiones(directorio)
+    anteriores = {r for previas in grafo.values() for r in previas}
+    return set(grafo) - anteriores
+
+
+def revision_actual(db):
+    """Revisión aplicada en la base, o None si no hay tabla alembic_version"""
+    with db.engine.connect() as conexion:
+        if not inspect(conexion).has_table('alembic_version'):
+            return None
+        return conexion.execute(text('SELECT version_num FROM alembic_version')).scalar()
+
+
+def verificar_revision(app, db, debug=None):
+    """Compara la base con la última migración.
+
+    Levanta RuntimeError si la base está atrasada (o vacía) salvo en modo
+    debug (`debug`, o app.debug si no se indica), donde sólo avisa. Una revisión desconocida (base más nueva que el
+    código, p. ej. durante un despliegue escalonado) sólo se avisa. Desde
+    `flask ...` no se verifica: es justamente por donde se migra.
+    """
+    if click.get_current_context(silent=True) is not None:
+        return None
+    with app.app_context():
+        actual = revision_actual(db)
+    esperadas = cabezas()
+    if actual in esperadas:
+        return actual
+    if actual is not None and actual not in revisiones():
+        app.logger.warning('La base está en la revisión %s, desconocida para este código (cabeza: %s)',
+                           actual, ', '.join(sorted(esperadas)))
+        return actual
+    mensaje = (f"La base está en la revisión {actual or '(vacía)'} y la última migración es "
+               f"{', '.join(sorted(esperadas))}: ejecutar `flask db upgrade`")
+    if app.debug if debug is None else debug:
+        app.logger.warning(mensaje)
+        return actual
+    raise RuntimeError(mensaje)
+
+
+# PLANTILLAS
+
+def configurar_plantillas(app):
+    """Cache de bytecode de Jinja en disco si PLANTILLAS_CACHE tiene una carpeta"""
+    carpeta = app.config.get('PLANTILLAS_CACHE')
+    if not carpeta:
+        return
+    os.makedirs(carpeta, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(carpeta)}
+
+
+def precompilar_plantillas(app):
+    """Compila todas las plantillas (y las deja en la cache de bytecode). Devuelve la cantidad"""
+    nombres = app.jinja_env.list_templates()
+    for nombre in nombres:
+        app.jinja_env.get_template(nombre)
+    return len(nombres)
+
+
+# MEDICIÓN
+
+_SCRIPT_MEDICION = '''
+import json, sys, time
+inicio = time.perf_counter()
+from app import create_app
+importado = time.perf_counter()
+app = create_app()
+creado = time.perf_counter()
+respuesta = app.test_client().get(sys.argv[1])
+fin = time.perf_counter()
+print(json.dumps({"importar_ms": (importado - inicio) * 1000, "crear_app_ms": (creado - importado) * 1000,
+                  "primera_respuesta_ms": (fin - creado) * 1000, "estado": respuesta.status_code}))
+'''
+
+
+def medir(url='/', veces=5, entorno=None):
+    """Arranca `veces` procesos nuevos y devuelve la mediana de cada etapa en ms"""
+    variables = {**os.environ, **(entorno or {})}
+    muestras = []
+    for _ in range(veces):
+        salida = subprocess.run([sys.executable, '-c', _SCRIPT_MEDICION, url], cwd=RAIZ, env=variables,
+                                capture_output=True, text=True, check=True)
+        muestras.append(json.loads(salida.stdout.strip().splitlines()[-1]))
+    resultado = {clave: round(statistics.median(m[clave] for m in muestras), 1)
+                 for clave in ('importar_ms', 'crear_app_ms', 'primera_respuesta_ms')}
+    resultado['total_ms'] = round(sum(resultado.values()), 1)
+    resultado['estado'] = muestras[-1]['estado']
+    return resultado
@@ -0,0 +1,46 @@
+"""Ajustes del motor de base de datos según el dialecto.
+
+SQLite: cada conexión nueva pasa a modo WAL (los lectores no bloquean al
+escritor), synchronous=NORMAL (seguro con WAL y mucho más rápido) y un
+busy_timeout para que un worker espere el lock de escritura en lugar de
+fallar enseguida con "database is locked".
+
+PostgreSQL: el pool y el statement_timeout vienen de
+ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS.
+"""
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def _pragmas_sqlite(wal, busy_timeout_ms):
+    def aplicar(conexion_dbapi, registro):
+        cursor = conexion_dbapi.cursor()
+        try:
+            cursor.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+            if wal:
+                cursor.execute('PRAGMA journal_mode = WAL')
+                cursor.execute('PRAGMA synchronous = NORMAL')
+        finally:
+            cursor.close()
+    return aplicar
+
+
+def verificar_url(app):
+    """Falla al arrancar si falta la URL y crea la carpeta del archivo SQLite"""
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI')
+    if not uri:
+        raise RuntimeError('Falta DATABASE_URL para esta configuración')
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+        carpeta = os.path.dirname(os.path.abspath(url.database))
+        os.makedirs(carpeta, exist_ok=True)
+
+
+def configurar_motores(app, db):
+    with app.app_context():
+        for motor in db.engines.values():
+            if motor.dialect.name == 'sqlite':
+                event.listen(motor, 'connect', _pragmas_sqlite(app.config['SQLITE_WAL'],
+                                                               app.config['SQLITE_BUSY_TIMEOUT_MS']))
@@ -0,0 +1,147 @@
+"""Búsqueda de texto completo sobre solicitudes y prestadores.
+
+SQLite: tablas virtuales FTS5 de contenido externo (solicitud_fts,
+prestador_fts) con el tokenizador unicode61 sin diacríticos, mantenidas por
+triggers sobre la tabla original. PostgreSQL: columna `busqueda` tsvector
+(configuración 'simple' + unaccent) mantenida por trigger y un índice GIN.
+
+En ambos casos los triggers cubren también las inserciones masivas que no
+pasan por el ORM. La consulta del usuario se parte en palabras y cada una se
+busca como prefijo ("esper" encuentra "Esperanza"); sin distinguir acentos ni
+mayúsculas. El rango es menor cuanto mejor la coincidencia.
+
+No se recorta la lista de coincidencias antes de filtrar: los demás filtros
+(estado, fechas, prestador) se aplican sobre todas, y quien consulta pagina
+con LIMIT y un cursor (rango, id).
+"""
+import re
+
+from sqlalchemy import Float, Integer, text
+
+# tabla: (índice, [(columna, peso)]) — en PostgreSQL los pesos se traducen a A/B/C/D
+INDICES = {
+    'solicitud_visita': ('solicitud_fts', [('nombre_institucion', 10.0), ('localidad', 2.0),
+                                           ('responsable_nombre', 5.0), ('observaciones', 1.0),
+                                           ('necesidades_especiales', 1.0)]),
+    'prestador': ('prestador_fts', [('razon_social', 10.0), ('descripcion_visita', 1.0)]),
+}
+
+_CLASES_PG = ((10.0, 'A'), (5.0, 'B'), (2.0, 'C'), (0.0, 'D'))
+MAX_PALABRAS = 8
+
+
+def palabras(texto):
+    return re.findall(r'\w+', (texto or '').lower())[:MAX_PALABRAS]
+
+
+# DDL
+
+def _ddl_sqlite(tabla, indice, campos):
+    columnas = ', '.join(c for c, _ in campos)
+    nuevos = ', '.join(f'new.{c}' for c, _ in campos)
+    viejos = ', '.join(f'old.{c}' for c, _ in campos)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5({columnas}, content='{tabla}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_ai AFTER INSERT ON {tabla} BEGIN "
+        f"INSERT INTO {indice}(rowid, {columnas}) VALUES (new.id, {nuevos}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_ad AFTER DELETE ON {tabla} BEGIN "
+        f"INSERT INTO {indice}({indice}, rowid, {columnas}) VALUES ('delete', old.id, {viejos}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_au AFTER UPDATE OF {columnas} ON {tabla} BEGIN "
+        f"INSERT INTO {indice}({indice}, rowid, {columnas}) VALUES ('delete', old.id, {viejos}); "
+        f"INSERT INTO {indice}(rowid, {columnas}) VALUES (new.id, {nuevos}); END",
+    ]
+
+
+def _vector_pg(campos, prefijo):
+    partes = []
+    for columna, peso in campos:
+        clase = next(c for minimo, c in _CLASES_PG if peso >= minimo)
+        partes.append(f"setweight(to_tsvector('simple', unaccent(coalesce({prefijo}{columna}, ''))), '{clase}')")
+    return ' || '.join(partes)
+
+
+def _ddl_postgresql(tabla, indice, campos):
+    columnas = ', '.join(c for c, _ in campos)
+    return [
+        'CREATE EXTENSION IF NOT EXISTS unaccent',
+        f'ALTER TABLE {tabla} ADD COLUMN IF NOT EXISTS busqueda tsvector',
+        f"CREATE OR REPLACE FUNCTION {indice}_actualizar() RETURNS trigger AS $$ BEGIN "
+        f"NEW.busqueda := {_vector_pg(campos, 'NEW.')}; RETURN NEW; END $$ LANGUAGE plpgsql",
+        f'DROP TRIGGER IF EXISTS {indice}_actualizar ON {tabla}',
+        f'CREATE TRIGGER {indice}_actualizar BEFORE INSERT OR UPDATE OF {columnas} ON {tabla} '
+        f'FOR EACH ROW EXECUTE FUNCTION {indice}_actualizar()',
+        f'CREATE INDEX IF NOT EXISTS ix_{tabla}_busqueda ON {tabla} USING GIN (busqueda)',
+    ]
+
+
+def crear_indice(conexion, tabla):
+    """Crea el índice y los triggers de `tabla` según el dialecto (idempotente)"""
+    indice, campos = INDICES[tabla]
+    dialecto = conexion.dialect.name
+    if dialecto == 'sqlite':
+        sentencias = _ddl_sqlite(tabla, indice, campos)
+    elif dialecto == 'postgresql':
+        sentencias = _ddl_postgresql(tabla, indice, campos)
+    else:
+        return
+    for sentencia in sentencias:
+        conexion.exec_driver_sql(sentencia)
+
+
+def reconstruir_indice(conexion, tabla):
+    """Vuelve a indexar todas las filas existentes"""
+    indice, campos = INDICES[tabla]
+    if conexion.dialect.name == 'sqlite':
+        conexion.exec_driver_sql(f"INSERT INTO {indice}({indice}) VALUES ('rebuild')")
+    elif conexion.dialect.name == 'postgresql':
+        conexion.exec_driver_sql(f'UPDATE {tabla} SET busqueda = {_vector_pg(campos, "")}')
+
+
+def borrar_indice(conexion, tabla):
+    indice, _ = INDICES[tabla]
+    if conexion.dialect.name == 'sqlite':
+        for sufijo in ('ai', 'ad', 'au'):
+            conexion.exec_driver_sql(f'DROP TRIGGER IF EXISTS {indice}_{sufijo}')
+        conexion.exec_driver_sql(f'DROP TABLE IF EXISTS {indice}')
+    elif conexion.dialect.name == 'postgresql':
+        conexion.exec_driver_sql(f'DROP TRIGGER IF EXISTS {indice}_actualizar ON {tabla}')
+        conexion.exec_driver_sql(f'DROP FUNCTION IF EXISTS {indice}_actualizar()')
+        conexion.exec_driver_sql(f'DROP INDEX IF EXISTS ix_{tabla}_busqueda')
+        conexion.exec_driver_sql(f'ALTER TABLE {tabla} DROP COLUMN IF EXISTS busqueda')
+
+
+def al_crear_tabla(tabla, conexion, **kw):
+    """Listener after_create: db.create_all() también deja armada la búsqueda"""
+    crear_indice(conexion, tabla.name)
+
+
+def al_borrar_tabla(tabla, conexion, **kw):
+    """Listener before_drop"""
+    borrar_indice(conexion, tabla.name)
+
+
+# CONSULTA
+
+def coincidencias(tabla, texto, dialecto):
+    """Subconsulta (id, rango) con las filas de `tabla` que contienen todas las palabras.
+
+    Devuelve None si el texto no tiene palabras o el motor no tiene índice.
+    """
+    terminos = palabras(texto)
+    if not terminos:
+        return None
+    indice, campos = INDICES[tabla]
+    if dialecto == 'sqlite':
+        consulta = ' '.join(f'"{t}"*' for t in terminos)
+        pesos = ', '.join(str(peso) for _, peso in campos)
+        sql = text(f'SELECT rowid AS id, bm25({indice}, {pesos}) AS rango FROM {indice} '
+                   f'WHERE {indice} MATCH :consulta')
+    elif dialecto == 'postgresql':
+        consulta = ' & '.join(f'{t}:*' for t in terminos)
+        sql = text(f"SELECT id, -ts_rank(busqueda, q) AS rango FROM {tabla}, "
+                   f"to_tsquery('simple', unaccent(:consulta)) AS q WHERE busqueda @@ q")
+    else:
+        return None
+    return sql.bindparams(consulta=consulta) \
+        .columns(id=Integer, rango=Float).subquery(indice)
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+
+_AUSENTE = object()
+
+# Todas las caches creadas en el proceso (para /admin/metrics)
+registradas = []
+
+
+class CacheTTL:
+    """Cache en memoria del proceso, acotada en cantidad de entradas (LRU) y con vencimiento.
+
+    Es segura entre hilos y lleva contadores de aciertos y fallos. Cada worker
+    tiene su propia copia: el TTL acota cuánto puede quedar desactualizada
+    una entrada que se modificó desde otro proceso.
+    """
+
+    def __init__(self, nombre, max_entradas=1024, ttl=60):
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        registradas.append(self)
+
+    def configurar(self, max_entradas=None, ttl=None):
+        with self._lock:
+            if max_entradas is not None:
+                self.max_entradas = max_entradas
+            if ttl is not None:
+                self.ttl = ttl
+            self._datos.clear()
+
+    def get(self, clave, default=None):
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave, _AUSENTE)
+            if entrada is not _AUSENTE:
+                vence, valor = entrada
+                if vence > ahora:
+                    self._datos.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+                del self._datos[clave]
+            self.fallos += 1
+            return default
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def obtener(self, clave, cargar):
+        """Devuelve el valor cacheado o lo calcula con `cargar()` y lo guarda.
+
+        Si `cargar` devuelve None no se guarda nada.
+        """
+        valor = self.get(clave, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = cargar()
+            if valor is not None:
+                self.set(clave, valor)
+        return valor
+
+    def invalidar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'nombre': self.nombre,
+                'entradas': len(self._datos),
+                'max_entradas': self.max_entradas,
+                'ttl': self.ttl,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0.0,
+            }
@@ -0,0 +1,133 @@
+"""Feed iCalendar (.ics) de las visitas de cada prestador.
+
+Cada prestador tiene un token secreto para suscribirse desde su calendario y
+un número de versión de agenda (prestador.agenda_version) que se incrementa
+cuando cambia alguna de sus visitas. La versión es el ETag del feed y la
+clave de la cache: un cliente que consulta cada pocos minutos recibe un 304
+después de una sola consulta por token, sin leer visitas ni armar el .ics.
+"""
+import secrets
+from datetime import datetime, timedelta
+
+from app import db
+from app.agenda import DURACION_POR_DEFECTO, a_minutos, minutos_a_hora
+from app.cache import CacheTTL
+
+calendarios = CacheTTL('calendarios', max_entradas=256, ttl=3600)
+
+# Días hacia atrás que se incluyen en el feed
+DIAS_HISTORIAL = 90
+
+_ESTADOS_ICS = {'CANCELADA': 'CANCELLED', 'PROGRAMADA': 'CONFIRMED', 'EN_CURSO': 'CONFIRMED',
+                'COMPLETADA': 'CONFIRMED'}
+
+
+def nuevo_token():
+    return secrets.token_urlsafe(32)
+
+
+def marcar_agendas(connection, prestador_ids):
+    """Incrementa la versión de agenda de esos prestadores (misma transacción que el cambio)"""
+    from app.models.prestador import Prestador
+
+    prestador_ids = sorted({p for p in prestador_ids if p is not None})
+    if not prestador_ids:
+        return
+    tabla = Prestador.__table__
+    connection.execute(
+        tabla.update()
+        .where(tabla.c.id.in_(prestador_ids))
+        .values(agenda_version=db.func.coalesce(tabla.c.agenda_version, 0) + 1,
+                agenda_actualizada=datetime.utcnow().replace(microsecond=0))
+    )
+
+
+def _escapar(texto):
+    return (str(texto or '').replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _plegar(linea):
+    """Corta las líneas de más de 75 octetos como pide RFC 5545"""
+    datos = linea.encode('utf-8')
+    if len(datos) <= 75:
+        return linea
+    partes, actual = [], ''
+    for caracter in linea:
+        limite = 75 if not partes else 74
+        if len((actual + caracter).encode('utf-8')) > limite:
+            partes.append(actual)
+            actual = caracter
+        else:
+            actual += caracter
+    partes.append(actual)
+    return '\r\n '.join(partes)
+
+
+def _fecha_hora(fecha, hora):
+    return datetime.combine(fecha, hora).strftime('%Y%m%dT%H%M%S')
+
+
+def generar_ics(prestador, visitas, dtstamp):
+    """Arma el .ics (bytes) con una VEVENT por visita"""
+    sello = (dtstamp or datetime.utcnow()).strftime('%Y%m%dT%H%M%SZ')
+    duracion = prestador.get_duracion_minutos() or DURACION_POR_DEFECTO
+    lineas = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Turismo Esperanza//Visitas//ES',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escapar("Visitas - " + prestador.razon_social)}',
+        'X-WR-TIMEZONE:America/Argentina/Buenos_Aires',
+    ]
+    for v in visitas:
+        s = v.solicitud
+        fin = v.hora_fin or minutos_a_hora(min(a_minutos(v.hora_inicio) + duracion, 23 * 60 + 59))
+        visitantes = v.visitantes_reales or s.get_total_visitantes()
+        descripcion = [f'Grupo {v.grupo or 1}', f'Visitantes: {visitantes}']
+        if s.nivel_educativo:
+            descripcion.append(f'Nivel: {s.nivel_educativo}')
+        if s.responsable_nombre:
+            descripcion.append(f'Responsable: {s.responsable_nombre} ({s.responsable_telefono or "-"})')
+        if v.observaciones_prestador:
+            descripcion.append(f'Observaciones: {v.observaciones_prestador}')
+        lineas += [
+            'BEGIN:VEVENT',
+            f'UID:visita-{v.id}@turismo-esperanza',
+            f'DTSTAMP:{sello}',
+            f'DTSTART:{_fecha_hora(v.fecha_confirmada, v.hora_inicio)}',
+            f'DTEND:{_fecha_hora(v.fecha_confirmada, fin)}',
+            f'SUMMARY:{_escapar(f"{s.nombre_institucion} ({visitantes})")}',
+            f'LOCATION:{_escapar(v.sala_o_area or prestador.direccion)}',
+            f'DESCRIPTION:{_escapar(chr(10).join(descripcion))}',
+            f'STATUS:{_ESTADOS_ICS.get(v.estado_visita, "CONFIRMED")}',
+            'END:VEVENT',
+        ]
+    lineas.append('END:VCALENDAR')
+    return ('\r\n'.join(_plegar(l) for l in lineas) + '\r\n').encode('utf-8')
+
+
+def dia_calendario():
+    """Día (UTC) que entra en el ETag y en la clave de cache del feed"""
+    return datetime.utcnow().date()
+
+
+def obtener_ics(prestador, hoy=None):
+    """.ics del prestador para su versión de agenda actual (cacheado por versión).
+
+    `hoy` debe ser el mismo día que se usó para el ETag (dia_calendario()).
+    """
+    from sqlalchemy.orm import joinedload
+    from app.models.visita_prestador import VisitaPrestador
+
+    def _cargar():
+        visitas = VisitaPrestador.get_visitas_por_prestador(
+            prestador.id,
+            fecha_desde=hoy - timedelta(days=DIAS_HISTORIAL),
+            opciones=(joinedload(VisitaPrestador.solicitud),)
+        )
+        return generar_ics(prestador, visitas, prestador.agenda_actualizada)
+
+    hoy = hoy or dia_calendario()
+    return calendarios.obtener((prestador.id, prestador.agenda_version or 0, hoy), _cargar)
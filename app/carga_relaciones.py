@@ -0,0 +1,49 @@
+"""Modo estricto de carga de relaciones.
+
+Las relaciones de los modelos se cargan en forma perezosa (lazy='select')
+salvo que la consulta declare otra estrategia; cada ruta de lectura indica
+con joinedload/selectinload lo que va a usar. Con CARGA_ESTRICTA activado
+(desarrollo, verificación de planes y pruebas de carga) cualquier carga
+perezosa que emita SQL durante un pedido GET levanta CargaPerezosaError, de
+modo que un N+1 accidental aparece como error y no como lentitud.
+
+Es el equivalente de raiseload('*') pero alcanza también a los objetos
+traídos por joinedload/selectinload anidados. Las rutas POST no se
+verifican: ahí cargar una relación de un único objeto es lo esperado.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_permitidas = ContextVar('cargas_perezosas_permitidas', default=False)
+
+
+class CargaPerezosaError(RuntimeError):
+    pass
+
+
+@contextmanager
+def permitir_cargas_perezosas():
+    """Deja pasar cargas perezosas dentro del bloque (uso puntual y justificado)"""
+    token = _permitidas.set(True)
+    try:
+        yield
+    finally:
+        _permitidas.reset(token)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _verificar_carga(orm_execute_state):
+    if not orm_execute_state.is_select or orm_execute_state.lazy_loaded_from is None or _permitidas.get():
+        return
+    if not has_request_context() or request.method not in ('GET', 'HEAD'):
+        return
+    if not current_app.config.get('CARGA_ESTRICTA'):
+        return
+    raise CargaPerezosaError(
+        f'Carga perezosa de {orm_execute_state.loader_strategy_path} en {request.endpoint}: '
+        f'declarar joinedload/selectinload en la consulta de la ruta'
+    )
@@ -0,0 +1,69 @@
+"""Catálogo público de lugares por nivel y origen, derivado de la tabla prestador.
+
+Se arma una sola vez y se guarda en una CacheTTL junto con su ETag (hash del
+JSON). Cualquier alta, baja o modificación de un prestador lo invalida al
+confirmarse la transacción; el TTL acota cuánto puede quedar desactualizado
+en otros procesos.
+"""
+import hashlib
+import json
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.cache import CacheTTL
+from app import elegibilidad
+
+catalogo = CacheTTL('catalogo', max_entradas=1, ttl=300)
+
+NIVELES = ('Primaria', 'Secundaria')
+_CLAVE = 'catalogo'
+
+
+def _construir():
+    from app import db
+    from app.models.prestador import Prestador
+
+    filas = db.session.query(Prestador.razon_social, Prestador.mascara_edades, Prestador.recibe_externas) \
+        .filter(Prestador.activo.is_(True), Prestador.role == 'prestador') \
+        .order_by(Prestador.razon_social).all()
+
+    lugares = {f'{nivel}_{origen}': [] for nivel in NIVELES for origen in ('Interior', 'Exterior')}
+    for nombre, mascara, recibe_externas in filas:
+        mascara = elegibilidad.TODAS_EDADES if mascara is None else mascara
+        for nivel in NIVELES:
+            if not mascara & (1 << elegibilidad.EDADES.index(nivel.lower())):
+                continue
+            lugares[f'{nivel}_Interior'].append(nombre)
+            if recibe_externas is not False:
+                lugares[f'{nivel}_Exterior'].append(nombre)
+
+    cuerpo = json.dumps({'lugares': lugares}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return cuerpo, hashlib.sha256(cuerpo).hexdigest()[:32]
+
+
+def obtener_catalogo():
+    """(cuerpo JSON en bytes, etag)"""
+    return catalogo.obtener(_CLAVE, _construir)
+
+
+def invalidar_catalogo():
+    catalogo.invalidar(_CLAVE)
+
+
+def marcar_modificado(prestador):
+    """Anota en la sesión que el catálogo debe invalidarse cuando se confirme"""
+    sesion = object_session(prestador)
+    if sesion is not None:
+        sesion.info['catalogo_modificado'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidar_al_confirmar(session):
+    if session.info.pop('catalogo_modificado', False):
+        invalidar_catalogo()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_marca(session):
+    session.info.pop('catalogo_modificado', None)
@@ -0,0 +1,268 @@
+import click
+from flask.cli import AppGroup
+
+contadores_cli = AppGroup('contadores', help='Contadores de solicitudes por estado.')
+
+
+@contadores_cli.command('reconstruir')
+def reconstruir_contadores():
+    """Recalcula contador_estado a partir de solicitud_visita."""
+    from app.models.contador_estado import ContadorEstado
+
+    conteo = ContadorEstado.reconstruir()
+    for estado, cantidad in sorted(conteo.items()):
+        click.echo(f'{estado}: {cantidad}')
+    click.echo(f'✅ Contadores reconstruidos ({sum(conteo.values())} solicitudes)')
+
+
+reportes_cli = AppGroup('reportes', help='Resúmenes precalculados para reportes.')
+
+
+@reportes_cli.command('reconstruir')
+def reconstruir_reportes():
+    """Recalcula resumen_diario a partir de solicitud_visita."""
+    from app.models.resumen_diario import ResumenDiario
+
+    filas = ResumenDiario.reconstruir()
+    click.echo(f'✅ Resúmenes reconstruidos ({filas} filas)')
+
+
+correo_cli = AppGroup('correo', help='Bandeja de salida de correos.')
+
+
+@correo_cli.command('enviar')
+def enviar_correos():
+    """Envía en una pasada todos los correos pendientes vencidos."""
+    from app.correo import enviar_pendientes
+
+    total_enviados = total_fallidos = 0
+    while True:
+        enviados, fallidos = enviar_pendientes()
+        if not enviados and not fallidos:
+            break
+        total_enviados += enviados
+        total_fallidos += fallidos
+    click.echo(f'✅ {total_enviados} enviados, {total_fallidos} reprogramados o con error')
+
+
+@correo_cli.command('despachar')
+def despachar_correos():
+    """Corre el despachador en primer plano (proceso dedicado)."""
+    from flask import current_app
+    from app.correo import despachador
+
+    despachador.iniciar(current_app._get_current_object())
+    click.echo('📬 Despachador de correo en ejecución (Ctrl+C para salir)')
+    try:
+        # de a un segundo para que Ctrl+C llegue al hilo principal
+        while despachador.esperar(1):
+            pass
+    except KeyboardInterrupt:
+        pass
+
+
+consultas_cli = AppGroup('consultas', help='Diagnóstico de consultas SQL.')
+
+
+@consultas_cli.command('verificar-planes')
+@click.option('--verbose', '-v', is_flag=True, help='Muestra el plan de todas las sentencias.')
+def verificar_planes(verbose):
+    """Falla si alguna consulta frecuente hace un recorrido completo de tabla."""
+    from app.planes_consulta import verificar_planes as _verificar, RutaFallida
+
+    try:
+        resultados = _verificar()
+    except RutaFallida as e:
+        click.echo(f'❌ {e}')
+        raise SystemExit(1)
+    fallidas = [r for r in resultados if r[2]]
+    for sql, plan, completo in resultados:
+        if completo or verbose:
+            click.echo(('❌ ' if completo else '✅ ') + ' '.join(sql.split()))
+            for detalle in plan:
+                click.echo(f'     {detalle}')
+    click.echo(f'{len(resultados)} sentencias verificadas, {len(fallidas)} con recorrido completo')
+    if fallidas:
+        raise SystemExit(1)
+
+
+datos_cli = AppGroup('datos', help='Datos sintéticos para pruebas.')
+
+
+@datos_cli.command('sembrar')
+@click.option('--prestadores', default=500, show_default=True)
+@click.option('--solicitudes', default=200_000, show_default=True)
+@click.option('--visitas', default=600_000, show_default=True, help='Objetivo aproximado.')
+@click.option('--semilla', default=1, show_default=True)
+@click.option('--lote', default=5000, show_default=True, help='Filas por inserción.')
+@click.option('--forzar', is_flag=True, help='Cargar aunque sea producción o haya datos reales.')
+def sembrar_datos(prestadores, solicitudes, visitas, semilla, lote, forzar):
+    """Carga un conjunto sintético (no usar sobre datos reales)."""
+    import time
+    from flask import current_app
+    from app.datos_sinteticos import sembrar, datos_reales, CLAVE, EMAIL_ADMIN
+
+    # el administrador sintético tiene una clave conocida
+    if not forzar:
+        if not current_app.config['DATOS_SINTETICOS']:
+            click.echo('❌ Los datos sintéticos están deshabilitados en este entorno (usá --forzar)')
+            raise SystemExit(1)
+        reales = datos_reales()
+        if reales:
+            click.echo(f'❌ La base ya tiene datos reales ({reales} prestadores o solicitudes); usá --forzar')
+            raise SystemExit(1)
+
+    inicio = time.perf_counter()
+    totales = sembrar(prestadores, solicitudes, visitas, semilla=semilla, lote=lote,
+                      avance=lambda mensaje: click.echo(f'  … {mensaje}'))
+    for tabla, filas in totales.items():
+        click.echo(f'{tabla}: {filas}')
+    click.echo(f'✅ Datos sintéticos cargados en {time.perf_counter() - inicio:.1f}s '
+               f'(admin: {EMAIL_ADMIN} / {CLAVE})')
+
+
+carga_cli = AppGroup('carga', help='Pruebas de carga.')
+
+
+@carga_cli.command('correr')
+@click.option('--usuarios', default=20, show_default=True, help='Usuarios simultáneos.')
+@click.option('--duracion', default=30, show_default=True, help='Segundos.')
+@click.option('--url', default=None, help='Servidor a probar; sin URL corre dentro del proceso.')
+@click.option('--base', 'archivo_base', default=None, help='JSON con la línea de base a comparar.')
+@click.option('--guardar-base', is_flag=True, help='Guarda este resultado como línea de base.')
+@click.option('--tolerancia', default=0.2, show_default=True, help='Empeoramiento admitido (0.2 = 20%).')
+@click.option('--sin-limites', is_flag=True, help='Desactiva el límite del formulario público (sólo en proceso).')
+def correr_carga(usuarios, duracion, url, archivo_base, guardar_base, tolerancia, sin_limites):
+    """Simula usuarios concurrentes y reporta p50/p95/p99 y throughput por ruta."""
+    import os
+    from flask import current_app
+    from app.limites import AlmacenMemoria, limitador
+    from app import prueba_carga
+
+    if not url:
+        # sin el estado de corridas anteriores (instance/limites.db), cada corrida parte igual
+        limitador.almacen = AlmacenMemoria()
+        if sin_limites:
+            limitador.reglas = {tipo: (10 ** 9, periodo) for tipo, (_, periodo) in limitador.reglas.items()}
+    escenario = prueba_carga.Escenario.desde_base()
+    if not escenario.prestadores:
+        click.echo('⚠️  No hay prestadores sintéticos: corré antes `flask datos sembrar`')
+    resultado = prueba_carga.correr(current_app._get_current_object(), escenario,
+                                    usuarios=usuarios, duracion=duracion, url=url)
+
+    click.echo(f'{"ruta":28} {"pedidos":>8} {"err":>5} {"429":>5} {"p50":>8} {"p95":>8} {"p99":>8} {"rps":>8}')
+    for ruta, m in resultado.items():
+        click.echo(f'{ruta:28} {m["pedidos"]:>8} {m["errores"]:>5} {m["limitadas"]:>5} '
+                   f'{m["p50_ms"]:>8} {m["p95_ms"]:>8} {m["p99_ms"]:>8} {m["rps"]:>8}')
+
+    if archivo_base and guardar_base:
+        prueba_carga.guardar_base(archivo_base, resultado, usuarios, duracion)
+        click.echo(f'💾 Línea de base guardada en {archivo_base}')
+    elif archivo_base and os.path.exists(archivo_base):
+        regresiones = prueba_carga.comparar(resultado, prueba_carga.leer_base(archivo_base), tolerancia)
+        for regresion in regresiones:
+            click.echo(f'❌ {regresion}')
+        if regresiones:
+            raise SystemExit(1)
+        click.echo('✅ Sin regresiones respecto de la línea de base')
+
+
+estaticos_cli = AppGroup('estaticos', help='Archivos estáticos con huella y precomprimidos.')
+
+
+@estaticos_cli.command('construir')
+def construir_estaticos():
+    """Genera app/static/dist (nombres con hash, .gz/.br y manifest.json)."""
+    import os
+    from flask import current_app
+    from app import estaticos
+
+    manifiesto = estaticos.construir(current_app.static_folder)
+    salida = os.path.join(current_app.static_folder, estaticos.DIRECTORIO_SALIDA)
+    for original, destino in sorted(manifiesto.items()):
+        variantes = [s for s in ('.gz', '.br') if os.path.exists(os.path.join(salida, destino + s))]
+        click.echo(f'{original} -> {destino} {" ".join(variantes)}')
+    if estaticos.brotli is None:
+        click.echo('⚠️  Paquete Brotli no instalado: sólo se generaron variantes .gz')
+    click.echo(f'✅ {len(manifiesto)} archivos en {salida} (reiniciar la app para usar el manifiesto)')
+
+
+arranque_cli = AppGroup('arranque', help='Arranque de los workers.')
+
+
+@arranque_cli.command('precompilar')
+def precompilar():
+    """Compila todas las plantillas en la cache de bytecode (PLANTILLAS_CACHE)."""
+    from flask import current_app
+    from app.arranque import precompilar_plantillas
+
+    if not current_app.config.get('PLANTILLAS_CACHE'):
+        click.echo('⚠️  PLANTILLAS_CACHE vacío: no hay dónde guardar las plantillas compiladas')
+        raise SystemExit(1)
+    cantidad = precompilar_plantillas(current_app)
+    click.echo(f'✅ {cantidad} plantillas compiladas en {current_app.config["PLANTILLAS_CACHE"]}')
+
+
+@arranque_cli.command('medir')
+@click.option('--url', default='/', show_default=True, help='Ruta del primer pedido.')
+@click.option('--veces', default=5, show_default=True, help='Procesos a arrancar.')
+def medir_arranque(url, veces):
+    """Mide importación, create_app() y primera respuesta en procesos nuevos (mediana)."""
+    from app.arranque import medir, cabezas, revision_actual
+    from app import db
+
+    resultado = medir(url=url, veces=veces)
+    for etapa in ('importar_ms', 'crear_app_ms', 'primera_respuesta_ms', 'total_ms'):
+        click.echo(f'{etapa:22} {resultado[etapa]:>8} ms')
+    click.echo(f'estado HTTP de {url}: {resultado["estado"]}')
+    actual = revision_actual(db)
+    if actual not in cabezas():
+        click.echo(f'⚠️  La base está en {actual or "(vacía)"}: run.py no arranca hasta `flask db upgrade`')
+
+
+prestadores_cli = AppGroup('prestadores', help='Alta masiva de prestadores.')
+
+
+@prestadores_cli.command('importar')
+@click.argument('archivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--lote', default=None, type=int, help='Filas por INSERT (IMPORTACION_LOTE).')
+@click.option('--procesos', default=None, type=int, help='Procesos para hashear (IMPORTACION_PROCESOS; 1: sin pool).')
+@click.option('--simular', is_flag=True, help='Sólo valida el archivo, sin guardar.')
+def importar_prestadores(archivo, lote, procesos, simular):
+    """Importa prestadores desde un CSV o XLSX (una fila por prestador)."""
+    from flask import current_app
+    from app.importacion import importar, ImportacionInvalida
+
+    with open(archivo, 'rb') as binario:
+        try:
+            resultado = importar(binario, archivo,
+                                 lote=lote or current_app.config['IMPORTACION_LOTE'],
+                                 procesos=procesos or current_app.config['IMPORTACION_PROCESOS'],
+                                 simular=simular)
+        except ImportacionInvalida as e:
+            click.echo(f'❌ {e}')
+            raise SystemExit(1)
+    if resultado.ignoradas:
+        click.echo(f'⚠️  Columnas ignoradas: {", ".join(resultado.ignoradas)}')
+    for fila, mensajes in resultado.errores:
+        click.echo(f'❌ fila {fila}: {"; ".join(mensajes)}')
+    if resultado.con_errores > len(resultado.errores):
+        click.echo(f'   … y {resultado.con_errores - len(resultado.errores)} filas más con errores')
+    verbo = 'se importarían' if simular else 'importados'
+    click.echo(f'{"✅" if not resultado.con_errores else "⚠️ "} {resultado.importadas} prestadores {verbo}, '
+               f'{resultado.con_errores} filas con errores de {resultado.leidas} leídas '
+               f'en {resultado.segundos:.1f}s')
+    if resultado.con_errores:
+        raise SystemExit(1)
+
+
+def register_commands(app):
+    app.cli.add_command(contadores_cli)
+    app.cli.add_command(reportes_cli)
+    app.cli.add_command(correo_cli)
+    app.cli.add_command(consultas_cli)
+    app.cli.add_command(datos_cli)
+    app.cli.add_command(carga_cli)
+    app.cli.add_command(estaticos_cli)
+    app.cli.add_command(arranque_cli)
+    app.cli.add_command(prestadores_cli)
@@ -0,0 +1,189 @@
+"""Envío de notificaciones por correo a través de la bandeja de salida.
+
+Las rutas sólo graban filas en correo_saliente (dentro de su transacción) y
+responden sin esperar al servidor SMTP. Un hilo despachador toma los
+pendientes en lotes, los envía por una única conexión SMTP reutilizada y
+reprograma los que fallan con espera exponencial. El hilo se inicia con el
+primer correo encolado; `flask correo despachar` lo corre como proceso
+aparte y `flask correo enviar` hace una sola pasada.
+
+Para probar contra un servidor SMTP local:
+    python -m aiosmtpd -n -l localhost:1025
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_TLS=false flask correo enviar
+"""
+import logging
+import secrets
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app, render_template
+from flask_mail import Message
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db, mail
+from app.models.correo_saliente import CorreoSaliente
+
+log = logging.getLogger(__name__)
+
+
+# NOTIFICACIONES
+
+def encolar_confirmacion(solicitud):
+    """Aviso al responsable de que la solicitud fue confirmada, con el detalle de visitas"""
+    return CorreoSaliente.encolar(
+        solicitud.responsable_email,
+        f'Visita confirmada - {solicitud.nombre_institucion}',
+        render_template('correo/solicitud_confirmada.txt', solicitud=solicitud),
+    )
+
+
+def encolar_rechazo(solicitud):
+    return CorreoSaliente.encolar(
+        solicitud.responsable_email,
+        f'Solicitud de visita - {solicitud.nombre_institucion}',
+        render_template('correo/solicitud_rechazada.txt', solicitud=solicitud),
+    )
+
+
+def encolar_aviso_visita(prestador, solicitud, visita):
+    """Aviso al prestador de una visita nueva o modificada (`visita` es un dict con los horarios)"""
+    return CorreoSaliente.encolar(
+        prestador.email,
+        f'Nueva visita asignada - {solicitud.nombre_institucion}',
+        render_template('correo/nueva_visita.txt', prestador=prestador, solicitud=solicitud, visita=visita),
+    )
+
+
+# DESPACHO
+
+def _reservar(lote, cantidad, ahora):
+    """Marca hasta `cantidad` pendientes vencidos con el id de lote; otro despachador no los toma"""
+    ids = [fila.id for fila in db.session.query(CorreoSaliente.id).filter(
+        CorreoSaliente.estado == 'PENDIENTE',
+        CorreoSaliente.proximo_intento <= ahora,
+    ).order_by(CorreoSaliente.proximo_intento).limit(cantidad)]
+    if not ids:
+        return []
+    reserva = timedelta(seconds=current_app.config['CORREO_RESERVA_SEGUNDOS'])
+    CorreoSaliente.query.filter(
+        CorreoSaliente.id.in_(ids),
+        CorreoSaliente.estado == 'PENDIENTE',
+        CorreoSaliente.proximo_intento <= ahora,
+    ).update({'lote': lote, 'proximo_intento': ahora + reserva}, synchronize_session=False)
+    db.session.commit()
+    return CorreoSaliente.query.filter_by(lote=lote).order_by(CorreoSaliente.id).all()
+
+
+def _reprogramar(correo, error, ahora):
+    correo.intentos += 1
+    correo.ultimo_error = str(error)[:1000]
+    correo.lote = None
+    if correo.intentos >= current_app.config['CORREO_MAX_INTENTOS']:
+        correo.estado = 'ERROR'
+    else:
+        espera = current_app.config['CORREO_REINTENTO_SEGUNDOS'] * 2 ** (correo.intentos - 1)
+        correo.proximo_intento = ahora + timedelta(seconds=espera)
+
+
+def enviar_pendientes(cantidad=None):
+    """Envía un lote de correos pendientes por una sola conexión SMTP.
+
+    Devuelve (enviados, fallidos).
+    """
+    cantidad = cantidad or current_app.config['CORREO_LOTE']
+    ahora = datetime.utcnow()
+    correos = _reservar(secrets.token_hex(16), cantidad, ahora)
+    if not correos:
+        return 0, 0
+
+    enviados = fallidos = 0
+    remitente = current_app.config.get('MAIL_DEFAULT_SENDER') or current_app.config.get('MAIL_USERNAME')
+    try:
+        with mail.connect() as conexion:
+            for correo in correos:
+                try:
+                    conexion.send(Message(correo.asunto, recipients=[correo.destinatario],
+                                          body=correo.cuerpo, sender=remitente))
+                    correo.estado = 'ENVIADO'
+                    correo.fecha_envio = datetime.utcnow()
+                    correo.lote = None
+                    enviados += 1
+                except Exception as e:
+                    _reprogramar(correo, e, ahora)
+                    fallidos += 1
+    except Exception as e:
+        # no se pudo abrir (o se cortó) la conexión: se reintenta lo que no salió
+        log.warning('Error de conexión SMTP: %s', e)
+        for correo in correos:
+            if correo.estado == 'PENDIENTE' and correo.lote is not None:
+                _reprogramar(correo, e, ahora)
+                fallidos += 1
+    db.session.commit()
+    return enviados, fallidos
+
+
+class Despachador:
+    """Hilo que vacía la bandeja de salida; se despierta al confirmar una transacción con correos"""
+
+    def __init__(self):
+        self._evento = threading.Event()
+        self._hilo = None
+        self._lock = threading.Lock()
+        self.app = None
+
+    def iniciar(self, app):
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self.app = app
+            self._hilo = threading.Thread(target=self._correr, name='despachador-correo', daemon=True)
+            self._hilo.start()
+
+    def despertar(self):
+        self._evento.set()
+
+    def esperar(self, segundos=None):
+        """Bloquea hasta que el hilo termine o pasen `segundos`; devuelve si sigue en marcha"""
+        hilo = self._hilo
+        if hilo is None:
+            return False
+        hilo.join(segundos)
+        return hilo.is_alive()
+
+    def _correr(self):
+        intervalo = self.app.config['CORREO_INTERVALO_SEGUNDOS']
+        while True:
+            self._evento.wait(intervalo)
+            self._evento.clear()
+            with self.app.app_context():
+                try:
+                    while True:
+                        enviados, fallidos = enviar_pendientes()
+                        if not enviados and not fallidos:
+                            break
+                except Exception:
+                    log.exception('Error en el despachador de correo')
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+
+despachador = Despachador()
+
+
+@event.listens_for(Session, 'after_commit')
+def _despertar_despachador(session):
+    if session.info.pop('correo_encolado', False):
+        try:
+            app = current_app._get_current_object()
+        except RuntimeError:
+            return
+        if app.config.get('CORREO_EN_SEGUNDO_PLANO'):
+            despachador.iniciar(app)
+            despachador.despertar()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_marca(session):
+    session.info.pop('correo_encolado', None)
@@ -0,0 +1,244 @@
+"""Generador de datos sintéticos para pruebas de carga.
+
+Carga prestadores, solicitudes (con su JSON de prestadores pedidos y las
+filas de solicitud_prestador) y visitas con fechas, horarios y estados
+verosímiles. Inserta por lotes con sentencias Core (sin eventos del ORM), así
+que al final recalcula contadores y resúmenes como lo haría
+`flask contadores reconstruir` / `flask reportes reconstruir`.
+
+Todos los usuarios sintéticos usan la clave CLAVE; el administrador es
+admin@sintetico y los prestadores prestador<N>@sintetico. Como la clave es
+conocida, `flask datos sembrar` no corre en producción ni sobre una base con
+datos reales (emails que no terminan en DOMINIO) salvo con --forzar.
+
+Los ids se asignan acá para enlazar solicitudes, pedidos y visitas sin ir y
+volver a la base; en PostgreSQL las secuencias se adelantan al terminar.
+"""
+import json
+import random
+from datetime import date, datetime, time, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app import db, elegibilidad
+
+CLAVE = 'sintetico'
+DOMINIO = '@sintetico'
+EMAIL_ADMIN = f'admin{DOMINIO}'
+
+LOCALIDADES = ['ESPERANZA'] * 4 + ['SANTA_FE'] * 3 + ['RAFAELA'] * 2 + ['RECONQUISTA', 'ROSARIO', 'OTRA']
+NIVELES = ['PRIMARIA'] * 3 + ['SECUNDARIA'] * 2
+TIPOS_LUGAR = ['Museo', 'Granja', 'Casco Histórico', 'Cervecería', 'Reserva', 'Taller', 'Laboratorio',
+               'Biblioteca', 'Fábrica', 'Parque']
+TIPOS_INSTITUCION = ['Escuela', 'Escuela N°', 'Colegio', 'Instituto', 'Jardín']
+# Pesos de los estados de solicitud; las confirmadas y finalizadas tienen visitas
+ESTADOS = (('PENDIENTE', 15), ('CONFIRMADA', 45), ('RECHAZADA', 10), ('FINALIZADA', 30))
+MESES_LECTIVOS = [3, 4, 5, 6, 8, 9, 10, 11]
+
+
+def _mes_nombre(numero):
+    return elegibilidad.MESES[numero - 1].capitalize()
+
+
+def _prestador(rnd, i, clave):
+    meses = sorted(rnd.sample(MESES_LECTIVOS, rnd.randint(4, len(MESES_LECTIVOS))))
+    dias = elegibilidad.DIAS[:5] if rnd.random() < 0.7 else rnd.sample(elegibilidad.DIAS[:6], 3)
+    edades = rnd.sample(['inicial', 'primaria', 'secundaria', 'terciaria'], rnd.randint(1, 3))
+    turno = rnd.choice(['mañana', 'tarde', 'ambos'])
+    fila = dict(
+        id=None,
+        razon_social=f'{TIPOS_LUGAR[i % len(TIPOS_LUGAR)]} Sintético {i:04d}',
+        contacto_responsable=f'Contacto {i}',
+        telefono=f'3496-{400000 + i}',
+        email=f'prestador{i}{DOMINIO}',
+        password_hash=clave,
+        direccion=f'Calle {rnd.randint(1, 60)} N° {rnd.randint(100, 3000)}',
+        meses_disponibles=json.dumps([_mes_nombre(m) for m in meses], ensure_ascii=False),
+        dias_disponibles=json.dumps([d.capitalize() for d in dias], ensure_ascii=False),
+        edades_recomendadas=json.dumps(edades),
+        horarios_sugeridos=turno,
+        duracion_visita=str(rnd.choice([45, 60, 90, 120])),
+        visitantes_maximo=rnd.choice([30, 40, 60, 80, 120]),
+        recorridos_por_turno=rnd.randint(1, 3),
+        activo=rnd.random() > 0.05,
+        recibe_externas=rnd.random() > 0.2,
+        role='prestador',
+        agenda_version=0,
+        fecha_creacion=datetime(2024, 1, 1) + timedelta(days=rnd.randint(0, 600)),
+    )
+    fila.update(
+        mascara_meses=elegibilidad.mascara_meses(fila['meses_disponibles']),
+        mascara_dias=elegibilidad.mascara_dias(fila['dias_disponibles']),
+        mascara_edades=elegibilidad.mascara_edades(fila['edades_recomendadas']),
+        mascara_turnos=elegibilidad.mascara_turnos(fila['horarios_sugeridos']),
+    )
+    return fila
+
+
+def _fecha_visita(rnd, desde, dias):
+    """Día hábil dentro de un mes lectivo"""
+    while True:
+        fecha = desde + timedelta(days=rnd.randrange(dias))
+        if fecha.weekday() < 5 and fecha.month in MESES_LECTIVOS:
+            return fecha
+
+
+def _siguiente_id(modelo):
+    return (db.session.query(db.func.max(modelo.id)).scalar() or 0) + 1
+
+
+def _insertar(tabla, filas):
+    if filas:
+        db.session.execute(tabla.insert(), filas)
+        filas.clear()
+
+
+def _ajustar_secuencias(*tablas):
+    """Deja la secuencia de cada tabla en max(id): los INSERT con id explícito no la avanzan"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for tabla in tablas:
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), coalesce(max(id), 1), max(id) IS NOT NULL) "
+            f"FROM {tabla}"))
+    db.session.commit()
+
+
+def datos_reales():
+    """Cantidad de prestadores y solicitudes que no son sintéticos"""
+    from app.models.prestador import Prestador
+    from app.models.solicitud_visita import SolicitudVisita
+
+    prestadores = Prestador.query.filter(db.not_(Prestador.email.like(f'%{DOMINIO}'))).count()
+    solicitudes = SolicitudVisita.query.filter(
+        db.not_(SolicitudVisita.responsable_email.like(f'%{DOMINIO}'))).count()
+    return prestadores + solicitudes
+
+
+def sembrar(prestadores=500, solicitudes=200_000, visitas=600_000, semilla=1, lote=5000, avance=None):
+    """Inserta el conjunto sintético y devuelve {tabla: filas insertadas}.
+
+    `visitas` es un objetivo aproximado: se reparte entre las solicitudes
+    confirmadas y finalizadas (una visita por prestador pedido).
+    `avance(mensaje)` se llama al terminar cada etapa.
+    """
+    from app.models.prestador import Prestador
+    from app.models.solicitud_visita import SolicitudVisita, solicitud_prestador
+    from app.models.visita_prestador import VisitaPrestador
+    from app.models.contador_estado import ContadorEstado
+    from app.models.resumen_diario import ResumenDiario
+    from app.catalogo import invalidar_catalogo
+
+    avance = avance or (lambda mensaje: None)
+    rnd = random.Random(semilla)
+    clave = generate_password_hash(CLAVE)
+
+    # Prestadores (y el administrador, si no existe)
+    if not Prestador.query.filter_by(email=EMAIL_ADMIN).first():
+        db.session.add(Prestador(razon_social='Dirección de Turismo (sintético)', contacto_responsable='Admin',
+                                 telefono='0', email=EMAIL_ADMIN, password_hash=clave, role='admin'))
+        db.session.flush()
+    primer_id = _siguiente_id(Prestador)
+    filas_prestadores = []
+    for i in range(prestadores):
+        fila = _prestador(rnd, primer_id + i, clave)
+        fila['id'] = primer_id + i
+        filas_prestadores.append(fila)
+    catalogo = [(f['id'], f['razon_social']) for f in filas_prestadores if f['activo']]
+    _insertar(Prestador.__table__, filas_prestadores)
+    avance(f'{prestadores} prestadores')
+    if not catalogo:
+        db.session.commit()
+        _ajustar_secuencias('prestador')
+        return {'prestador': prestadores, 'solicitud_visita': 0, 'visita_prestador': 0}
+
+    estados = [e for e, _ in ESTADOS]
+    pesos = [p for _, p in ESTADOS]
+    con_visitas = sum(p for e, p in ESTADOS if e in ('CONFIRMADA', 'FINALIZADA')) / sum(pesos)
+    promedio = max(1.0, visitas / max(1, solicitudes * con_visitas))
+    hoy = date.today()
+    inicio = hoy - timedelta(days=730)
+
+    id_solicitud = _siguiente_id(SolicitudVisita)
+    id_visita = _siguiente_id(VisitaPrestador)
+    filas_solicitudes, filas_pedidos, filas_visitas = [], [], []
+    total_visitas = 0
+    for i in range(solicitudes):
+        estado = rnd.choices(estados, pesos)[0]
+        fecha = _fecha_visita(rnd, inicio, 900)
+        if fecha > hoy and estado == 'FINALIZADA':
+            estado = 'CONFIRMADA'
+        tiene_visitas = estado in ('CONFIRMADA', 'FINALIZADA')
+        cantidad = max(1, min(len(catalogo), round(rnd.gauss(promedio if tiene_visitas else 2.5, 1))))
+        elegidos = rnd.sample(catalogo, cantidad)
+        localidad = rnd.choice(LOCALIDADES)
+        alumnos = rnd.randint(12, 45)
+        pedida = datetime.combine(fecha, time(0)) - timedelta(days=rnd.randint(7, 90),
+                                                              minutes=rnd.randrange(24 * 60))
+        filas_solicitudes.append(dict(
+            id=id_solicitud,
+            nombre_institucion=f'{rnd.choice(TIPOS_INSTITUCION)} {rnd.randint(1, 1500)}',
+            tipo_institucion='Escuela',
+            localidad=localidad,
+            responsable_nombre=f'Responsable {i}',
+            responsable_email=f'institucion{i}{DOMINIO}',
+            responsable_telefono=f'342-{500000 + i % 400000}',
+            prestadores_solicitados=json.dumps([nombre for _, nombre in elegidos], ensure_ascii=False),
+            origen_institucion='INTERNA' if localidad == 'ESPERANZA' else 'EXTERNA',
+            nivel_solicitud='PRIMARIA',
+            fecha_solicitada=fecha,
+            horario_preferido=rnd.choice(['mañana', 'tarde', None]),
+            cantidad_alumnos=alumnos,
+            cantidad_docentes=rnd.randint(1, 4),
+            nivel_educativo=rnd.choice(NIVELES),
+            observaciones='',
+            estado=estado,
+            fecha_respuesta=pedida + timedelta(days=rnd.randint(1, 6)) if estado != 'PENDIENTE' else None,
+            motivo_rechazo='Sin cupo para esa fecha' if estado == 'RECHAZADA' else None,
+            fecha_solicitud=pedida,
+        ))
+        filas_pedidos.extend({'solicitud_id': id_solicitud, 'prestador_id': pid} for pid, _ in elegidos)
+        if tiene_visitas:
+            minutos = 8 * 60 + 30 + 30 * rnd.randrange(6)
+            for pid, _ in elegidos:
+                duracion = rnd.choice([45, 60, 90])
+                filas_visitas.append(dict(
+                    id=id_visita,
+                    solicitud_id=id_solicitud,
+                    prestador_id=pid,
+                    fecha_confirmada=fecha,
+                    hora_inicio=time(minutos // 60, minutos % 60),
+                    hora_fin=time(min(23, (minutos + duracion) // 60), (minutos + duracion) % 60),
+                    grupo=1,
+                    duracion_estimada=duracion,
+                    estado_visita='COMPLETADA' if estado == 'FINALIZADA' else 'PROGRAMADA',
+                    fecha_asignacion=pedida + timedelta(days=1),
+                    visitantes_reales=alumnos if estado == 'FINALIZADA' else None,
+                ))
+                id_visita += 1
+                minutos = min(minutos + duracion + 15, 17 * 60)
+        id_solicitud += 1
+
+        if len(filas_solicitudes) >= lote:
+            total_visitas += len(filas_visitas)
+            _insertar(SolicitudVisita.__table__, filas_solicitudes)
+            _insertar(solicitud_prestador, filas_pedidos)
+            _insertar(VisitaPrestador.__table__, filas_visitas)
+            db.session.commit()
+            avance(f'{i + 1} solicitudes')
+
+    total_visitas += len(filas_visitas)
+    _insertar(SolicitudVisita.__table__, filas_solicitudes)
+    _insertar(solicitud_prestador, filas_pedidos)
+    _insertar(VisitaPrestador.__table__, filas_visitas)
+    db.session.commit()
+    _ajustar_secuencias('prestador', 'solicitud_visita', 'visita_prestador')
+
+    ContadorEstado.reconstruir()
+    ResumenDiario.reconstruir()
+    invalidar_catalogo()
+    if db.engine.dialect.name in ('sqlite', 'postgresql'):
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+    avance('contadores y resúmenes recalculados')
+    return {'prestador': prestadores, 'solicitud_visita': solicitudes, 'visita_prestador': total_visitas}
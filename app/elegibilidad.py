@@ -0,0 +1,118 @@
+"""Disponibilidad de prestadores codificada como máscaras de bits.
+
+meses_disponibles, dias_disponibles, edades_recomendadas y horarios_sugeridos
+se guardan como texto (JSON o lista separada por comas). Al grabar el
+prestador se traducen a cuatro enteros (mascara_meses, mascara_dias,
+mascara_edades, mascara_turnos); una solicitud se traduce a un bit por
+dimensión, y la elegibilidad queda en un AND por dimensión.
+
+Un campo vacío o que no se puede interpretar equivale a "sin restricción"
+(todos los bits encendidos).
+"""
+import json
+import unicodedata
+
+MESES = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio',
+         'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
+DIAS = ['lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo']
+EDADES = ['inicial', 'primaria', 'secundaria', 'terciaria', 'adultos']
+TURNOS = ['mañana', 'tarde']
+
+TODOS_MESES = (1 << len(MESES)) - 1
+TODOS_DIAS = (1 << len(DIAS)) - 1
+TODAS_EDADES = (1 << len(EDADES)) - 1
+TODOS_TURNOS = (1 << len(TURNOS)) - 1
+
+# Sinónimos que aparecen en las planillas de prestadores
+_ALIAS = {
+    'setiembre': 'septiembre',
+    'jardin': 'inicial',
+    'nivel inicial': 'inicial',
+    'universitario': 'terciaria',
+    'terciario': 'terciaria',
+    'adulto': 'adultos',
+    'manana': 'mañana',
+}
+
+
+def _normalizar(texto):
+    """Minúsculas y sin tildes (conserva la ñ)"""
+    texto = (texto or '').strip().lower().replace('ñ', '\0')
+    texto = ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
+    return texto.replace('\0', 'ñ')
+
+
+def _items(valor):
+    if not valor:
+        return []
+    try:
+        datos = json.loads(valor)
+    except (TypeError, ValueError):
+        datos = valor.replace(';', ',').split(',')
+    if isinstance(datos, str):
+        datos = [datos]
+    return [_normalizar(str(d)) for d in datos if d] if isinstance(datos, list) else []
+
+
+def _mascara(valor, nombres, todos):
+    mascara = 0
+    for item in _items(valor):
+        item = _ALIAS.get(item, item)
+        if item in ('todos', 'todas', 'ambos', 'indistinto'):
+            return todos
+        for bit, nombre in enumerate(nombres):
+            if nombre == item or (len(item) > 3 and nombre.startswith(item)):
+                mascara |= 1 << bit
+    return mascara or todos
+
+
+def mascara_meses(valor):
+    return _mascara(valor, MESES, TODOS_MESES)
+
+
+def mascara_dias(valor):
+    return _mascara(valor, DIAS, TODOS_DIAS)
+
+
+def mascara_edades(valor):
+    return _mascara(valor, EDADES, TODAS_EDADES)
+
+
+def mascara_turnos(valor):
+    return _mascara(valor, TURNOS, TODOS_TURNOS)
+
+
+def mascaras_solicitud(solicitud):
+    """(mes, día, edad, turno) de la solicitud como un bit cada uno; 0 = sin dato"""
+    fecha = solicitud.fecha_solicitada
+    mes = 1 << (fecha.month - 1) if fecha else 0
+    dia = 1 << fecha.weekday() if fecha else 0
+    nivel = _normalizar(solicitud.nivel_educativo or solicitud.nivel_solicitud)
+    edad = 1 << EDADES.index(nivel) if nivel in EDADES else 0
+    horario = _normalizar(solicitud.horario_preferido).replace('manana', 'mañana')
+    turno = next((1 << bit for bit, t in enumerate(TURNOS) if t in horario), 0)
+    return mes, dia, edad, turno
+
+
+def motivos_rechazo(prestador, mascaras, visitantes=0):
+    """Lista de motivos por los que el prestador no puede recibir la solicitud (vacía = elegible)"""
+    mes, dia, edad, turno = mascaras
+    motivos = []
+    if mes and not (prestador.mascara_meses if prestador.mascara_meses is not None else TODOS_MESES) & mes:
+        motivos.append('mes')
+    if dia and not (prestador.mascara_dias if prestador.mascara_dias is not None else TODOS_DIAS) & dia:
+        motivos.append('día')
+    if edad and not (prestador.mascara_edades if prestador.mascara_edades is not None else TODAS_EDADES) & edad:
+        motivos.append('nivel')
+    if turno and not (prestador.mascara_turnos if prestador.mascara_turnos is not None else TODOS_TURNOS) & turno:
+        motivos.append('turno')
+    if prestador.visitantes_maximo and visitantes > prestador.visitantes_maximo:
+        motivos.append('capacidad')
+    return motivos
+
+
+def elegibles(prestadores, solicitud):
+    """{prestador_id: motivos} para todos los prestadores en una sola pasada"""
+    mascaras = mascaras_solicitud(solicitud)
+    visitantes = solicitud.get_total_visitantes()
+    return {p.id: motivos_rechazo(p, mascaras, visitantes) for p in prestadores}
@@ -0,0 +1,116 @@
+"""Archivos estáticos con huella de contenido y precomprimidos.
+
+`flask estaticos construir` copia cada archivo de app/static a app/static/dist
+con el hash del contenido en el nombre (js/base.js -> js/base.3f2a9c1d0b.js),
+escribe al lado las variantes .gz y .br (esta última si está instalado el
+paquete Brotli) y un manifest.json con la correspondencia.
+
+Con el manifiesto presente y ESTATICOS_CON_HUELLA activo,
+url_for('static', filename='js/base.js') devuelve la URL con huella. Esas URLs
+se sirven con Cache-Control inmutable por un año y en la codificación que
+acepte el navegador: como el nombre cambia con el contenido, una visita
+repetida no descarga ni revalida nada. Sin manifiesto (desarrollo) se sirven
+los originales como siempre.
+
+Detrás de nginx conviene servir /static/dist/ directamente (gzip_static /
+brotli_static on, expires max) y dejar esta vista como respaldo.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import abort, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # opcional: sin el paquete sólo se generan .gz
+    brotli = None
+
+DIRECTORIO_SALIDA = 'dist'
+MANIFIESTO = 'manifest.json'
+UN_ANIO = 365 * 24 * 3600
+COMPRIMIBLES = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}
+_CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _con_huella(ruta, contenido):
+    base, extension = os.path.splitext(ruta)
+    return f'{base}.{hashlib.sha256(contenido).hexdigest()[:10]}{extension}'
+
+
+def _escribir(ruta, contenido):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, 'wb') as archivo:
+        archivo.write(contenido)
+
+
+def construir(carpeta_static):
+    """Regenera app/static/dist. Devuelve el manifiesto {original: con_huella}"""
+    salida = os.path.join(carpeta_static, DIRECTORIO_SALIDA)
+    shutil.rmtree(salida, ignore_errors=True)
+    manifiesto = {}
+    for raiz, carpetas, archivos in os.walk(carpeta_static):
+        if os.path.abspath(raiz) == os.path.abspath(carpeta_static):
+            carpetas[:] = [c for c in carpetas if c != DIRECTORIO_SALIDA]
+        for nombre in sorted(archivos):
+            origen = os.path.join(raiz, nombre)
+            ruta = os.path.relpath(origen, carpeta_static).replace(os.sep, '/')
+            with open(origen, 'rb') as archivo:
+                contenido = archivo.read()
+            destino = _con_huella(ruta, contenido)
+            _escribir(os.path.join(salida, destino), contenido)
+            if os.path.splitext(ruta)[1] in COMPRIMIBLES:
+                # mtime=0: la misma entrada produce siempre los mismos bytes
+                variantes = [('.gz', gzip.compress(contenido, 9, mtime=0))]
+                if brotli is not None:
+                    variantes.append(('.br', brotli.compress(contenido, quality=11)))
+                for sufijo, comprimido in variantes:
+                    if len(comprimido) < len(contenido):
+                        _escribir(os.path.join(salida, destino + sufijo), comprimido)
+            manifiesto[ruta] = destino
+    _escribir(os.path.join(salida, MANIFIESTO),
+              json.dumps(manifiesto, indent=2, sort_keys=True).encode('utf-8'))
+    return manifiesto
+
+
+def _url_con_huella(endpoint, valores):
+    if endpoint != 'static':
+        return
+    destino = current_app.extensions['estaticos'].get(valores.get('filename'))
+    if destino:
+        valores['filename'] = f'{DIRECTORIO_SALIDA}/{destino}'
+
+
+def servir(nombre):
+    """Archivo de dist/ con cache inmutable, en br o gzip si el cliente los acepta"""
+    directorio = os.path.join(current_app.static_folder, DIRECTORIO_SALIDA)
+    if safe_join(directorio, nombre) is None:
+        abort(404)
+    tipo = mimetypes.guess_type(nombre)[0]
+    for codificacion, sufijo in _CODIFICACIONES:
+        if request.accept_encodings[codificacion] and os.path.isfile(os.path.join(directorio, nombre + sufijo)):
+            respuesta = send_from_directory(directorio, nombre + sufijo, mimetype=tipo, max_age=UN_ANIO)
+            respuesta.headers['Content-Encoding'] = codificacion
+            break
+    else:
+        respuesta = send_from_directory(directorio, nombre, max_age=UN_ANIO)
+    respuesta.vary.add('Accept-Encoding')
+    respuesta.cache_control.public = True
+    respuesta.cache_control.immutable = True
+    return respuesta
+
+
+def configurar(app):
+    """Activa las URLs con huella si ESTATICOS_CON_HUELLA y existe el manifiesto"""
+    ruta = os.path.join(app.static_folder, DIRECTORIO_SALIDA, MANIFIESTO)
+    if not app.config.get('ESTATICOS_CON_HUELLA', True) or not os.path.isfile(ruta):
+        return
+    with open(ruta, encoding='utf-8') as archivo:
+        app.extensions['estaticos'] = json.load(archivo)
+    app.url_defaults(_url_con_huella)
+    app.add_url_rule(f'{app.static_url_path}/{DIRECTORIO_SALIDA}/<path:nombre>',
+                     endpoint='estaticos_con_huella', view_func=servir)
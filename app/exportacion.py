@@ -0,0 +1,138 @@
+"""Exportación en streaming (CSV y XLSX) de filas que llegan de a una.
+
+Los generadores emiten bytes a medida que reciben filas, así que la memoria
+no depende de la cantidad de filas. El XLSX se arma sin dependencias:
+un zip escrito en modo streaming (sin volver atrás en el archivo) con una
+sola hoja y celdas de texto en línea.
+"""
+import csv
+import io
+import zipfile
+from datetime import date, datetime, time
+from xml.sax.saxutils import escape
+
+# Cantidad de filas que se acumulan antes de emitir un bloque
+FILAS_POR_BLOQUE = 200
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return valor.strftime('%Y-%m-%d %H:%M')
+    if isinstance(valor, date):
+        return valor.strftime('%Y-%m-%d')
+    if isinstance(valor, time):
+        return valor.strftime('%H:%M')
+    return str(valor)
+
+
+def generar_csv(encabezados, filas):
+    """Genera el CSV por bloques; empieza con BOM para que Excel lo abra en UTF-8"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write('\ufeff')
+    escritor.writerow(encabezados)
+    for i, fila in enumerate(filas, 1):
+        escritor.writerow([_texto(v) for v in fila])
+        if i % FILAS_POR_BLOQUE == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _Salida(io.RawIOBase):
+    """Destino no posicionable para ZipFile: acumula lo escrito hasta que se retira"""
+
+    def __init__(self):
+        self._partes = []
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def retirar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{hoja}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _celda(valor):
+    if isinstance(valor, bool) or valor is None:
+        return f'<c t="inlineStr"><is><t>{escape(_texto(valor))}</t></is></c>'
+    if isinstance(valor, (int, float)):
+        return f'<c><v>{valor}</v></c>'
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_texto(valor))}</t></is></c>'
+
+
+def _fila(valores):
+    return '<row>' + ''.join(_celda(v) for v in valores) + '</row>'
+
+
+def generar_xlsx(encabezados, filas, hoja='Datos'):
+    """Genera un XLSX de una hoja por bloques"""
+    salida = _Salida()
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _RELS)
+        zf.writestr('xl/workbook.xml', _WORKBOOK.format(hoja=escape(hoja)))
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        yield salida.retirar()
+
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as hoja_xml:
+            hoja_xml.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + _fila(encabezados)
+            ).encode('utf-8'))
+            bloque = []
+            for i, fila in enumerate(filas, 1):
+                bloque.append(_fila(fila))
+                if i % FILAS_POR_BLOQUE == 0:
+                    hoja_xml.write(''.join(bloque).encode('utf-8'))
+                    bloque = []
+                    datos = salida.retirar()
+                    if datos:
+                        yield datos
+            hoja_xml.write((''.join(bloque) + '</sheetData></worksheet>').encode('utf-8'))
+    yield salida.retirar()
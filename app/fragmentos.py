@@ -0,0 +1,103 @@
+"""Cache de fragmentos: tarjetas de solicitud del listado del admin.
+
+Cada tarjeta renderizada se guarda con la clave (solicitud.id,
+solicitud.version_fila). La versión se incrementa en la misma transacción que
+cualquier cambio de la solicitud o de sus visitas (listener after_flush de
+abajo, o marcar_solicitudes() en las actualizaciones por conjunto), así que
+una tarjeta cacheada nunca queda vieja: al cambiar la fila cambia la clave y
+la entrada anterior sale por LRU o por TTL.
+
+Renombrar un prestador cambia las etiquetas de muchas tarjetas sin tocar sus
+filas: en ese caso se vacía la cache del proceso al confirmar (los demás
+workers lo ven al vencer el TTL).
+
+Al listar sólo se consultan los prestadores y se renderizan las tarjetas que
+no están en la cache. La cantidad de entradas está acotada por
+FRAGMENTOS_CACHE_MAX (una tarjeta ocupa ~2-3 KB).
+"""
+from flask import current_app
+from markupsafe import Markup
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, selectinload
+
+from app.cache import CacheTTL
+
+tarjetas = CacheTTL('tarjetas_solicitud', max_entradas=2000, ttl=3600)
+
+PLANTILLA_TARJETA = 'admin/_tarjeta_solicitud.html'
+
+
+def marcar_solicitudes(connection, solicitud_ids):
+    """Incrementa version_fila de esas solicitudes (misma transacción que el cambio)"""
+    from app.models.solicitud_visita import SolicitudVisita
+
+    solicitud_ids = sorted({s for s in solicitud_ids if s is not None})
+    if not solicitud_ids:
+        return
+    tabla = SolicitudVisita.__table__
+    connection.execute(
+        tabla.update()
+        .where(tabla.c.id.in_(solicitud_ids))
+        .values(version_fila=tabla.c.version_fila + 1)
+    )
+
+
+def tarjetas_solicitudes(solicitudes):
+    """HTML de la tarjeta de cada solicitud, en el mismo orden.
+
+    Los prestadores de las solicitudes que no están en la cache se cargan en
+    una sola consulta; las que están en la cache no consultan ni renderizan.
+    """
+    from app.models.solicitud_visita import SolicitudVisita
+
+    html = [tarjetas.get((s.id, s.version_fila)) for s in solicitudes]
+    faltantes = [s for s, h in zip(solicitudes, html) if h is None]
+    if not faltantes:
+        return html
+    SolicitudVisita.query.options(selectinload(SolicitudVisita.prestadores)) \
+        .filter(SolicitudVisita.id.in_([s.id for s in faltantes])).all()
+    plantilla = current_app.jinja_env.get_template(PLANTILLA_TARJETA)
+    for i, solicitud in enumerate(solicitudes):
+        if html[i] is None:
+            html[i] = Markup(plantilla.render(solicitud=solicitud))
+            tarjetas.set((solicitud.id, solicitud.version_fila), html[i])
+    return html
+
+
+@event.listens_for(Session, 'after_flush')
+def _versionar_solicitudes(session, flush_context):
+    """Sube version_fila de las solicitudes modificadas o cuyas visitas cambiaron"""
+    from app.models.prestador import Prestador
+    from app.models.solicitud_visita import SolicitudVisita
+    from app.models.visita_prestador import VisitaPrestador
+
+    solicitud_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, VisitaPrestador):
+            solicitud_ids.add(obj.solicitud_id)
+            solicitud_ids.update(inspect(obj).attrs.solicitud_id.history.deleted)
+        elif isinstance(obj, SolicitudVisita) and obj in session.dirty \
+                and session.is_modified(obj, include_collections=True):
+            solicitud_ids.add(obj.id)
+        elif isinstance(obj, Prestador) and obj in session.dirty \
+                and inspect(obj).attrs.razon_social.history.has_changes():
+            session.info['tarjetas_desactualizadas'] = True
+    if not solicitud_ids:
+        return
+    marcar_solicitudes(session.connection(), solicitud_ids)
+    # la versión en memoria quedó atrás del UPDATE: que se relea al usarla
+    for solicitud_id in solicitud_ids:
+        cargada = session.identity_map.get(inspect(SolicitudVisita).identity_key_from_primary_key([solicitud_id]))
+        if cargada is not None and cargada not in session.deleted:
+            session.expire(cargada, ['version_fila'])
+
+
+@event.listens_for(Session, 'after_commit')
+def _vaciar_al_confirmar(session):
+    if session.info.pop('tarjetas_desactualizadas', False):
+        tarjetas.limpiar()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _descartar_marca(session):
+    session.info.pop('tarjetas_desactualizadas', None)
@@ -0,0 +1,50 @@
+from flask_login import UserMixin
+
+from app.cache import CacheTTL
+
+# Datos mínimos del usuario logueado, para no leer prestador en cada request
+identidades = CacheTTL('identidades', max_entradas=1024, ttl=60)
+
+
+class Identidad(UserMixin):
+    """Usuario de sesión liviano (lo que usan decoradores, rutas y plantillas)"""
+
+    def __init__(self, id, role, activo, prestador_id):
+        self.id = id
+        self.role = role
+        self.activo = activo
+        self.prestador_id = prestador_id
+
+    def __repr__(self):
+        return f'<Identidad {self.id} {self.role}>'
+
+    def is_admin(self):
+        return (self.role or '') == 'admin'
+
+    def is_prestador(self):
+        return (self.role or '') == 'prestador'
+
+
+def _leer_identidad(user_id):
+    from app import db
+    from app.models.prestador import Prestador
+
+    fila = db.session.query(Prestador.id, Prestador.role, Prestador.activo) \
+        .filter(Prestador.id == user_id).first()
+    if fila is None:
+        return None
+    return Identidad(fila.id, fila.role, fila.activo, fila.id)
+
+
+def cargar_identidad(user_id):
+    """user_loader de Flask-Login: primero busca en la cache, si no en la base"""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    return identidades.obtener(user_id, lambda: _leer_identidad(user_id))
+
+
+def invalidar_identidad(user_id):
+    """Descarta la identidad cacheada después de modificar el prestador"""
+    identidades.invalidar(int(user_id))
@@ -0,0 +1,381 @@
+"""Alta masiva de prestadores desde un CSV o XLSX.
+
+Las filas se leen de a una (el XLSX se recorre con iterparse, sin
+dependencias, igual que lo escribe app/exportacion.py) y se procesan por
+lotes de IMPORTACION_LOTE:
+
+- cada fila se valida contra los CUIT y emails ya cargados (se leen una sola
+  vez al empezar) y contra los de las filas anteriores del mismo archivo;
+- las contraseñas del lote se hashean en un pool de procesos: el hash es
+  costoso a propósito (~150 ms cada uno) y en serie es lo que más tarda;
+- el lote se inserta con un único executemany.
+
+Como el INSERT no pasa por el ORM, las máscaras de disponibilidad se calculan
+acá (lo que hace before_insert) y el catálogo se invalida al confirmar. El
+índice de búsqueda se mantiene solo (triggers). Las filas con errores no se
+insertan y se informan con su número de fila en el archivo; el resto se
+confirma en una sola transacción.
+"""
+import csv
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import time
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree.ElementTree import iterparse
+
+from werkzeug.security import generate_password_hash
+
+from app import db, elegibilidad
+
+# Columnas que se pueden importar (las mismas del alta manual) y sus nombres alternativos
+COLUMNAS = ['razon_social', 'cuit', 'titular_nombre', 'direccion', 'contacto_responsable', 'telefono',
+            'email', 'password', 'descripcion_visita', 'tiene_material_digital', 'meses_disponibles',
+            'dias_disponibles', 'horarios_sugeridos', 'duracion_visita', 'visitantes_maximo',
+            'edades_recomendadas', 'acceso_movilidad_reducida', 'tipo_reserva', 'costo_referencia']
+OBLIGATORIAS = ['razon_social', 'contacto_responsable', 'telefono', 'email', 'password']
+_NOMBRES = {'razon_social': 'la razón social', 'contacto_responsable': 'el contacto responsable',
+            'telefono': 'el teléfono', 'email': 'el email', 'password': 'la contraseña'}
+_ALIAS = {
+    'titular': 'titular_nombre',
+    'contacto': 'contacto_responsable',
+    'responsable': 'contacto_responsable',
+    'correo': 'email',
+    'e_mail': 'email',
+    'contrasena': 'password',
+    'clave': 'password',
+    'descripcion': 'descripcion_visita',
+    'material_digital': 'tiene_material_digital',
+    'meses': 'meses_disponibles',
+    'dias': 'dias_disponibles',
+    'horarios': 'horarios_sugeridos',
+    'turnos': 'horarios_sugeridos',
+    'duracion': 'duracion_visita',
+    'capacidad': 'visitantes_maximo',
+    'visitantes': 'visitantes_maximo',
+    'edades': 'edades_recomendadas',
+    'niveles': 'edades_recomendadas',
+    'accesible': 'acceso_movilidad_reducida',
+    'movilidad_reducida': 'acceso_movilidad_reducida',
+    'reserva': 'tipo_reserva',
+    'costo': 'costo_referencia',
+}
+_LISTAS = ('meses_disponibles', 'dias_disponibles', 'edades_recomendadas')
+_VERDADEROS = {'si', 's', 'true', 'verdadero', '1', 'x'}
+_EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+_PESOS_CUIT = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)
+MAX_ERRORES = 500
+
+
+class ImportacionInvalida(ValueError):
+    pass
+
+
+class Resultado:
+    def __init__(self):
+        self.leidas = 0
+        self.importadas = 0
+        self.con_errores = 0
+        self.errores = []  # (fila, [mensajes]) de las primeras MAX_ERRORES filas rechazadas
+        self.ignoradas = []  # columnas del archivo que no se importan
+        self.segundos = 0.0
+
+    def error(self, fila, mensajes):
+        self.con_errores += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append((fila, mensajes))
+
+
+# LECTURA
+
+def _sin_tildes(texto):
+    return ''.join(c for c in unicodedata.normalize('NFD', str(texto or '').strip().lower())
+                   if unicodedata.category(c) != 'Mn')
+
+
+def _clave_columna(encabezado):
+    texto = re.sub(r'[^a-z0-9]+', '_', _sin_tildes(encabezado)).strip('_')
+    return _ALIAS.get(texto, texto)
+
+
+def leer_csv(binario):
+    """Filas (listas de texto) de un CSV en UTF-8, separado por comas o por punto y coma"""
+    texto = io.TextIOWrapper(binario, encoding='utf-8-sig', newline='')
+    primera = texto.readline()
+    separador = ';' if primera.count(';') > primera.count(',') else ','
+    yield from csv.reader(itertools.chain([primera], texto), delimiter=separador)
+
+
+_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+
+def _primera_hoja(zf):
+    """Ruta dentro del zip de la primera hoja del libro"""
+    try:
+        with zf.open('xl/workbook.xml') as libro:
+            hoja = next(e for _, e in iterparse(libro) if e.tag == f'{_NS}sheet')
+        with zf.open('xl/_rels/workbook.xml.rels') as relaciones:
+            for _, e in iterparse(relaciones):
+                if e.get('Id') == hoja.get(f'{_NS_REL}id'):
+                    destino = e.get('Target').lstrip('/')
+                    return destino if destino.startswith('xl/') else f'xl/{destino}'
+    except (KeyError, StopIteration):
+        pass
+    return 'xl/worksheets/sheet1.xml'
+
+
+def _textos_compartidos(zf):
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return []
+    textos = []
+    with zf.open('xl/sharedStrings.xml') as archivo:
+        for _, elemento in iterparse(archivo):
+            if elemento.tag == f'{_NS}si':
+                textos.append(''.join(t.text or '' for t in elemento.iter(f'{_NS}t')))
+                elemento.clear()
+    return textos
+
+
+def _columna(referencia):
+    """'C12' -> 2"""
+    indice = 0
+    for letra in referencia:
+        if not letra.isalpha():
+            break
+        indice = indice * 26 + ord(letra.upper()) - 64
+    return indice - 1
+
+
+def _valor_celda(celda, compartidos):
+    tipo = celda.get('t')
+    if tipo == 'inlineStr':
+        return ''.join(t.text or '' for t in celda.iter(f'{_NS}t'))
+    valor = celda.findtext(f'{_NS}v') or ''
+    if tipo == 's':
+        return compartidos[int(valor)] if valor else ''
+    if tipo == 'b':
+        return 'si' if valor == '1' else 'no'
+    if tipo in (None, 'n') and valor:
+        # teléfonos y CUIT escritos como número: '3496420000' y no '3.49642E9'
+        try:
+            numero = float(valor)
+        except ValueError:
+            return valor
+        return str(int(numero)) if numero.is_integer() else valor
+    return valor
+
+
+def leer_xlsx(binario):
+    """Filas (listas de texto) de la primera hoja de un XLSX, sin cargar la hoja entera"""
+    with zipfile.ZipFile(binario) as zf:
+        compartidos = _textos_compartidos(zf)
+        with zf.open(_primera_hoja(zf)) as hoja:
+            for _, elemento in iterparse(hoja):
+                if elemento.tag != f'{_NS}row':
+                    continue
+                fila = []
+                for celda in elemento.iter(f'{_NS}c'):
+                    referencia = celda.get('r')
+                    posicion = _columna(referencia) if referencia else len(fila)
+                    fila.extend([''] * (posicion - len(fila)))
+                    fila.append(_valor_celda(celda, compartidos))
+                elemento.clear()
+                yield fila
+
+
+def leer_filas(binario, nombre):
+    """Filas del archivo según su extensión (.csv o .xlsx)"""
+    extension = os.path.splitext(nombre or '')[1].lower()
+    if extension == '.xlsx':
+        return leer_xlsx(binario)
+    if extension in ('.csv', '.txt'):
+        return leer_csv(binario)
+    raise ImportacionInvalida('El archivo debe ser .csv o .xlsx')
+
+
+# VALIDACIÓN
+
+def normalizar_cuit(valor):
+    """'20-12345678-6' / '20123456786' -> '20-12345678-6'; None si no es un CUIT válido"""
+    digitos = re.sub(r'\D', '', valor or '')
+    if len(digitos) != 11:
+        return None
+    resto = 11 - sum(int(d) * p for d, p in zip(digitos, _PESOS_CUIT)) % 11
+    verificador = {11: 0, 10: 9}.get(resto, resto)
+    if int(digitos[-1]) != verificador:
+        return None
+    return f'{digitos[:2]}-{digitos[2:10]}-{digitos[10]}'
+
+
+def _lista(valor):
+    """Lista separada por comas -> JSON como la guarda el formulario"""
+    if not valor:
+        return None
+    try:
+        json.loads(valor)
+        return valor
+    except ValueError:
+        items = [i.strip() for i in valor.replace(';', ',').split(',') if i.strip()]
+        return json.dumps(items, ensure_ascii=False) if items else None
+
+
+class _Validador:
+    """Convierte filas del archivo en filas de prestador, recordando CUIT y emails ya usados"""
+
+    def __init__(self, columnas):
+        from app.models.prestador import Prestador
+
+        self.columnas = columnas
+        self.cuits = {re.sub(r'\D', '', c) for (c,) in db.session.query(Prestador.cuit)
+                      .filter(Prestador.cuit.isnot(None))}
+        self.emails = {e.strip().lower() for (e,) in db.session.query(Prestador.email)
+                       .filter(Prestador.email.isnot(None))}
+
+    def validar(self, valores):
+        """(fila para insertar con la contraseña en claro, errores)"""
+        datos = {c: (valores[i].strip() if i < len(valores) and valores[i] else '')
+                 for c, i in self.columnas.items()}
+        errores = [f'Falta {_NOMBRES[c]}' for c in OBLIGATORIAS if not datos.get(c)]
+
+        email = datos.get('email', '')
+        if email and not _EMAIL.match(email):
+            errores.append(f'Email inválido: {email}')
+        elif email and email.lower() in self.emails:
+            errores.append(f'El email {email} ya está registrado')
+
+        cuit = datos.get('cuit')
+        if cuit:
+            datos['cuit'] = normalizar_cuit(cuit)
+            if datos['cuit'] is None:
+                errores.append(f'CUIT inválido: {cuit}')
+            elif re.sub(r'\D', '', cuit) in self.cuits:
+                errores.append(f'El CUIT {datos["cuit"]} ya está registrado')
+
+        if datos.get('visitantes_maximo'):
+            try:
+                datos['visitantes_maximo'] = int(datos['visitantes_maximo']) or None
+            except ValueError:
+                errores.append(f'Capacidad no numérica: {datos["visitantes_maximo"]}')
+        if errores:
+            return None, errores
+
+        # a partir de acá la fila se inserta: sus claves ya no se pueden repetir
+        self.emails.add(email.lower())
+        if datos.get('cuit'):
+            self.cuits.add(re.sub(r'\D', '', datos['cuit']))
+        fila = {c: (v if v != '' else None) for c, v in datos.items()}
+        if 'tiene_material_digital' in fila:
+            fila['tiene_material_digital'] = _sin_tildes(datos['tiene_material_digital']) in _VERDADEROS
+        for campo in _LISTAS:
+            if campo in fila:
+                fila[campo] = _lista(fila[campo])
+        fila.update(
+            mascara_meses=elegibilidad.mascara_meses(fila.get('meses_disponibles')),
+            mascara_dias=elegibilidad.mascara_dias(fila.get('dias_disponibles')),
+            mascara_edades=elegibilidad.mascara_edades(fila.get('edades_recomendadas')),
+            mascara_turnos=elegibilidad.mascara_turnos(fila.get('horarios_sugeridos')),
+        )
+        return fila, []
+
+
+# IMPORTACIÓN
+
+def _hashear(pool, claves, procesos):
+    if pool is None:
+        return [generate_password_hash(c) for c in claves]
+    return list(pool.map(generate_password_hash, claves, chunksize=max(1, len(claves) // (procesos * 4))))
+
+
+def _insertar(pool, procesos, filas, resultado, simular):
+    from app.models.prestador import Prestador
+
+    if simular:
+        # sólo validar: ni hashes ni INSERT
+        resultado.importadas += len(filas)
+        filas.clear()
+        return
+    if not filas:
+        return
+    hashes = _hashear(pool, [f.pop('password') for f in filas], procesos)
+    for fila, hash_ in zip(filas, hashes):
+        fila['password_hash'] = hash_
+    db.session.execute(Prestador.__table__.insert(), filas)
+    resultado.importadas += len(filas)
+    filas.clear()
+
+
+def importar(binario, nombre, lote=200, procesos=None, simular=False):
+    """Importa los prestadores del archivo y confirma la transacción.
+
+    Con `simular` sólo valida: `importadas` cuenta las filas que se
+    importarían y no se escribe nada.
+
+    `procesos` es la cantidad de procesos para hashear (None: uno por CPU;
+    1: en este mismo proceso). Levanta ImportacionInvalida si el archivo no
+    se puede leer o le faltan columnas obligatorias; los errores de cada
+    fila quedan en el Resultado.
+    """
+    from app.catalogo import invalidar_catalogo
+
+    inicio = time.perf_counter()
+    resultado = Resultado()
+    try:
+        filas_archivo = leer_filas(binario, nombre)
+        encabezados = next(filas_archivo, None)
+    except (zipfile.BadZipFile, UnicodeDecodeError, csv.Error, SyntaxError) as e:
+        raise ImportacionInvalida(f'No se pudo leer el archivo: {e}')
+    if not encabezados:
+        raise ImportacionInvalida('El archivo está vacío')
+
+    columnas = {}
+    for i, encabezado in enumerate(encabezados):
+        clave = _clave_columna(encabezado)
+        if clave in COLUMNAS and clave not in columnas:
+            columnas[clave] = i
+        elif str(encabezado or '').strip():
+            resultado.ignoradas.append(str(encabezado).strip())
+    faltantes = [c for c in OBLIGATORIAS if c not in columnas]
+    if faltantes:
+        raise ImportacionInvalida(f'Faltan columnas obligatorias: {", ".join(faltantes)}')
+
+    procesos = procesos or os.cpu_count() or 1
+    # spawn: el proceso web tiene hilos (despachador de correo) y fork no es seguro con hilos
+    pool = ProcessPoolExecutor(procesos, mp_context=multiprocessing.get_context('spawn')) if procesos > 1 else None
+    validador = _Validador(columnas)
+    pendientes = []
+    try:
+        for numero, valores in enumerate(filas_archivo, 2):
+            if not any(v.strip() for v in valores if v):
+                continue
+            resultado.leidas += 1
+            fila, errores = validador.validar(valores)
+            if errores:
+                resultado.error(numero, errores)
+                continue
+            pendientes.append(fila)
+            if len(pendientes) >= lote:
+                _insertar(pool, procesos, pendientes, resultado, simular)
+        _insertar(pool, procesos, pendientes, resultado, simular)
+        if simular:
+            db.session.rollback()
+        else:
+            db.session.commit()
+            if resultado.importadas:
+                invalidar_catalogo()
+    except (zipfile.BadZipFile, UnicodeDecodeError, csv.Error, SyntaxError) as e:
+        db.session.rollback()
+        raise ImportacionInvalida(f'No se pudo leer el archivo: {e}')
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
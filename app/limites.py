@@ -0,0 +1,207 @@
+"""Límite de envíos del formulario público (token bucket) y descarte por carga.
+
+Cada IP y cada email tienen una cubeta de `capacidad` fichas que se rellena
+por completo en `periodo` segundos; cada envío consume una ficha de cada
+cubeta, y sólo si todas tienen lugar (un envío rechazado por el email no gasta
+la ficha de la IP). Las cubetas viven en un almacén configurable con
+LIMITES_ALMACEN:
+
+- 'memoria': diccionario del proceso (un solo worker).
+- 'sqlite:///ruta/limites.db': archivo SQLite aparte de la base principal,
+  compartido por todos los workers del servidor; la lectura y actualización
+  de la cubeta se hacen en una transacción BEGIN IMMEDIATE.
+
+Detrás de un proxy la IP es la del cliente sólo si PROXY_SALTOS indica
+cuántos proxies confiables agregan X-Forwarded-For (ver create_app).
+
+Si el almacén compartido falla se deja pasar el envío: el límite nunca
+debe frenar a una institución legítima por un problema propio.
+
+Además, un semáforo acota las escrituras simultáneas del formulario por
+proceso; si no hay turno en un tiempo corto se responde 429 en lugar de
+encolar más trabajo sobre el lock de escritura de la base.
+"""
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# Verificaciones entre una limpieza de cubetas viejas y la siguiente
+LIMPIAR_CADA = 500
+
+
+def _rellenar(estado, capacidad, periodo, ahora):
+    """Fichas disponibles ahora en una cubeta guardada como (tokens, actualizado) o None"""
+    tokens, antes = estado if estado else (capacidad, ahora)
+    return min(capacidad, tokens + max(0.0, ahora - antes) * capacidad / periodo)
+
+
+class AlmacenMemoria:
+    """Cubetas en memoria del proceso (acotadas en cantidad, LRU)"""
+
+    def __init__(self, max_claves=10000):
+        self.max_claves = max_claves
+        self._cubetas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(self, cubetas, ahora):
+        with self._lock:
+            fichas = [_rellenar(self._cubetas.get(clave), capacidad, periodo, ahora)
+                      for clave, capacidad, periodo in cubetas]
+            permitido = all(t >= 1 for t in fichas)
+            for (clave, _, _), tokens in zip(cubetas, fichas):
+                self._cubetas[clave] = (tokens - 1 if permitido else tokens, ahora)
+                self._cubetas.move_to_end(clave)
+            while len(self._cubetas) > self.max_claves:
+                self._cubetas.popitem(last=False)
+            return permitido, fichas
+
+    def limpiar(self, antes_de):
+        with self._lock:
+            for clave in [c for c, (_, actualizado) in self._cubetas.items() if actualizado < antes_de]:
+                del self._cubetas[clave]
+
+
+class AlmacenSQLite:
+    """Cubetas en un archivo SQLite compartido entre procesos"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._local = threading.local()
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with self._conexion() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS cubeta '
+                         '(clave TEXT PRIMARY KEY, tokens REAL NOT NULL, actualizado REAL NOT NULL)')
+
+    def _conexion(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.ruta, timeout=0.25, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def consumir(self, cubetas, ahora):
+        conn = self._conexion()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            fichas = [_rellenar(conn.execute('SELECT tokens, actualizado FROM cubeta WHERE clave = ?',
+                                             (clave,)).fetchone(), capacidad, periodo, ahora)
+                      for clave, capacidad, periodo in cubetas]
+            permitido = all(t >= 1 for t in fichas)
+            conn.executemany('INSERT OR REPLACE INTO cubeta (clave, tokens, actualizado) VALUES (?, ?, ?)',
+                             [(clave, tokens - 1 if permitido else tokens, ahora)
+                              for (clave, _, _), tokens in zip(cubetas, fichas)])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return permitido, fichas
+
+    def limpiar(self, antes_de):
+        """Borra las cubetas sin uso (ya llenas) para que el archivo no crezca"""
+        conn = self._conexion()
+        conn.execute('DELETE FROM cubeta WHERE actualizado < ?', (antes_de,))
+
+
+def crear_almacen(configuracion):
+    if configuracion.startswith('sqlite:///'):
+        return AlmacenSQLite(configuracion[len('sqlite:///'):])
+    return AlmacenMemoria()
+
+
+class Limitador:
+    """Cubetas por IP y por email más el semáforo de escrituras; lleva contadores"""
+
+    def __init__(self):
+        self.almacen = AlmacenMemoria()
+        self.reglas = {'ip': (5, 600), 'email': (3, 3600)}
+        self._escrituras = threading.BoundedSemaphore(4)
+        self.espera_turno = 2.0
+        self.contadores = Counter()
+        self._verificaciones = 0
+        self._lock = threading.Lock()
+
+    def configurar(self, app):
+        self.almacen = crear_almacen(app.config['LIMITES_ALMACEN'])
+        self.reglas = {
+            'ip': (app.config['LIMITE_IP_CAPACIDAD'], app.config['LIMITE_IP_PERIODO']),
+            'email': (app.config['LIMITE_EMAIL_CAPACIDAD'], app.config['LIMITE_EMAIL_PERIODO']),
+        }
+        self._escrituras = threading.BoundedSemaphore(app.config['LIMITE_ESCRITURAS_SIMULTANEAS'])
+        self.espera_turno = app.config['LIMITE_ESPERA_TURNO']
+        self.contadores.clear()
+
+    def _contar(self, clave):
+        with self._lock:
+            self.contadores[clave] += 1
+
+    def verificar(self, ip, email=None):
+        """Consume una ficha de cada cubeta si todas tienen lugar. Devuelve None si pasa, o los segundos a esperar"""
+        ahora = time.time()
+        claves = [('ip', ip)]
+        if email:
+            claves.append(('email', email.strip().lower()))
+        claves = [(tipo, valor) for tipo, valor in claves if valor]
+        cubetas = [(f'{tipo}:{valor}', *self.reglas[tipo]) for tipo, valor in claves]
+        if not cubetas:
+            self._contar('permitidas')
+            return None
+        try:
+            permitido, fichas = self.almacen.consumir(cubetas, ahora)
+        except Exception as e:
+            log.warning('Almacén de límites no disponible: %s', e)
+            self._contar('errores_almacen')
+            return None
+        self._limpiar_cada_tanto(ahora)
+        if permitido:
+            self._contar('permitidas')
+            return None
+        # la espera la fija la cubeta vacía que más tarda en tener una ficha
+        esperas = {tipo: math.ceil((1 - tokens) * periodo / capacidad)
+                   for (tipo, _), (_, capacidad, periodo), tokens in zip(claves, cubetas, fichas) if tokens < 1}
+        for tipo in esperas:
+            self._contar(f'rechazadas_{tipo}')
+        return max(1, *esperas.values())
+
+    def _limpiar_cada_tanto(self, ahora):
+        """Cada LIMPIAR_CADA verificaciones borra las cubetas sin uso por más de un período (ya están llenas)"""
+        with self._lock:
+            self._verificaciones += 1
+            if self._verificaciones % LIMPIAR_CADA:
+                return
+        try:
+            self.almacen.limpiar(ahora - max(periodo for _, periodo in self.reglas.values()))
+        except Exception as e:
+            log.warning('No se pudieron limpiar las cubetas: %s', e)
+
+    @contextmanager
+    def turno_escritura(self):
+        """Da True si hay lugar para escribir; False si el proceso está saturado"""
+        obtenido = self._escrituras.acquire(timeout=self.espera_turno)
+        if not obtenido:
+            self._contar('descartadas_carga')
+        try:
+            yield obtenido
+        finally:
+            if obtenido:
+                self._escrituras.release()
+
+    def estadisticas(self):
+        with self._lock:
+            datos = dict(self.contadores)
+        datos['reglas'] = {tipo: {'capacidad': c, 'periodo': p} for tipo, (c, p) in self.reglas.items()}
+        datos['almacen'] = type(self.almacen).__name__
+        return datos
+
+
+limitador = Limitador()
@@ -0,0 +1,151 @@
+"""Aprobar, rechazar o eliminar muchas solicitudes en una sola transacción.
+
+Cada acción es una sentencia por conjunto (UPDATE/DELETE ... WHERE id IN ...
+RETURNING) en lugar de un flush por objeto. Como esas sentencias no pasan por
+los eventos del ORM, acá se aplican a mano los mismos ajustes que hacen los
+listeners: contador_estado, resumen_diario, version_fila (va en el propio
+UPDATE) y la versión de agenda de los prestadores cuyas visitas se borran.
+El índice de búsqueda se mantiene solo (triggers).
+
+La condición de estado va en el WHERE: lo que devuelve RETURNING es lo que
+efectivamente cambió, aunque otro admin esté procesando la misma cola.
+"""
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from sqlalchemy import or_
+from sqlalchemy.orm import selectinload
+
+from app import db
+from app.calendario import marcar_agendas
+from app.correo import encolar_confirmacion, encolar_rechazo
+from app.models.contador_estado import ContadorEstado
+from app.models.resumen_diario import CAMPOS, ResumenDiario
+from app.models.solicitud_visita import SolicitudVisita, solicitud_prestador
+from app.models.visita_prestador import VisitaPrestador
+
+ACCIONES = {'aprobar': 'CONFIRMADA', 'rechazar': 'RECHAZADA', 'eliminar': None}
+MAX_IDS = 500
+
+
+class LoteInvalido(ValueError):
+    pass
+
+
+def _prestadores_por_solicitud(ids):
+    por_solicitud = defaultdict(list)
+    for solicitud_id, prestador_id in db.session.execute(
+            db.select(solicitud_prestador.c.solicitud_id, solicitud_prestador.c.prestador_id)
+            .where(solicitud_prestador.c.solicitud_id.in_(ids))):
+        por_solicitud[solicitud_id].append(prestador_id)
+    return por_solicitud
+
+
+def _ajustar_resumenes(anteriores, nuevo_estado):
+    """Descuenta el aporte previo de cada solicitud y, si sigue existiendo, suma el nuevo.
+
+    `anteriores` son dicts con los CAMPOS de ResumenDiario y 'prestadores'.
+    """
+    deltas = defaultdict(Counter)
+    for datos in anteriores:
+        for clave, metricas in ResumenDiario.aportes(datos).items():
+            deltas[clave].subtract(metricas)
+        if nuevo_estado:
+            for clave, metricas in ResumenDiario.aportes(dict(datos, estado=nuevo_estado)).items():
+                deltas[clave].update(metricas)
+    ResumenDiario.ajustar(deltas)
+
+
+def _cambiar_estado(ids, nuevo_estado, motivo):
+    tabla = SolicitudVisita.__table__
+    valores = {'estado': nuevo_estado, 'fecha_respuesta': datetime.utcnow(),
+               'version_fila': tabla.c.version_fila + 1}
+    if motivo is not None:
+        valores['motivo_rechazo'] = motivo
+    # sólo la cola pendiente: lo ya resuelto se informa como no aplicable
+    filas = db.session.execute(
+        tabla.update()
+        .where(tabla.c.id.in_(ids), or_(tabla.c.estado == 'PENDIENTE', tabla.c.estado.is_(None)))
+        .values(valores)
+        .returning(tabla.c.id, *(tabla.c[c] for c in CAMPOS))
+    ).all()
+    if not filas:
+        return []
+    ContadorEstado.ajustar({'PENDIENTE': -len(filas), nuevo_estado: len(filas)})
+    # RETURNING trae el estado nuevo; el anterior era PENDIENTE en todas
+    prestadores = _prestadores_por_solicitud([f.id for f in filas])
+    _ajustar_resumenes([dict(f._mapping, estado='PENDIENTE', prestadores=prestadores[f.id]) for f in filas],
+                       nuevo_estado)
+    return [f.id for f in filas]
+
+
+def _eliminar(ids):
+    visitas = VisitaPrestador.__table__
+    tabla = SolicitudVisita.__table__
+    agendas = db.session.execute(
+        visitas.delete().where(visitas.c.solicitud_id.in_(ids)).returning(visitas.c.prestador_id)
+    ).scalars().all()
+    prestadores = defaultdict(list)
+    for solicitud_id, prestador_id in db.session.execute(
+            solicitud_prestador.delete().where(solicitud_prestador.c.solicitud_id.in_(ids))
+            .returning(solicitud_prestador.c.solicitud_id, solicitud_prestador.c.prestador_id)):
+        prestadores[solicitud_id].append(prestador_id)
+    filas = db.session.execute(
+        tabla.delete().where(tabla.c.id.in_(ids)).returning(tabla.c.id, *(tabla.c[c] for c in CAMPOS))
+    ).all()
+    ContadorEstado.ajustar({estado: -cantidad for estado, cantidad
+                            in Counter(f.estado or 'PENDIENTE' for f in filas).items()})
+    _ajustar_resumenes([dict(f._mapping, prestadores=prestadores[f.id]) for f in filas], None)
+    marcar_agendas(db.session.connection(), agendas)
+    return [f.id for f in filas]
+
+
+def aplicar(accion, ids, motivo=None):
+    """Aplica `accion` a las solicitudes `ids` dentro de la transacción actual.
+
+    Devuelve (resultados, cambiadas): un dict por id pedido con ok/mensaje y
+    las solicitudes modificadas recargadas (vacío al eliminar). El llamador
+    confirma o deshace la transacción.
+    """
+    if accion not in ACCIONES:
+        raise LoteInvalido(f'Acción desconocida: {accion}')
+    try:
+        ids = list(dict.fromkeys(int(i) for i in ids))
+    except (TypeError, ValueError):
+        raise LoteInvalido('Los ids deben ser números')
+    if not ids:
+        raise LoteInvalido('No se indicaron solicitudes')
+    if len(ids) > MAX_IDS:
+        raise LoteInvalido(f'Se pueden procesar hasta {MAX_IDS} solicitudes por vez')
+    motivo = (motivo or '').strip() or None
+    if accion == 'rechazar' and not motivo:
+        raise LoteInvalido('Debe indicar un motivo para rechazar las solicitudes')
+
+    # lo que no existe se distingue de lo que no estaba pendiente
+    existentes = dict(db.session.query(SolicitudVisita.id, SolicitudVisita.estado)
+                      .filter(SolicitudVisita.id.in_(ids)).all())
+    if accion == 'eliminar':
+        hechas = set(_eliminar(ids))
+    else:
+        hechas = set(_cambiar_estado(ids, ACCIONES[accion], motivo if accion == 'rechazar' else None))
+
+    cambiadas = []
+    if hechas and accion != 'eliminar':
+        cambiadas = SolicitudVisita.query \
+            .options(selectinload(SolicitudVisita.visitas_asignadas).joinedload(VisitaPrestador.prestador)) \
+            .filter(SolicitudVisita.id.in_(hechas)).order_by(SolicitudVisita.id) \
+            .execution_options(populate_existing=True).all()
+        encolar = encolar_confirmacion if accion == 'aprobar' else encolar_rechazo
+        for solicitud in cambiadas:
+            encolar(solicitud)
+
+    resultados = []
+    for solicitud_id in ids:
+        if solicitud_id in hechas:
+            resultados.append({'id': solicitud_id, 'ok': True, 'estado': ACCIONES[accion]})
+        elif solicitud_id not in existentes:
+            resultados.append({'id': solicitud_id, 'ok': False, 'mensaje': 'No existe'})
+        else:
+            resultados.append({'id': solicitud_id, 'ok': False,
+                               'mensaje': f'No está pendiente (estado {existentes[solicitud_id]})'})
+    return resultados, cambiadas
@@ -0,0 +1,203 @@
+"""Métricas por pedido en formato de texto de Prometheus (/admin/metrics).
+
+Por cada endpoint se acumulan un histograma de latencia, la cantidad de
+sentencias SQL y el tiempo pasado en la base y en el render de plantillas
+(el tiempo de plantillas descuenta las consultas perezosas que se disparan
+mientras se arma la página). También se exponen las caches en memoria y los
+contadores del límite del formulario público.
+
+El costo por pedido es un par de perf_counter() por sentencia y una
+actualización de contadores bajo lock al terminar. Las métricas son del
+proceso: con varios workers cada uno expone las suyas (usar un label de
+instancia en el scrape o un único worker para métricas).
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from flask import before_render_template, request, template_rendered
+from sqlalchemy import event
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+_actual = ContextVar('metricas_pedido', default=None)
+
+
+class _Pedido:
+    __slots__ = ('inicio', 'consultas', 'tiempo_sql', 'tiempo_plantillas', 'plantilla', 'estado')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tiempo_sql = 0.0
+        self.tiempo_plantillas = 0.0
+        self.plantilla = None
+        self.estado = 500
+
+
+class Histograma:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.conteos = [0] * (len(buckets) + 1)
+        self.suma = 0.0
+        self.cantidad = 0
+
+    def observar(self, valor):
+        self.conteos[bisect_left(self.buckets, valor)] += 1
+        self.suma += valor
+        self.cantidad += 1
+
+    def lineas(self, nombre, etiquetas):
+        acumulado = 0
+        for limite, conteo in zip(self.buckets, self.conteos):
+            acumulado += conteo
+            yield f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {acumulado}'
+        yield f'{nombre}_bucket{{{etiquetas},le="+Inf"}} {self.cantidad}'
+        yield f'{nombre}_sum{{{etiquetas}}} {self.suma:.6f}'
+        yield f'{nombre}_count{{{etiquetas}}} {self.cantidad}'
+
+
+class Registro:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.limpiar()
+
+    def limpiar(self):
+        self.latencia = defaultdict(lambda: Histograma(BUCKETS_SEGUNDOS))
+        self.consultas_por_pedido = defaultdict(lambda: Histograma(BUCKETS_CONSULTAS))
+        self.pedidos = defaultdict(int)
+        self.consultas = defaultdict(int)
+        self.tiempo_sql = defaultdict(float)
+        self.tiempo_plantillas = defaultdict(float)
+        self.consultas_fuera_de_pedido = 0
+
+    def anotar(self, endpoint, metodo, pedido, duracion):
+        with self._lock:
+            self.latencia[endpoint].observar(duracion)
+            self.consultas_por_pedido[endpoint].observar(pedido.consultas)
+            self.pedidos[(endpoint, metodo, pedido.estado)] += 1
+            self.consultas[endpoint] += pedido.consultas
+            self.tiempo_sql[endpoint] += pedido.tiempo_sql
+            self.tiempo_plantillas[endpoint] += pedido.tiempo_plantillas
+
+    def anotar_fuera_de_pedido(self):
+        with self._lock:
+            self.consultas_fuera_de_pedido += 1
+
+    def exponer(self):
+        """Texto en formato de exposición de Prometheus 0.0.4"""
+        from app.cache import registradas
+        from app.limites import limitador
+
+        with self._lock:
+            lineas = [
+                '# HELP turismo_http_request_duration_seconds Latencia de los pedidos por endpoint.',
+                '# TYPE turismo_http_request_duration_seconds histogram',
+            ]
+            for endpoint, histograma in sorted(self.latencia.items()):
+                lineas += histograma.lineas('turismo_http_request_duration_seconds', f'endpoint="{endpoint}"')
+            lineas += ['# HELP turismo_http_requests_total Pedidos atendidos.',
+                       '# TYPE turismo_http_requests_total counter']
+            lineas += [f'turismo_http_requests_total{{endpoint="{e}",method="{m}",status="{s}"}} {n}'
+                       for (e, m, s), n in sorted(self.pedidos.items())]
+            lineas += ['# HELP turismo_db_queries_per_request Sentencias SQL por pedido.',
+                       '# TYPE turismo_db_queries_per_request histogram']
+            for endpoint, histograma in sorted(self.consultas_por_pedido.items()):
+                lineas += histograma.lineas('turismo_db_queries_per_request', f'endpoint="{endpoint}"')
+            lineas += ['# HELP turismo_db_queries_total Sentencias SQL ejecutadas.',
+                       '# TYPE turismo_db_queries_total counter']
+            lineas += [f'turismo_db_queries_total{{endpoint="{e}"}} {n}' for e, n in sorted(self.consultas.items())]
+            lineas.append(f'turismo_db_queries_total{{endpoint="fuera_de_pedido"}} {self.consultas_fuera_de_pedido}')
+            lineas += ['# HELP turismo_db_seconds_total Tiempo en la base de datos.',
+                       '# TYPE turismo_db_seconds_total counter']
+            lineas += [f'turismo_db_seconds_total{{endpoint="{e}"}} {t:.6f}' for e, t in sorted(self.tiempo_sql.items())]
+            lineas += ['# HELP turismo_template_seconds_total Tiempo renderizando plantillas (sin SQL).',
+                       '# TYPE turismo_template_seconds_total counter']
+            lineas += [f'turismo_template_seconds_total{{endpoint="{e}"}} {t:.6f}'
+                       for e, t in sorted(self.tiempo_plantillas.items())]
+
+        estadisticas = [c.estadisticas() for c in registradas]
+        for metrica, clave, tipo in (('turismo_cache_hits_total', 'aciertos', 'counter'),
+                                     ('turismo_cache_misses_total', 'fallos', 'counter'),
+                                     ('turismo_cache_entries', 'entradas', 'gauge')):
+            lineas.append(f'# TYPE {metrica} {tipo}')
+            lineas += [f'{metrica}{{cache="{e["nombre"]}"}} {e[clave]}' for e in estadisticas]
+
+        lineas.append('# TYPE turismo_formulario_publico_total counter')
+        contadores = limitador.estadisticas()
+        for resultado in ('permitidas', 'rechazadas_ip', 'rechazadas_email', 'descartadas_carga', 'errores_almacen'):
+            lineas.append(f'turismo_formulario_publico_total{{resultado="{resultado}"}} {contadores.get(resultado, 0)}')
+        return '\n'.join(lineas) + '\n'
+
+
+registro = Registro()
+
+
+# EVENTOS
+
+def _inicio_pedido():
+    _actual.set(_Pedido())
+
+
+def _respuesta(respuesta):
+    pedido = _actual.get()
+    if pedido is not None:
+        pedido.estado = respuesta.status_code
+    return respuesta
+
+
+def _fin_pedido(error=None):
+    pedido = _actual.get()
+    if pedido is None:
+        return
+    _actual.set(None)
+    endpoint = request.url_rule.endpoint if request.url_rule else 'sin_ruta'
+    registro.anotar(endpoint, request.method, pedido, time.perf_counter() - pedido.inicio)
+
+
+def _antes_de_sentencia(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metricas_inicio = time.perf_counter()
+
+
+def _despues_de_sentencia(conn, cursor, statement, parameters, context, executemany):
+    pedido = _actual.get()
+    if pedido is None:
+        registro.anotar_fuera_de_pedido()
+        return
+    pedido.consultas += 1
+    inicio = getattr(context, '_metricas_inicio', None)
+    if inicio is not None:
+        pedido.tiempo_sql += time.perf_counter() - inicio
+
+
+def _antes_de_plantilla(app, template, context, **extra):
+    pedido = _actual.get()
+    if pedido is not None:
+        pedido.plantilla = (time.perf_counter(), pedido.tiempo_sql)
+
+
+def _plantilla_lista(app, template, context, **extra):
+    pedido = _actual.get()
+    if pedido is not None and pedido.plantilla:
+        inicio, sql_previo = pedido.plantilla
+        pedido.tiempo_plantillas += time.perf_counter() - inicio - (pedido.tiempo_sql - sql_previo)
+        pedido.plantilla = None
+
+
+def configurar(app, db):
+    """Engancha los eventos de Flask, SQLAlchemy y Jinja si METRICAS_HABILITADAS"""
+    if not app.config.get('METRICAS_HABILITADAS', True):
+        return
+    app.before_request(_inicio_pedido)
+    app.after_request(_respuesta)
+    app.teardown_request(_fin_pedido)
+    before_render_template.connect(_antes_de_plantilla, app)
+    template_rendered.connect(_plantilla_lista, app)
+    with app.app_context():
+        for motor in db.engines.values():
+            event.listen(motor, 'before_cursor_execute', _antes_de_sentencia)
+            event.listen(motor, 'after_cursor_execute', _despues_de_sentencia)
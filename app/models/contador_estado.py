@@ -0,0 +1,86 @@
+from app import db
+from collections import Counter
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models.solicitud_visita import SolicitudVisita
+
+
+class ContadorEstado(db.Model):
+    """Cantidad de solicitudes por estado, mantenida en la misma transacción que los cambios"""
+
+    estado = db.Column(db.String(20), primary_key=True)
+    cantidad = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ContadorEstado {self.estado}: {self.cantidad}>'
+
+    @staticmethod
+    def get_conteo():
+        """Lee todos los contadores en una sola consulta; agrega la clave TOTAL"""
+        conteo = {c.estado: c.cantidad for c in ContadorEstado.query.all()}
+        conteo['TOTAL'] = sum(conteo.values())
+        return conteo
+
+    @staticmethod
+    def ajustar(deltas, connection=None):
+        """Suma `deltas` ({estado: diferencia}) a los contadores.
+
+        Se ejecuta sobre la conexión de la sesión actual para quedar dentro
+        de la misma transacción que el cambio de estado.
+        """
+        conn = connection or db.session.connection()
+        tabla = ContadorEstado.__table__
+        for estado, diferencia in deltas.items():
+            if not diferencia:
+                continue
+            resultado = conn.execute(
+                tabla.update()
+                .where(tabla.c.estado == estado)
+                .values(cantidad=tabla.c.cantidad + diferencia)
+            )
+            if resultado.rowcount == 0:
+                conn.execute(tabla.insert().values(estado=estado, cantidad=diferencia))
+
+    @staticmethod
+    def reconstruir():
+        """Recalcula los contadores desde solicitud_visita (comando de reconciliación)"""
+        conteo = SolicitudVisita.get_conteo_por_estado()
+        conteo.pop('TOTAL', None)
+
+        ContadorEstado.query.delete(synchronize_session=False)
+        db.session.add_all(ContadorEstado(estado=e, cantidad=c) for e, c in conteo.items())
+        db.session.commit()
+        return conteo
+
+
+def _estado_actual(valor):
+    return valor or 'PENDIENTE'
+
+
+@event.listens_for(SolicitudVisita.estado, 'set', active_history=True)
+def _cargar_estado_anterior(target, value, oldvalue, initiator):
+    """Fuerza la carga del estado previo aunque el objeto esté expirado,
+    para que el historial llegue completo al flush"""
+
+
+@event.listens_for(Session, 'before_flush')
+def _actualizar_contadores(session, flush_context, instances):
+    """Traduce altas, bajas y cambios de `estado` en deltas sobre contador_estado"""
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, SolicitudVisita):
+            deltas[_estado_actual(obj.estado)] += 1
+    for obj in session.deleted:
+        if isinstance(obj, SolicitudVisita):
+            historial = inspect(obj).attrs.estado.history
+            anterior = (historial.deleted or historial.unchanged or [obj.estado])[0]
+            deltas[_estado_actual(anterior)] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, SolicitudVisita) and obj not in session.deleted:
+            historial = inspect(obj).attrs.estado.history
+            if historial.deleted and historial.added and historial.deleted[0] != historial.added[0]:
+                deltas[_estado_actual(historial.deleted[0])] -= 1
+                deltas[_estado_actual(historial.added[0])] += 1
+
+    if any(deltas.values()):
+        ContadorEstado.ajustar(deltas, connection=session.connection())
@@ -0,0 +1,44 @@
+from app import db
+from datetime import datetime
+
+
+class CorreoSaliente(db.Model):
+    """Bandeja de salida: los correos se graban en la misma transacción que la acción
+    que los origina y un despachador en segundo plano los envía (ver app/correo.py)"""
+    __table_args__ = (
+        db.Index('ix_correo_saliente_pendientes', 'estado', 'proximo_intento'),
+        db.Index('ix_correo_saliente_lote', 'lote'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    destinatario = db.Column(db.String(120), nullable=False)
+    asunto = db.Column(db.String(200), nullable=False)
+    cuerpo = db.Column(db.Text, nullable=False)
+
+    estado = db.Column(db.String(20), nullable=False, default='PENDIENTE')  # PENDIENTE, ENVIADO, ERROR
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    proximo_intento = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    lote = db.Column(db.String(32))  # despachador que lo tomó
+    ultimo_error = db.Column(db.Text)
+
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha_envio = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<CorreoSaliente {self.destinatario} - {self.asunto} ({self.estado})>'
+
+    @staticmethod
+    def encolar(destinatario, asunto, cuerpo):
+        """Agrega el correo a la sesión actual; se confirma junto con el resto de los cambios"""
+        if not destinatario:
+            return None
+        correo = CorreoSaliente(destinatario=destinatario, asunto=asunto, cuerpo=cuerpo)
+        db.session.add(correo)
+        db.session.info['correo_encolado'] = True
+        return correo
+
+    @staticmethod
+    def get_conteo():
+        filas = db.session.query(CorreoSaliente.estado, db.func.count(CorreoSaliente.id)) \
+            .group_by(CorreoSaliente.estado).all()
+        return {estado: cantidad for estado, cantidad in filas}
@@ -1,10 +1,20 @@
 from app import db
 from datetime import datetime
 import json
+import re
 from flask_login import UserMixin
+from sqlalchemy import event
+from app import elegibilidad
+from app.catalogo import marcar_modificado
+from app import busqueda
 
 class Prestador(db.Model, UserMixin):
     """Prestadores turísticos con datos completos para validación de solicitudes"""
+    __table_args__ = (
+        db.Index('ix_prestador_email', 'email'),
+        db.Index('ix_prestador_razon_social', 'razon_social'),
+        db.Index('ix_prestador_activo_razon_social', 'activo', 'razon_social'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -37,6 +47,12 @@ class Prestador(db.Model, UserMixin):
     
     # RESTRICCIONES (para validar solicitudes)
     edades_recomendadas = db.Column(db.String(200))  # ["inicial", "primaria", ...]
+
+    # Disponibilidad codificada en bits (ver app/elegibilidad.py); se recalcula al guardar
+    mascara_meses = db.Column(db.Integer)
+    mascara_dias = db.Column(db.Integer)
+    mascara_edades = db.Column(db.Integer)
+    mascara_turnos = db.Column(db.Integer)
     acceso_movilidad_reducida = db.Column(db.String(20))
     afectado_por_lluvia = db.Column(db.String(50))
     
@@ -47,16 +63,31 @@ class Prestador(db.Model, UserMixin):
     
     # METADATOS
     activo = db.Column(db.Boolean, default=True)
+    recibe_externas = db.Column(db.Boolean, default=True)  # instituciones de fuera de Esperanza
     role = db.Column(db.String(20), nullable=False, default='prestador')  # 'prestador' | 'admin'
+
+    # CALENDARIO (.ics): token de suscripción y versión de la agenda para ETag/cache
+    token_calendario = db.Column(db.String(64), unique=True)
+    agenda_version = db.Column(db.Integer, nullable=False, default=0)
+    agenda_actualizada = db.Column(db.DateTime)
     fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
         return f'<Prestador {self.razon_social}>'
     
     def puede_recibir_solicitud(self, solicitud):
-        """Valida si el prestador puede atender una solicitud"""
-        # TODO: Implementar validaciones en Commit 3
-        return True
+        """Valida si el prestador puede atender una solicitud (mes, día, nivel, turno y capacidad)"""
+        return not self.motivos_rechazo(solicitud)
+
+    def motivos_rechazo(self, solicitud):
+        return elegibilidad.motivos_rechazo(self, elegibilidad.mascaras_solicitud(solicitud),
+                                            solicitud.get_total_visitantes())
+
+    def actualizar_mascaras(self):
+        self.mascara_meses = elegibilidad.mascara_meses(self.meses_disponibles)
+        self.mascara_dias = elegibilidad.mascara_dias(self.dias_disponibles)
+        self.mascara_edades = elegibilidad.mascara_edades(self.edades_recomendadas)
+        self.mascara_turnos = elegibilidad.mascara_turnos(self.horarios_sugeridos)
     
     def get_meses_disponibles(self):
         try:
@@ -64,6 +95,16 @@ class Prestador(db.Model, UserMixin):
         except:
             return []
     
+    def get_duracion_minutos(self):
+        """Interpreta duracion_visita ('90', '1 hora', '1h 30min', '45 minutos')"""
+        texto = (self.duracion_visita or '').lower()
+        numeros = [int(n) for n in re.findall(r'\d+', texto)]
+        if not numeros:
+            return None
+        if 'h' in texto:
+            return numeros[0] * 60 + (numeros[1] if len(numeros) > 1 else 0)
+        return numeros[0]
+    
     def get_edades_recomendadas(self):
         try:
             return json.loads(self.edades_recomendadas) if self.edades_recomendadas else []
@@ -74,4 +115,32 @@ class Prestador(db.Model, UserMixin):
         return (self.role or '') == 'admin'
 
     def is_prestador(self):
-        return (self.role or '') == 'prestador'
\ No newline at end of file
+        return (self.role or '') == 'prestador'
+
+    @staticmethod
+    def buscar(texto, solo_activos=True):
+        """Prestadores que coinciden con `texto` en razón social o descripción, por relevancia"""
+        coincide = busqueda.coincidencias('prestador', texto, db.engine.dialect.name)
+        if coincide is None:
+            return []
+        query = Prestador.query.join(coincide, coincide.c.id == Prestador.id)
+        if solo_activos:
+            query = query.filter(Prestador.activo.is_(True))
+        return query.order_by(coincide.c.rango, Prestador.razon_social).all()
+
+
+event.listen(Prestador.__table__, 'after_create', busqueda.al_crear_tabla)
+event.listen(Prestador.__table__, 'before_drop', busqueda.al_borrar_tabla)
+
+
+@event.listens_for(Prestador, 'before_insert')
+@event.listens_for(Prestador, 'before_update')
+def _recalcular_mascaras(mapper, connection, target):
+    target.actualizar_mascaras()
+
+
+@event.listens_for(Prestador, 'after_insert')
+@event.listens_for(Prestador, 'after_update')
+@event.listens_for(Prestador, 'after_delete')
+def _invalidar_catalogo(mapper, connection, target):
+    marcar_modificado(target)
@@ -0,0 +1,192 @@
+from app import db
+from collections import Counter, defaultdict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models.solicitud_visita import SolicitudVisita
+
+# Dimensiones por las que se acumula cada solicitud
+DIMENSIONES = ('total', 'prestador', 'nivel', 'localidad')
+METRICAS = ('solicitudes', 'alumnos', 'docentes', 'confirmadas', 'rechazadas')
+
+# Atributos de la solicitud que cambian su aporte a los resúmenes
+CAMPOS = ('fecha_solicitada', 'estado', 'cantidad_alumnos', 'cantidad_docentes',
+           'nivel_educativo', 'localidad')
+
+
+class ResumenDiario(db.Model):
+    """Totales por día de visita y dimensión, mantenidos en la misma transacción que los cambios.
+
+    Cada solicitud suma en la fila de su fecha_solicitada para la dimensión
+    'total', su nivel_educativo, su localidad y cada prestador pedido.
+    """
+    __table_args__ = (
+        db.Index('ix_resumen_diario_periodo', 'dimension', 'anio', 'mes', 'valor'),
+    )
+
+    dimension = db.Column(db.String(20), primary_key=True)
+    valor = db.Column(db.String(100), primary_key=True)
+    fecha = db.Column(db.Date, primary_key=True)
+    anio = db.Column(db.Integer, nullable=False)
+    mes = db.Column(db.Integer, nullable=False)
+
+    solicitudes = db.Column(db.Integer, nullable=False, default=0)
+    alumnos = db.Column(db.Integer, nullable=False, default=0)
+    docentes = db.Column(db.Integer, nullable=False, default=0)
+    confirmadas = db.Column(db.Integer, nullable=False, default=0)
+    rechazadas = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ResumenDiario {self.dimension}={self.valor} {self.fecha}>'
+
+    @staticmethod
+    def aportes(datos):
+        """{(dimension, valor, fecha): Counter(metricas)} que aporta una solicitud.
+
+        `datos` es un dict con los CAMPOS y 'prestadores' (lista de ids).
+        """
+        fecha = datos['fecha_solicitada']
+        if fecha is None:
+            return {}
+        estado = datos['estado'] or 'PENDIENTE'
+        metricas = Counter(
+            solicitudes=1,
+            alumnos=datos['cantidad_alumnos'] or 0,
+            docentes=datos['cantidad_docentes'] or 0,
+            confirmadas=1 if estado in ('CONFIRMADA', 'FINALIZADA') else 0,
+            rechazadas=1 if estado == 'RECHAZADA' else 0,
+        )
+        claves = [('total', ''),
+                  ('nivel', datos['nivel_educativo'] or 'Sin dato'),
+                  ('localidad', datos['localidad'] or 'Sin dato')]
+        claves += [('prestador', str(pid)) for pid in datos['prestadores']]
+        return {(dimension, valor, fecha): metricas for dimension, valor in claves}
+
+    @staticmethod
+    def ajustar(deltas, connection=None):
+        """Suma `deltas` ({(dimension, valor, fecha): Counter}) a las filas de resumen"""
+        conn = connection or db.session.connection()
+        tabla = ResumenDiario.__table__
+        for (dimension, valor, fecha), metricas in deltas.items():
+            if not any(metricas.values()):
+                continue
+            resultado = conn.execute(
+                tabla.update()
+                .where(tabla.c.dimension == dimension, tabla.c.valor == valor, tabla.c.fecha == fecha)
+                .values({m: tabla.c[m] + metricas[m] for m in METRICAS if metricas[m]})
+            )
+            if resultado.rowcount == 0:
+                conn.execute(tabla.insert().values(
+                    dimension=dimension, valor=valor, fecha=fecha, anio=fecha.year, mes=fecha.month,
+                    **{m: metricas[m] for m in METRICAS}
+                ))
+
+    @staticmethod
+    def por_mes(dimension, anio, metrica='alumnos'):
+        """{valor: {mes: total}} para un año, leyendo sólo resumen_diario"""
+        columna = getattr(ResumenDiario, metrica)
+        filas = db.session.query(ResumenDiario.valor, ResumenDiario.mes, db.func.sum(columna)) \
+            .filter(ResumenDiario.dimension == dimension, ResumenDiario.anio == anio) \
+            .group_by(ResumenDiario.valor, ResumenDiario.mes).all()
+        tabla = defaultdict(dict)
+        for valor, mes, total in filas:
+            tabla[valor][mes] = total or 0
+        return tabla
+
+    @staticmethod
+    def anios():
+        filas = db.session.query(ResumenDiario.anio).filter(ResumenDiario.dimension == 'total') \
+            .distinct().order_by(ResumenDiario.anio).all()
+        return [f.anio for f in filas]
+
+    @staticmethod
+    def reconstruir(lote=1000):
+        """Recalcula todos los resúmenes recorriendo solicitud_visita (comando de reconciliación)"""
+        from app.models.solicitud_visita import solicitud_prestador
+
+        prestadores = defaultdict(list)
+        for solicitud_id, prestador_id in db.session.execute(
+                db.select(solicitud_prestador.c.solicitud_id, solicitud_prestador.c.prestador_id)):
+            prestadores[solicitud_id].append(prestador_id)
+
+        totales = defaultdict(Counter)
+        columnas = [getattr(SolicitudVisita, c) for c in CAMPOS]
+        for fila in db.session.query(SolicitudVisita.id, *columnas).yield_per(lote):
+            datos = dict(zip(CAMPOS, fila[1:]), prestadores=prestadores.get(fila.id, []))
+            for clave, metricas in ResumenDiario.aportes(datos).items():
+                totales[clave].update(metricas)
+
+        ResumenDiario.query.delete(synchronize_session=False)
+        filas = [dict(dimension=d, valor=v, fecha=f, anio=f.year, mes=f.month, **{m: c[m] for m in METRICAS})
+                 for (d, v, f), c in totales.items()]
+        if filas:
+            db.session.execute(db.insert(ResumenDiario), filas)
+        db.session.commit()
+        return len(filas)
+
+
+def _datos(obj, anteriores):
+    """Valores actuales (anteriores=False) o previos al cambio (True) de una solicitud"""
+    estado = inspect(obj)
+    datos = {}
+    for campo in CAMPOS:
+        historial = estado.attrs[campo].history
+        if anteriores and historial.deleted:
+            datos[campo] = historial.deleted[0]
+        else:
+            datos[campo] = getattr(obj, campo)
+    historial = estado.attrs.prestadores.history
+    if anteriores and (historial.added or historial.deleted):
+        actuales = list(historial.unchanged or ()) + list(historial.deleted or ())
+    else:
+        actuales = obj.prestadores
+    datos['prestadores'] = sorted({p.id for p in actuales if p.id is not None})
+    return datos
+
+
+def _modificada(obj):
+    estado = inspect(obj)
+    return any(estado.attrs[c].history.has_changes() for c in CAMPOS + ('prestadores',))
+
+
+def _sumar(deltas, aportes, signo):
+    for clave, metricas in aportes.items():
+        for m, v in metricas.items():
+            deltas[clave][m] += signo * v
+
+
+def _cargar_valor_anterior(target, value, oldvalue, initiator):
+    """Fuerza la carga del valor previo aunque el objeto esté expirado"""
+
+
+for _campo in CAMPOS:
+    event.listen(getattr(SolicitudVisita, _campo), 'set', _cargar_valor_anterior, active_history=True)
+
+
+@event.listens_for(Session, 'before_flush')
+def _descontar_bajas(session, flush_context, instances):
+    """Las bajas se descuentan antes del flush, mientras sus prestadores siguen asociados"""
+    deltas = defaultdict(Counter)
+    for obj in session.deleted:
+        if isinstance(obj, SolicitudVisita):
+            _sumar(deltas, ResumenDiario.aportes(_datos(obj, anteriores=True)), -1)
+    if deltas:
+        ResumenDiario.ajustar(deltas, connection=session.connection())
+
+
+@event.listens_for(Session, 'after_flush')
+def _sumar_altas_y_cambios(session, flush_context):
+    """Altas y modificaciones se aplican después del flush, cuando ya tienen ids.
+
+    En after_flush las listas new/dirty y el historial de atributos todavía
+    reflejan el estado previo al flush.
+    """
+    deltas = defaultdict(Counter)
+    for obj in session.new:
+        if isinstance(obj, SolicitudVisita):
+            _sumar(deltas, ResumenDiario.aportes(_datos(obj, anteriores=False)), 1)
+    for obj in session.dirty:
+        if isinstance(obj, SolicitudVisita) and obj not in session.deleted and _modificada(obj):
+            _sumar(deltas, ResumenDiario.aportes(_datos(obj, anteriores=True)), -1)
+            _sumar(deltas, ResumenDiario.aportes(_datos(obj, anteriores=False)), 1)
+    if deltas:
+        ResumenDiario.ajustar(deltas, connection=session.connection())
@@ -1,9 +1,22 @@
 from app import db
 import json
 from datetime import datetime
+from sqlalchemy import event
+from app import busqueda
+
+# Prestadores pedidos por cada solicitud (normaliza prestadores_solicitados)
+solicitud_prestador = db.Table('solicitud_prestador',
+    db.Column('solicitud_id', db.Integer, db.ForeignKey('solicitud_visita.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('prestador_id', db.Integer, db.ForeignKey('prestador.id'), primary_key=True),
+    db.Index('ix_solicitud_prestador_prestador_id', 'prestador_id', 'solicitud_id')
+)
 
 class SolicitudVisita(db.Model):
     """Solicitudes de visitas enviadas por instituciones educativas"""
+    __table_args__ = (
+        db.Index('ix_solicitud_visita_fecha_solicitud', 'fecha_solicitud', 'id'),
+        db.Index('ix_solicitud_visita_estado_fecha', 'estado', 'fecha_solicitud', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -20,7 +33,10 @@ class SolicitudVisita(db.Model):
     responsable_telefono = db.Column(db.String(30), nullable=False)
     
     # DETALLES DE LA VISITA SOLICITADA
-    prestadores_solicitados = db.Column(db.Text)  # JSON con lista de prestadores seleccionados
+    prestadores_solicitados = db.Column(db.Text)  # JSON tal como se recibió (histórico)
+    prestadores = db.relationship('Prestador', secondary=solicitud_prestador,
+                                  order_by='Prestador.razon_social', lazy='select',
+                                  backref=db.backref('solicitudes_pedidas', lazy='select'))
     
     # FILTROS / METADATOS
     origen_institucion = db.Column(db.String(20), nullable=False)
@@ -43,19 +59,66 @@ class SolicitudVisita(db.Model):
     
     fecha_solicitud = db.Column(db.DateTime, default=datetime.utcnow)
     ip_origen = db.Column(db.String(45))
+
+    # Se incrementa con cada cambio de la fila o de sus visitas (app/fragmentos.py)
+    version_fila = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     def __repr__(self):
         return f'<SolicitudVisita {self.nombre_institucion} - {self.fecha_solicitud}>'
     
-    # MÉTODOS PARA MANEJAR JSON DE PRESTADORES
+    # MÉTODOS PARA MANEJAR LOS PRESTADORES SELECCIONADOS
     def get_prestadores_seleccionados(self):
+        """Nombres de los prestadores pedidos, desde solicitud_prestador.
+
+        Si la solicitud no tiene filas asociadas (nombres que no coinciden con
+        ningún prestador cargado) se devuelve la lista original del JSON.
+        """
+        if self.prestadores:
+            return [p.razon_social for p in self.prestadores]
         try:
             return json.loads(self.prestadores_solicitados) if self.prestadores_solicitados else []
         except Exception:
             return []
     
     def set_prestadores_seleccionados(self, lista_prestadores):
+        """Asocia los prestadores indicados por nombre, id o dict.
+
+        Todos se resuelven en una sola consulta; el JSON original se conserva
+        en prestadores_solicitados.
+        """
+        from app.models.prestador import Prestador
+
+        lista_prestadores = list(lista_prestadores or [])
         self.prestadores_solicitados = json.dumps(lista_prestadores)
+
+        nombres, ids = SolicitudVisita._separar_nombres_e_ids(lista_prestadores)
+        if not nombres and not ids:
+            self.prestadores = []
+            return
+        self.prestadores = Prestador.query.filter(db.or_(
+            Prestador.id.in_(ids),
+            Prestador.razon_social.in_(nombres)
+        )).all()
+
+    @staticmethod
+    def _separar_nombres_e_ids(lista_prestadores):
+        """Acepta ['Nombre'], [3] o [{'prestador_nombre': ..., 'prestador_id': ...}]"""
+        nombres, ids = set(), set()
+        for item in lista_prestadores:
+            if isinstance(item, dict):
+                nombre = item.get('prestador_nombre') or item.get('razon_social')
+                if nombre:
+                    nombres.add(nombre)
+                if item.get('prestador_id') is not None:
+                    try:
+                        ids.add(int(item['prestador_id']))
+                    except (TypeError, ValueError):
+                        pass
+            elif isinstance(item, int):
+                ids.add(item)
+            elif item:
+                nombres.add(str(item))
+        return nombres, ids
     
     def get_total_visitantes(self):
         return self.cantidad_alumnos + (self.cantidad_docentes or 0)
@@ -73,17 +136,28 @@ class SolicitudVisita(db.Model):
         return self.estado == 'PENDIENTE'
     
     def confirmar_con_horarios(self, horarios_prestadores, admin_id=None, confirm=False):
+        """Compatibilidad: True si al menos un horario se pudo guardar"""
+        resultados = self.programar_horarios(horarios_prestadores, admin_id=admin_id, confirm=confirm)
+        return any(r['ok'] for r in resultados)
+
+    def programar_horarios(self, horarios_prestadores, admin_id=None, confirm=False):
+        """Crea o actualiza las visitas de la solicitud en lote.
+
+        Resuelve todos los prestadores con una consulta IN y todas las visitas
+        existentes con otra; cada horario se valida contra la agenda del
+        prestador (superposición y capacidad) y las altas y modificaciones
+        se confirman en una única transacción. Devuelve una lista con el
+        resultado de cada fila: {'prestador_nombre', 'ok', 'mensaje'}.
+        """
         from app import db
         from app.models.visita_prestador import VisitaPrestador
         from app.models.prestador import Prestador
+        from app.agenda import Agenda
+        from app.calendario import marcar_agendas
+        from app.fragmentos import marcar_solicitudes
+        from app.correo import encolar_aviso_visita, encolar_confirmacion
         from datetime import datetime as _dt
 
-        if confirm and not self.puede_ser_confirmada():
-            return False
-
-        if not horarios_prestadores:
-            return False
-
         def _parse_time(t):
             if not t:
                 return None
@@ -94,51 +168,116 @@ class SolicitudVisita(db.Model):
                     continue
             return None
 
-        try:
-            if confirm:
-                self.estado = 'CONFIRMADA'
-                self.fecha_respuesta = _dt.utcnow()
-                db.session.add(self)
+        filas = [h for h in (horarios_prestadores or []) if h.get('prestador_nombre')]
+        if not filas:
+            return []
 
-            for h in horarios_prestadores:
-                nombre = h.get('prestador_nombre')
-                if not nombre:
-                    continue
+        if confirm and not self.puede_ser_confirmada():
+            return [{'prestador_nombre': h['prestador_nombre'], 'ok': False,
+                     'mensaje': f'La solicitud está {self.estado} y no puede confirmarse'} for h in filas]
 
-                prestador = Prestador.query.filter_by(razon_social=nombre).first()
-                if not prestador:
-                    continue
+        nombres = {h['prestador_nombre'] for h in filas}
+        prestadores = {p.razon_social: p for p in Prestador.query.filter(Prestador.razon_social.in_(nombres))}
+        existentes = {}
+        if prestadores:
+            existentes = {v.prestador_id: v for v in VisitaPrestador.query.filter(
+                VisitaPrestador.solicitud_id == self.id,
+                VisitaPrestador.prestador_id.in_([p.id for p in prestadores.values()])
+            )}
 
-                hora_inicio = _parse_time(h.get('hora_inicio'))
-                hora_fin = _parse_time(h.get('hora_fin'))
+        fecha = self.fecha_solicitada or _dt.utcnow().date()
+        visitantes = self.get_total_visitantes()
+        agenda = Agenda.cargar(prestadores.values(),
+                               {fecha} | {v.fecha_confirmada for v in existentes.values()})
+        resultados = []
+        nuevas = {}
+        avisos = []
+        for h in filas:
+            nombre = h['prestador_nombre']
+            resultado = {'prestador_nombre': nombre, 'ok': False, 'mensaje': None}
+            resultados.append(resultado)
 
-                if not hora_inicio:
-                    continue
+            prestador = prestadores.get(nombre)
+            hora_inicio = _parse_time(h.get('hora_inicio'))
+            hora_fin = _parse_time(h.get('hora_fin'))
+            if not prestador:
+                resultado['mensaje'] = 'Prestador no encontrado'
+                continue
+            if not hora_inicio:
+                resultado['mensaje'] = 'Falta hora de inicio o el formato es inválido (HH:MM)'
+                continue
+            try:
+                grupo = int(h.get('grupo') or 1)
+            except (TypeError, ValueError):
+                grupo = 1
+
+            # superposición con otras visitas del prestador y capacidad
+            existente = existentes.get(prestador.id)
+            clave = existente.id if existente else ('nueva', prestador.id)
+            fecha_visita = existente.fecha_confirmada if existente else fecha
+            error = agenda.verificar(prestador.id, fecha_visita, hora_inicio, hora_fin,
+                                     visitantes=visitantes, excluir=clave)
+            if error:
+                resultado['mensaje'] = error
+                continue
+            agenda.quitar(prestador.id, fecha_visita, clave)
+            agenda.agregar(prestador.id, fecha_visita, hora_inicio, hora_fin, clave=clave, visitantes=visitantes)
 
-                existente = VisitaPrestador.query.filter_by(solicitud_id=self.id, prestador_id=prestador.id).first()
-                if existente:
-                    existente.hora_inicio = hora_inicio
-                    existente.hora_fin = hora_fin
-                    existente.observaciones_prestador = h.get('observaciones')
-                    existente.asignado_por_admin_id = admin_id
-                    db.session.add(existente)
-                else:
-                    visita = VisitaPrestador(
-                        solicitud_id=self.id,
-                        prestador_id=prestador.id,
-                        fecha_confirmada=(self.fecha_solicitada if getattr(self,'fecha_solicitada',None) else _dt.utcnow().date()),
-                        hora_inicio=hora_inicio,
-                        hora_fin=hora_fin,
-                        observaciones_prestador=h.get('observaciones'),
-                        asignado_por_admin_id=admin_id
-                    )
-                    db.session.add(visita)
+            if existente:
+                existente.hora_inicio = hora_inicio
+                existente.hora_fin = hora_fin
+                existente.grupo = grupo
+                existente.observaciones_prestador = h.get('observaciones')
+                existente.asignado_por_admin_id = admin_id
+                resultado['mensaje'] = 'Horario actualizado'
+            elif prestador.id in nuevas:
+                nuevas[prestador.id].update(hora_inicio=hora_inicio, hora_fin=hora_fin, grupo=grupo,
+                                            observaciones_prestador=h.get('observaciones'))
+                resultado['mensaje'] = 'Visita creada'
+            else:
+                nuevas[prestador.id] = dict(
+                    solicitud_id=self.id,
+                    prestador_id=prestador.id,
+                    fecha_confirmada=fecha,
+                    hora_inicio=hora_inicio,
+                    hora_fin=hora_fin,
+                    grupo=grupo,
+                    observaciones_prestador=h.get('observaciones'),
+                    asignado_por_admin_id=admin_id
+                )
+                resultado['mensaje'] = 'Visita creada'
+            resultado['ok'] = True
+            avisos.append((prestador, dict(fecha=fecha_visita, hora_inicio=hora_inicio, hora_fin=hora_fin,
+                                           observaciones=h.get('observaciones'))))
 
+        if not any(r['ok'] for r in resultados):
+            return resultados
+
+        try:
+            if confirm:
+                self.estado = 'CONFIRMADA'
+                self.fecha_respuesta = _dt.utcnow()
+                db.session.add(self)
+            if nuevas:
+                # un solo INSERT ejecutado en lote (executemany)
+                db.session.execute(db.insert(VisitaPrestador), list(nuevas.values()))
+                # el INSERT en lote no pasa por los eventos del ORM
+                marcar_agendas(db.session.connection(), nuevas)
+                marcar_solicitudes(db.session.connection(), [self.id])
+                db.session.expire(self, ['visitas_asignadas', 'version_fila'])
+            # los correos quedan en la bandeja de salida, en la misma transacción
+            for prestador, visita in avisos:
+                encolar_aviso_visita(prestador, self, visita)
+            if confirm:
+                encolar_confirmacion(self)
             db.session.commit()
-            return True
         except Exception as e:
             db.session.rollback()
-            return False
+            for r in resultados:
+                if r['ok']:
+                    r['ok'] = False
+                    r['mensaje'] = f'Error al guardar: {e}'
+        return resultados
     
     def rechazar(self, motivo, admin_id=None):
         """Rechaza la solicitud con motivo"""
@@ -150,13 +289,83 @@ class SolicitudVisita(db.Model):
         return False
     
     @staticmethod
-    def get_solicitudes_por_filtro(origen=None, nivel=None, estado=None):
-        """Filtra solicitudes para el panel admin"""
-        query = SolicitudVisita.query
+    def get_solicitudes_por_filtro(origen=None, nivel=None, estado=None,
+                                   fecha_desde=None, fecha_hasta=None,
+                                   prestador_id=None, despues_de=None,
+                                   limite=None, opciones=(), texto=None):
+        """Filtra solicitudes para el panel admin.
+
+        Los filtros se resuelven en SQL. Con `limite` se pagina por cursor
+        (keyset) sobre (fecha_solicitud, id) descendente: `despues_de` es la
+        tupla de la última fila de la página anterior y se devuelve
+        (filas, hay_mas). Sin `limite` se devuelve la lista completa.
+        `opciones` se pasan a query.options() (p. ej. selectinload).
+
+        Con `texto` se busca en el índice de texto completo (app/busqueda.py)
+        y el orden es por relevancia: el keyset es (rango, id), con el rango
+        ascendente y, a igual rango, la más reciente primero. Cada solicitud
+        devuelta trae su `rango_busqueda`.
+        """
+        from app.paginacion import condicion_keyset, paginar
+
+        query = SolicitudVisita.query.options(*opciones)
+        coincide = busqueda.coincidencias('solicitud_visita', texto, db.engine.dialect.name) if texto else None
+        if coincide is not None:
+            query = query.join(coincide, coincide.c.id == SolicitudVisita.id)
+        if prestador_id:
+            query = query.join(solicitud_prestador, solicitud_prestador.c.solicitud_id == SolicitudVisita.id) \
+                .filter(solicitud_prestador.c.prestador_id == prestador_id)
         if origen:
-            query = query.filter_by(origen_institucion=origen)
+            query = query.filter(SolicitudVisita.origen_institucion == origen)
         if nivel:
-            query = query.filter_by(nivel_solicitud=nivel)
+            query = query.filter(SolicitudVisita.nivel_solicitud == nivel)
+        if estado:
+            query = query.filter(SolicitudVisita.estado == estado)
+        if fecha_desde:
+            query = query.filter(SolicitudVisita.fecha_solicitada >= fecha_desde)
+        if fecha_hasta:
+            query = query.filter(SolicitudVisita.fecha_solicitada <= fecha_hasta)
+        if coincide is not None:
+            if despues_de:
+                query = query.filter(condicion_keyset(
+                    (coincide.c.rango, SolicitudVisita.id), despues_de, descendente=(False, True)))
+            query = query.add_columns(coincide.c.rango) \
+                .order_by(coincide.c.rango, SolicitudVisita.id.desc())
+            filas, hay_mas = paginar(query, limite) if limite else (query.all(), False)
+            # el rango queda en cada solicitud para armar el cursor de la página siguiente
+            for solicitud, rango in filas:
+                solicitud.rango_busqueda = rango
+            filas = [solicitud for solicitud, _ in filas]
+            return (filas, hay_mas) if limite else filas
+        if despues_de:
+            query = query.filter(condicion_keyset(
+                (SolicitudVisita.fecha_solicitud, SolicitudVisita.id), despues_de))
+        query = query.order_by(SolicitudVisita.fecha_solicitud.desc(), SolicitudVisita.id.desc())
+        if limite:
+            return paginar(query, limite)
+        return query.all()
+
+    @staticmethod
+    def get_conteo_por_estado():
+        """Cantidad de solicitudes por estado en una sola consulta agrupada"""
+        filas = db.session.query(SolicitudVisita.estado, db.func.count(SolicitudVisita.id)) \
+            .group_by(SolicitudVisita.estado).all()
+        conteo = {estado or 'PENDIENTE': 0 for estado, _ in filas}
+        for estado, cantidad in filas:
+            conteo[estado or 'PENDIENTE'] += cantidad
+        conteo['TOTAL'] = sum(cantidad for _, cantidad in filas)
+        return conteo
+
+    @staticmethod
+    def get_demanda_por_prestador(estado=None):
+        """Cantidad de solicitudes que pidió cada prestador: {prestador_id: cantidad}"""
+        query = db.session.query(solicitud_prestador.c.prestador_id, db.func.count()) \
+            .group_by(solicitud_prestador.c.prestador_id)
         if estado:
-            query = query.filter_by(estado=estado)
-        return query.order_by(SolicitudVisita.fecha_solicitud.desc()).all()
\ No newline at end of file
+            query = query.join(SolicitudVisita, SolicitudVisita.id == solicitud_prestador.c.solicitud_id) \
+                .filter(SolicitudVisita.estado == estado)
+        return dict(query.all())
+
+
+event.listen(SolicitudVisita.__table__, 'after_create', busqueda.al_crear_tabla)
+event.listen(SolicitudVisita.__table__, 'before_drop', busqueda.al_borrar_tabla)
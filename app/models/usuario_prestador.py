@@ -20,7 +20,9 @@ class UsuarioPrestador(UserMixin, db.Model):
     
     # RELACIÓN CON PRESTADOR (CLAVE FORÁNEA)
     prestador_id = db.Column(db.Integer, db.ForeignKey('prestador.id'), nullable=False)
-    prestador = db.relationship('Prestador', backref=db.backref('usuarios', lazy=True))
+    # siempre se muestra junto con el usuario: se trae en la misma consulta
+    prestador = db.relationship('Prestador', lazy='joined', innerjoin=True,
+                                backref=db.backref('usuarios', lazy='select'))
     
     # ESTADO
     activo = db.Column(db.Boolean, default=True)
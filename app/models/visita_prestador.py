@@ -1,17 +1,27 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.calendario import marcar_agendas
 
 class VisitaPrestador(db.Model):
     """Visitas confirmadas y asignadas a prestadores con horarios específicos"""
+    __table_args__ = (
+        db.Index('ix_visita_prestador_agenda', 'prestador_id', 'fecha_confirmada', 'hora_inicio'),
+        db.Index('ix_visita_prestador_solicitud', 'solicitud_id', 'prestador_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
-    # RELACIONES
+    # RELACIONES (perezosas: cada ruta declara con joinedload/selectinload lo que usa,
+    # ver app/carga_relaciones.py)
     solicitud_id = db.Column(db.Integer, db.ForeignKey('solicitud_visita.id'), nullable=False)
-    solicitud = db.relationship('SolicitudVisita', backref=db.backref('visitas_asignadas', lazy=True))
+    solicitud = db.relationship('SolicitudVisita', lazy='select',
+                                backref=db.backref('visitas_asignadas', lazy='select'))
     
     prestador_id = db.Column(db.Integer, db.ForeignKey('prestador.id'), nullable=False)
-    prestador = db.relationship('Prestador', backref=db.backref('visitas_confirmadas', lazy=True))
+    prestador = db.relationship('Prestador', lazy='select',
+                                backref=db.backref('visitas_confirmadas', lazy='select'))
     
     # HORARIOS ESPECÍFICOS (asignados por admin)
     fecha_confirmada = db.Column(db.Date, nullable=False)
@@ -31,7 +41,7 @@ class VisitaPrestador(db.Model):
     # METADATOS
     fecha_asignacion = db.Column(db.DateTime, default=datetime.utcnow)
     asignado_por_admin_id = db.Column(db.Integer, db.ForeignKey('usuario_admin.id'))
-    asignado_por = db.relationship('UsuarioAdmin', backref='visitas_asignadas')
+    asignado_por = db.relationship('UsuarioAdmin', lazy='select', backref=db.backref('visitas_asignadas', lazy='select'))
     
     # REGISTRO POST-VISITA
     fecha_realizacion = db.Column(db.DateTime)
@@ -40,7 +50,7 @@ class VisitaPrestador(db.Model):
     comentarios_finales = db.Column(db.Text)
     
     def __repr__(self):
-        return f'<VisitaPrestador {self.solicitud.nombre_institucion} - {self.prestador.razon_social} - {self.fecha_confirmada}>'
+        return f'<VisitaPrestador {self.id} solicitud={self.solicitud_id} prestador={self.prestador_id} {self.fecha_confirmada}>'
     
     def get_horario_completo(self):
         """Retorna horario formateado: '10:00 - 11:30'"""
@@ -72,15 +82,20 @@ class VisitaPrestador(db.Model):
             self.comentarios_finales = comentarios
         
         # También actualizar la solicitud original si todas las visitas terminaron
-        todas_completadas = all(
-            v.estado_visita == 'COMPLETADA' 
-            for v in self.solicitud.visitas_asignadas
-        )
-        if todas_completadas:
+        # (se cuentan las que faltan en lugar de cargar la colección entera)
+        pendientes = VisitaPrestador.query.filter(
+            VisitaPrestador.solicitud_id == self.solicitud_id,
+            VisitaPrestador.id != self.id,
+            VisitaPrestador.estado_visita != 'COMPLETADA'
+        ).count()
+        if not pendientes:
             self.solicitud.estado = 'FINALIZADA'
     
     def get_info_completa(self):
-        """Retorna información completa para mostrar en panel prestador"""
+        """Retorna información completa para mostrar en panel prestador.
+
+        Usa la solicitud: cargar las visitas con joinedload(VisitaPrestador.solicitud).
+        """
         return {
             'fecha': self.fecha_confirmada,
             'horario': self.get_horario_completo(),
@@ -108,16 +123,45 @@ class VisitaPrestador(db.Model):
         return colores.get(self.estado_visita, 'secondary')
     
     @staticmethod
-    def get_visitas_por_prestador(prestador_id, fecha_desde=None, fecha_hasta=None):
-        """Obtiene visitas de un prestador específico con filtros de fecha"""
-        query = VisitaPrestador.query.filter_by(prestador_id=prestador_id)
+    def get_visitas_por_prestador(prestador_id, fecha_desde=None, fecha_hasta=None,
+                                  estado=None, descendente=False,
+                                  despues_de=None, limite=None, opciones=(), por_lotes=None,
+                                  cursor_servidor=True):
+        """Obtiene visitas de un prestador específico con filtros de fecha.
+
+        Con `limite` se pagina por cursor (keyset) sobre
+        (fecha_confirmada, hora_inicio, id): `despues_de` es la tupla de la
+        última fila de la página anterior y se devuelve (filas, hay_mas).
+        `opciones` se pasan a query.options() (p. ej. joinedload).
+        Con `por_lotes` se devuelve un iterador que trae las filas de a
+        `por_lotes` (yield_per), para exportar; con `cursor_servidor` el
+        driver usa un cursor del servidor (PostgreSQL) en lugar de traer
+        todo el resultado a memoria.
+        """
+        from app.paginacion import condicion_keyset, paginar
+
+        query = VisitaPrestador.query.options(*opciones).filter_by(prestador_id=prestador_id)
         
         if fecha_desde:
             query = query.filter(VisitaPrestador.fecha_confirmada >= fecha_desde)
         if fecha_hasta:
             query = query.filter(VisitaPrestador.fecha_confirmada <= fecha_hasta)
-            
-        return query.order_by(VisitaPrestador.fecha_confirmada.asc(), VisitaPrestador.hora_inicio.asc()).all()
+        if estado:
+            query = query.filter(VisitaPrestador.estado_visita == estado)
+
+        columnas = (VisitaPrestador.fecha_confirmada, VisitaPrestador.hora_inicio, VisitaPrestador.id)
+        if despues_de:
+            query = query.filter(condicion_keyset(columnas, despues_de, descendente=descendente))
+        if descendente:
+            query = query.order_by(*(c.desc() for c in columnas))
+        else:
+            query = query.order_by(*(c.asc() for c in columnas))
+
+        if limite:
+            return paginar(query, limite)
+        if por_lotes:
+            return query.yield_per(por_lotes).execution_options(stream_results=cursor_servidor)
+        return query.all()
     
     @staticmethod
     def get_visitas_hoy(prestador_id):
@@ -126,4 +170,35 @@ class VisitaPrestador(db.Model):
         return VisitaPrestador.query.filter_by(
             prestador_id=prestador_id,
             fecha_confirmada=date.today()
-        ).order_by(VisitaPrestador.hora_inicio.asc()).all()
\ No newline at end of file
+        ).order_by(VisitaPrestador.hora_inicio.asc()).all()
+
+
+# Campos de la solicitud que aparecen en el calendario del prestador
+_CAMPOS_SOLICITUD_CALENDARIO = ('nombre_institucion', 'cantidad_alumnos', 'cantidad_docentes',
+                                'nivel_educativo', 'responsable_nombre', 'responsable_telefono')
+# Campos del prestador que aparecen en su calendario (nombre, LOCATION y DTEND sin hora_fin)
+_CAMPOS_PRESTADOR_CALENDARIO = ('razon_social', 'direccion', 'duracion_visita')
+
+
+@event.listens_for(Session, 'after_flush')
+def _marcar_agendas_modificadas(session, flush_context):
+    """Sube la versión de agenda de los prestadores cuyas visitas o datos del calendario cambiaron"""
+    from app.models.prestador import Prestador
+    from app.models.solicitud_visita import SolicitudVisita
+
+    prestadores = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, VisitaPrestador):
+            prestadores.add(obj.prestador_id)
+            anterior = inspect(obj).attrs.prestador_id.history.deleted
+            prestadores.update(anterior)
+        elif isinstance(obj, SolicitudVisita) and obj in session.dirty:
+            estado = inspect(obj)
+            if any(estado.attrs[c].history.has_changes() for c in _CAMPOS_SOLICITUD_CALENDARIO):
+                prestadores.update(v.prestador_id for v in obj.visitas_asignadas)
+        elif isinstance(obj, Prestador) and obj in session.dirty:
+            estado = inspect(obj)
+            if any(estado.attrs[c].history.has_changes() for c in _CAMPOS_PRESTADOR_CALENDARIO):
+                prestadores.add(obj.id)
+    if prestadores:
+        marcar_agendas(session.connection(), prestadores)
@@ -0,0 +1,75 @@
+import base64
+import json
+from datetime import date, datetime, time
+
+# Tamaño de página por defecto para los listados paginados
+TAMANIO_PAGINA = 20
+
+
+def codificar_cursor(*valores):
+    """Serializa los valores de la última fila de una página en un cursor opaco"""
+    datos = []
+    for v in valores:
+        if isinstance(v, (date, datetime, time)):
+            datos.append(v.isoformat())
+        else:
+            datos.append(v)
+    crudo = json.dumps(datos, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(crudo).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor, tipos):
+    """Convierte un cursor en una tupla de valores según `tipos`.
+
+    `tipos` es una secuencia de date, datetime, time o int. Devuelve None
+    si el cursor está vacío o no es válido (se vuelve a la primera página).
+    """
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if len(datos) != len(tipos):
+            return None
+        valores = []
+        for tipo, v in zip(tipos, datos):
+            if tipo is datetime:
+                valores.append(datetime.fromisoformat(v))
+            elif tipo is date:
+                valores.append(date.fromisoformat(v))
+            elif tipo is time:
+                valores.append(time.fromisoformat(v))
+            else:
+                valores.append(tipo(v))
+        return tuple(valores)
+    except Exception:
+        return None
+
+
+def condicion_keyset(columnas, valores, descendente=True):
+    """Condición SQL para continuar después de `valores` en el orden de `columnas`.
+
+    Se expande como (a < x) OR (a = x AND b < y) OR ... para que el motor
+    pueda usar el índice compuesto sobre las mismas columnas. `descendente`
+    puede ser una secuencia con el sentido de cada columna.
+    """
+    from app import db
+
+    if isinstance(descendente, bool):
+        descendente = [descendente] * len(columnas)
+    condiciones = []
+    for i, (columna, valor, desc) in enumerate(zip(columnas, valores, descendente)):
+        iguales = [c == v for c, v in zip(columnas[:i], valores[:i])]
+        siguiente = columna < valor if desc else columna > valor
+        condiciones.append(db.and_(*iguales, siguiente))
+    return db.or_(*condiciones)
+
+
+def paginar(query, limite):
+    """Ejecuta `query` pidiendo una fila extra para saber si hay más páginas.
+
+    Devuelve (filas, hay_mas).
+    """
+    filas = query.limit(limite + 1).all()
+    hay_mas = len(filas) > limite
+    return filas[:limite], hay_mas
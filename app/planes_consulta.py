@@ -0,0 +1,149 @@
+"""Verificación de planes de consulta (EXPLAIN QUERY PLAN) sobre SQLite.
+
+Levanta la aplicación contra una base SQLite en memoria con datos de prueba,
+recorre las rutas y métodos de modelo más usados capturando cada sentencia
+SQL emitida, y marca las que SQLite resolvería con un recorrido completo de
+tabla (`SCAN tabla` sin índice).
+"""
+import re
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from config import TestingConfig
+
+# Tablas chicas donde un recorrido completo es aceptable
+TABLAS_PERMITIDAS = {'contador_estado', 'alembic_version'}
+
+_SCAN_COMPLETO = re.compile(r'^SCAN (\w+)$')
+_CLAVE = 'verificacion'
+
+
+class ConfigVerificacion(TestingConfig):
+    """Base en memoria, límites en memoria y correos que quedan en la bandeja (sin hilo ni SMTP)"""
+
+
+def _sembrar(db):
+    """Carga un conjunto chico pero representativo de filas"""
+    from app.models.prestador import Prestador
+    from app.models.solicitud_visita import SolicitudVisita
+    from app.models.visita_prestador import VisitaPrestador
+
+    clave = generate_password_hash(_CLAVE)
+    admin = Prestador(razon_social='Dirección de Turismo', contacto_responsable='Admin',
+                      telefono='0', email='admin@verificacion', password_hash=clave, role='admin')
+    prestadores = [
+        Prestador(razon_social=f'Prestador {i:02d}', contacto_responsable='Contacto', telefono='0',
+                  email=f'prestador{i}@verificacion', password_hash=clave)
+        for i in range(10)
+    ]
+    db.session.add(admin)
+    db.session.add_all(prestadores)
+    db.session.flush()
+
+    estados = ['PENDIENTE', 'CONFIRMADA', 'RECHAZADA', 'FINALIZADA']
+    solicitudes = []
+    for i in range(200):
+        s = SolicitudVisita(
+            nombre_institucion=f'Escuela {i}', localidad='ESPERANZA',
+            responsable_nombre='Responsable', responsable_email=f'escuela{i}@verificacion',
+            responsable_telefono='0', origen_institucion='EXTERNA', nivel_solicitud='PRIMARIA',
+            fecha_solicitada=date(2026, 3, 1) + timedelta(days=i % 60), cantidad_alumnos=30,
+            estado=estados[i % 4], fecha_solicitud=datetime(2026, 1, 1) + timedelta(hours=i),
+        )
+        s.prestadores = prestadores[i % 10:i % 10 + 3]
+        solicitudes.append(s)
+    db.session.add_all(solicitudes)
+    db.session.flush()
+
+    for i, s in enumerate(solicitudes):
+        for j, p in enumerate(s.prestadores):
+            db.session.add(VisitaPrestador(
+                solicitud_id=s.id, prestador_id=p.id, fecha_confirmada=s.fecha_solicitada,
+                hora_inicio=time(9 + j, 0), hora_fin=time(10 + j, 0),
+            ))
+    db.session.commit()
+    db.session.execute(db.text('ANALYZE'))
+    return admin.id, prestadores[0].id
+
+
+class RutaFallida(RuntimeError):
+    pass
+
+
+def _pedir(cliente, metodo, url, **kwargs):
+    """Hace el pedido y falla si no responde 2xx/3xx: una ruta con error no verifica sus consultas"""
+    respuesta = cliente.open(url, method=metodo, **kwargs)
+    if respuesta.status_code >= 400:
+        raise RutaFallida(f'{metodo} {url} respondió {respuesta.status_code}')
+    return respuesta
+
+
+def _recorrer(app, admin_id, prestador_id):
+    """Ejecuta las rutas y métodos a verificar"""
+    from app.models.solicitud_visita import SolicitudVisita
+    from app.models.visita_prestador import VisitaPrestador
+
+    admin = app.test_client()
+    _pedir(admin, 'POST', '/admin/login', data={'email': 'admin@verificacion', 'password': _CLAVE})
+    for url in ('/admin/', '/admin/solicitudes', '/admin/solicitudes?estado=PENDIENTE',
+                f'/admin/solicitudes?prestador={prestador_id}', '/admin/solicitudes?desde=2026-03-10&hasta=2026-03-20',
+                '/admin/solicitud/5', '/admin/solicitudes/5/horarios', '/admin/prestadores',
+                '/admin/reportes', '/admin/reportes?dimension=nivel&metrica=solicitudes'):
+        _pedir(admin, 'GET', url)
+    pagina = _pedir(admin, 'GET', '/admin/solicitudes').get_data(as_text=True)
+    cursor = re.search(r'cursor=([\w-]+)', pagina)
+    if cursor:
+        _pedir(admin, 'GET', f'/admin/solicitudes?cursor={cursor.group(1)}')
+    _pedir(admin, 'POST', '/admin/solicitud/6/aprobar')
+    _pedir(admin, 'POST', '/admin/solicitud/10/rechazar', data={'motivo': 'Sin cupo'})
+    _pedir(admin, 'POST', '/admin/solicitud/14/eliminar')
+
+    prestador = app.test_client()
+    _pedir(prestador, 'POST', '/prestador/login', data={'email': 'prestador0@verificacion', 'password': _CLAVE})
+    for url in ('/prestador/mis-visitas', '/prestador/mis-visitas?estado=PROGRAMADA',
+                '/prestador/mis-visitas?desde=2026-03-01&hasta=2026-03-31'):
+        _pedir(prestador, 'GET', url)
+
+    with app.app_context():
+        VisitaPrestador.get_visitas_hoy(prestador_id)
+        SolicitudVisita.get_demanda_por_prestador('PENDIENTE')
+
+
+def verificar_planes():
+    """Devuelve [(sql, plan, es_recorrido_completo)] para cada sentencia distinta"""
+    from app import create_app, db
+
+    app = create_app(ConfigVerificacion)
+    sentencias = {}
+
+    with app.app_context():
+        db.create_all()
+        admin_id, prestador_id = _sembrar(db)
+        engine = db.engine
+
+    def _capturar(conn, cursor, statement, parameters, context, executemany):
+        if executemany or statement.lstrip().upper().startswith(('PRAGMA', 'ANALYZE', 'EXPLAIN')):
+            return
+        sentencias.setdefault(statement, parameters)
+
+    event.listen(engine, 'before_cursor_execute', _capturar)
+    try:
+        _recorrer(app, admin_id, prestador_id)
+    finally:
+        event.remove(engine, 'before_cursor_execute', _capturar)
+
+    resultados = []
+    with app.app_context(), db.engine.connect() as conn:
+        for statement, parameters in sentencias.items():
+            if not statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                continue
+            filas = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+            plan = [fila[-1] for fila in filas]
+            completo = any(
+                m and m.group(1) not in TABLAS_PERMITIDAS
+                for m in (_SCAN_COMPLETO.match(detalle) for detalle in plan)
+            )
+            resultados.append((statement, plan, completo))
+    return resultados
@@ -0,0 +1,270 @@
+"""Prueba de carga de punta a punta sobre las rutas reales.
+
+Simula usuarios concurrentes (un hilo por usuario) de tres tipos:
+instituciones que envían el formulario público, administradores que
+recorren el listado de solicitudes y la asignación de horarios, y
+prestadores que consultan su agenda. Mide la latencia de cada pedido y
+reporta p50/p95/p99 y pedidos por segundo por ruta.
+
+Sin `url` corre dentro del proceso con el cliente de pruebas de Flask
+(cada usuario simulado con su propia IP y el límite del formulario en un
+almacén en memoria nuevo, para que cada corrida empiece igual); con `url`
+ataca un servidor en marcha por HTTP. En ese caso el límite del formulario público
+(LIMITE_IP_CAPACIDAD) debe ser alto o todas las instituciones comparten IP.
+
+Conviene correrla contra una base con `flask datos sembrar` y nunca contra
+producción: las instituciones simuladas graban solicitudes.
+"""
+import json
+import math
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import date, timedelta
+from http.cookiejar import CookieJar
+
+from app.datos_sinteticos import CLAVE, EMAIL_ADMIN
+
+RUTAS = ('publico.solicitar_visita', 'admin.solicitudes', 'admin.asignar_horarios', 'prestador.mis_visitas')
+
+# Proporción de usuarios de cada tipo
+MEZCLA = (('institucion', 2), ('admin', 1), ('prestador', 3))
+
+_CURSOR = re.compile(r'cursor=([\w-]+)')
+
+
+class ClienteLocal:
+    """Usuario simulado dentro del proceso (cliente de pruebas de Flask)"""
+
+    def __init__(self, app, ip):
+        self.cliente = app.test_client()
+        self.entorno = {'REMOTE_ADDR': ip}
+
+    def get(self, ruta):
+        respuesta = self.cliente.get(ruta, environ_base=self.entorno)
+        return respuesta.status_code, respuesta.get_data(as_text=True)
+
+    def post(self, ruta, datos):
+        respuesta = self.cliente.post(ruta, data=datos, environ_base=self.entorno)
+        return respuesta.status_code, ''
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class ClienteHTTP:
+    """Usuario simulado contra un servidor en marcha, con sus propias cookies"""
+
+    def __init__(self, url, timeout=30):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.abridor = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()),
+                                                   _SinRedirecciones())
+
+    def _pedir(self, pedido):
+        try:
+            with self.abridor.open(pedido, timeout=self.timeout) as respuesta:
+                return respuesta.status, respuesta.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as e:
+            return e.code, ''
+        except OSError:
+            return 0, ''
+
+    def get(self, ruta):
+        return self._pedir(urllib.request.Request(self.url + ruta))
+
+    def post(self, ruta, datos):
+        cuerpo = urllib.parse.urlencode(datos, doseq=True).encode()
+        return self._pedir(urllib.request.Request(self.url + ruta, data=cuerpo))
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano (valores ya ordenados)"""
+    if not valores:
+        return 0.0
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+
+class Registro:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(int)
+        self.limitadas = defaultdict(int)
+
+    def anotar(self, ruta, segundos, estado):
+        with self._lock:
+            if estado == 429:
+                self.limitadas[ruta] += 1
+            elif estado == 0 or estado >= 400:
+                self.errores[ruta] += 1
+            else:
+                self.latencias[ruta].append(segundos)
+
+    def resumen(self, duracion):
+        resultado = {}
+        for ruta in RUTAS:
+            valores = sorted(self.latencias.get(ruta, ()))
+            if not valores and not self.errores.get(ruta) and not self.limitadas.get(ruta):
+                continue
+            resultado[ruta] = {
+                'pedidos': len(valores),
+                'errores': self.errores.get(ruta, 0),
+                'limitadas': self.limitadas.get(ruta, 0),
+                'p50_ms': round(percentil(valores, 50) * 1000, 1),
+                'p95_ms': round(percentil(valores, 95) * 1000, 1),
+                'p99_ms': round(percentil(valores, 99) * 1000, 1),
+                'rps': round(len(valores) / duracion, 2),
+            }
+        return resultado
+
+
+class Escenario:
+    """Datos compartidos por los usuarios simulados (cuentas, ids, lugares)"""
+
+    def __init__(self, prestadores, pendientes, lugares, semilla=1):
+        self.prestadores = prestadores
+        self.pendientes = pendientes
+        self.lugares = lugares
+        self.semilla = semilla
+
+    @staticmethod
+    def desde_base(semilla=1):
+        """Arma el escenario con los datos sintéticos de la base actual"""
+        from app import db
+        from app.models.prestador import Prestador
+        from app.models.solicitud_visita import SolicitudVisita
+
+        prestadores = [e for (e,) in db.session.query(Prestador.email).filter(
+            Prestador.email.like('%@sintetico'), Prestador.role == 'prestador', Prestador.activo.is_(True))]
+        pendientes = [i for (i,) in db.session.query(SolicitudVisita.id)
+                      .filter(SolicitudVisita.estado == 'PENDIENTE')
+                      .order_by(SolicitudVisita.fecha_solicitud.desc()).limit(500)]
+        lugares = [n for (n,) in db.session.query(Prestador.razon_social).filter(
+            Prestador.activo.is_(True), Prestador.role == 'prestador').limit(200)]
+        return Escenario(prestadores, pendientes, lugares, semilla)
+
+
+def _formulario(rnd, lugares, n):
+    return {
+        'nombre_institucion': f'Escuela de carga {n}',
+        'localidad': rnd.choice(['ESPERANZA', 'SANTA_FE', 'RAFAELA']),
+        'director': 'Director de carga',
+        'email_director': f'carga{n}@sintetico',
+        'telefono_director': '342-000000',
+        'nivel': rnd.choice(['PRIMARIA', 'SECUNDARIA']),
+        'cantidad': str(rnd.randint(15, 40)),
+        'fecha_visita': (date.today() + timedelta(days=rnd.randint(10, 120))).isoformat(),
+        'lugares': rnd.sample(lugares, min(len(lugares), rnd.randint(1, 4))),
+    }
+
+
+def _usuario(tipo, cliente, escenario, registro, hasta, numero):
+    rnd = random.Random(escenario.semilla * 1000 + numero)
+
+    def medir(ruta, funcion, *args):
+        inicio = time.perf_counter()
+        estado, cuerpo = funcion(*args)
+        registro.anotar(ruta, time.perf_counter() - inicio, estado)
+        return cuerpo
+
+    if tipo == 'admin':
+        cliente.post('/admin/login', {'email': EMAIL_ADMIN, 'password': CLAVE})
+    elif tipo == 'prestador':
+        if not escenario.prestadores:
+            return
+        cliente.post('/prestador/login', {'email': rnd.choice(escenario.prestadores), 'password': CLAVE})
+
+    envio = 0
+    while time.monotonic() < hasta:
+        if tipo == 'institucion':
+            cliente.get('/publico/solicitar-visita')
+            medir('publico.solicitar_visita', cliente.post, '/publico/solicitar-visita',
+                  _formulario(rnd, escenario.lugares, f'{numero}-{envio}'))
+            envio += 1
+        elif tipo == 'admin':
+            cuerpo = medir('admin.solicitudes', cliente.get, '/admin/solicitudes')
+            cursor = _CURSOR.search(cuerpo or '')
+            if cursor and rnd.random() < 0.5:
+                medir('admin.solicitudes', cliente.get, f'/admin/solicitudes?cursor={cursor.group(1)}')
+            if rnd.random() < 0.3:
+                medir('admin.solicitudes', cliente.get, '/admin/solicitudes?estado=PENDIENTE')
+            if escenario.pendientes:
+                medir('admin.asignar_horarios', cliente.get,
+                      f'/admin/solicitudes/{rnd.choice(escenario.pendientes)}/horarios')
+        else:
+            cuerpo = medir('prestador.mis_visitas', cliente.get, '/prestador/mis-visitas')
+            cursor = _CURSOR.search(cuerpo or '')
+            if cursor and rnd.random() < 0.3:
+                medir('prestador.mis_visitas', cliente.get, f'/prestador/mis-visitas?cursor={cursor.group(1)}')
+
+
+def correr(app, escenario, usuarios=20, duracion=30, url=None):
+    """Corre la prueba y devuelve {ruta: métricas} (latencias en ms)"""
+    tipos = [t for t, peso in MEZCLA for _ in range(peso)]
+    registro = Registro()
+    hasta = time.monotonic() + duracion
+    hilos = []
+    for n in range(usuarios):
+        cliente = ClienteHTTP(url) if url else ClienteLocal(app, f'10.{n // 250}.{n % 250}.{n % 7 + 1}')
+        hilo = threading.Thread(target=_usuario, name=f'usuario-{n}',
+                                args=(tipos[n % len(tipos)], cliente, escenario, registro, hasta, n))
+        hilos.append(hilo)
+    inicio = time.monotonic()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return registro.resumen(time.monotonic() - inicio)
+
+
+def _proporcion_limitadas(medicion):
+    limitadas = medicion.get('limitadas', 0)
+    total = medicion['pedidos'] + medicion.get('errores', 0) + limitadas
+    return limitadas / total if total else 0.0
+
+
+def comparar(resultado, base, tolerancia=0.2, margen_ms=5.0):
+    """Lista de regresiones de `resultado` respecto de la línea de base.
+
+    Se recorren las rutas de la base. Una ruta empeora si ya no aparece, si
+    su p95 o p99 supera el de la base en más de `tolerancia` (y de
+    `margen_ms`, para no saltar por ruido), si baja su throughput en más de
+    `tolerancia`, si tiene más errores o si crece su proporción de respuestas 429.
+    """
+    regresiones = []
+    for ruta, anterior in base.items():
+        actual = resultado.get(ruta)
+        if not actual:
+            regresiones.append(f'{ruta}: sin pedidos medidos ({anterior["pedidos"]} en la base)')
+            continue
+        for clave in ('p95_ms', 'p99_ms'):
+            if actual[clave] > anterior[clave] * (1 + tolerancia) and actual[clave] - anterior[clave] > margen_ms:
+                regresiones.append(f'{ruta}: {clave} {anterior[clave]} → {actual[clave]}')
+        if actual['rps'] < anterior['rps'] * (1 - tolerancia):
+            regresiones.append(f'{ruta}: rps {anterior["rps"]} → {actual["rps"]}')
+        if actual['errores'] > anterior.get('errores', 0):
+            regresiones.append(f'{ruta}: errores {anterior.get("errores", 0)} → {actual["errores"]}')
+        # con límites activos la cantidad de 429 crece con el throughput: se compara la proporción
+        antes, ahora = _proporcion_limitadas(anterior), _proporcion_limitadas(actual)
+        if ahora > antes * (1 + tolerancia) and actual['limitadas'] > anterior.get('limitadas', 0):
+            regresiones.append(f'{ruta}: 429 {anterior.get("limitadas", 0)} → {actual["limitadas"]}')
+    return regresiones
+
+
+def leer_base(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)['rutas']
+
+
+def guardar_base(ruta, resultado, usuarios, duracion):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump({'usuarios': usuarios, 'duracion': duracion, 'rutas': resultado},
+                  archivo, indent=2, ensure_ascii=False)
@@ -1,13 +1,27 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import current_user, login_required, login_user, logout_user
 from app.models.solicitud_visita import SolicitudVisita
 from app import db
 from app.models.prestador import Prestador
 from app.models.visita_prestador import VisitaPrestador
+from app.models.contador_estado import ContadorEstado
+from app.models.resumen_diario import ResumenDiario
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 import json
 from app.decorators import admin_required
+from app.identidad import identidades, invalidar_identidad
+from app.catalogo import catalogo
+from app.fragmentos import tarjetas_solicitudes
+from app.limites import limitador
+from app import metricas
+from app.correo import encolar_confirmacion, encolar_rechazo
+from app.agenda import Agenda, proponer_itinerario
+from app.calendario import marcar_agendas
+from app import elegibilidad
+from app import lote_solicitudes
+from app.paginacion import TAMANIO_PAGINA, codificar_cursor, decodificar_cursor
+from sqlalchemy.orm import joinedload, selectinload
 
 bp = Blueprint('admin', __name__)
 
@@ -45,39 +59,81 @@ def logout():
 @admin_required
 def dashboard():
     """Dashboard principal del administrador"""
-    # Estadísticas básicas
-    total_solicitudes = SolicitudVisita.query.count()
-    pendientes = SolicitudVisita.query.filter_by(estado='PENDIENTE').count()
-    aprobadas = SolicitudVisita.query.filter_by(estado='CONFIRMADA').count()
-    rechazadas = SolicitudVisita.query.filter_by(estado='RECHAZADA').count()
+    # Estadísticas básicas (contadores mantenidos en cada cambio de estado)
+    conteo = ContadorEstado.get_conteo()
     
     return render_template('admin/dashboard.html', 
-                         total=total_solicitudes,
-                         pendientes=pendientes,
-                         aprobadas=aprobadas,
-                         rechazadas=rechazadas)
+                         total=conteo['TOTAL'],
+                         pendientes=conteo.get('PENDIENTE', 0),
+                         aprobadas=conteo.get('CONFIRMADA', 0),
+                         rechazadas=conteo.get('RECHAZADA', 0))
 
 
 @bp.route('/solicitudes')
 @login_required
 @admin_required
 def solicitudes():
-    """Lista todas las solicitudes de visitas"""
-    solicitudes = SolicitudVisita.query.order_by(SolicitudVisita.fecha_solicitud.desc()).all()
-    for solicitud in solicitudes:
-        solicitud.lugares = json.loads(solicitud.prestadores_solicitados) if solicitud.prestadores_solicitados else []
-    return render_template('admin/solicitudes.html', solicitudes=solicitudes)
+    """Lista las solicitudes de visitas, filtradas y paginadas por cursor"""
+    # solo los filtros con valor, para reenviarlos en los enlaces de paginación
+    filtros = {k: v for k, v in {
+        'estado': request.args.get('estado'),
+        'nivel': request.args.get('nivel'),
+        'origen': request.args.get('origen'),
+        'desde': request.args.get('desde'),
+        'hasta': request.args.get('hasta'),
+        'prestador': request.args.get('prestador', type=int),
+        'q': (request.args.get('q') or '').strip(),
+    }.items() if v}
+    try:
+        fecha_desde = datetime.strptime(filtros['desde'], '%Y-%m-%d').date() if 'desde' in filtros else None
+        fecha_hasta = datetime.strptime(filtros['hasta'], '%Y-%m-%d').date() if 'hasta' in filtros else None
+    except ValueError:
+        flash('Formato de fecha inválido. Usa AAAA-MM-DD.', 'warning')
+        fecha_desde = fecha_hasta = None
+
+    # con búsqueda de texto el orden es por relevancia y el cursor es (rango, id)
+    cursor = request.args.get('cursor')
+    buscando = 'q' in filtros
+    despues_de = decodificar_cursor(cursor, (float, int) if buscando else (datetime, int))
+    solicitudes, hay_mas = SolicitudVisita.get_solicitudes_por_filtro(
+        origen=filtros.get('origen'),
+        nivel=filtros.get('nivel'),
+        estado=filtros.get('estado'),
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        prestador_id=filtros.get('prestador'),
+        despues_de=despues_de,
+        limite=TAMANIO_PAGINA,
+        texto=filtros.get('q')
+    )
+    siguiente = None
+    if hay_mas:
+        ultima = solicitudes[-1]
+        if buscando:
+            siguiente = codificar_cursor(ultima.rango_busqueda, ultima.id)
+        else:
+            siguiente = codificar_cursor(ultima.fecha_solicitud, ultima.id)
+
+    return render_template('admin/solicitudes.html',
+                           solicitudes=solicitudes,
+                           tarjetas=tarjetas_solicitudes(solicitudes),
+                           conteo=ContadorEstado.get_conteo(),
+                           prestadores=Prestador.query.filter_by(activo=True).order_by(Prestador.razon_social).all(),
+                           filtros=filtros,
+                           cursor_actual=cursor,
+                           siguiente=siguiente)
 
 @bp.route('/solicitud/<int:id>')
 @login_required
 @admin_required
 def ver_solicitud(id):
-    solicitud = SolicitudVisita.query.get_or_404(id)
+    solicitud = SolicitudVisita.query.options(selectinload(SolicitudVisita.prestadores)).get_or_404(id)
     try:
         seleccionados = solicitud.get_prestadores_seleccionados()
     except Exception:
         seleccionados = json.loads(solicitud.prestadores_solicitados or '[]')
-    visitas = VisitaPrestador.query.filter_by(solicitud_id=id).order_by(VisitaPrestador.hora_inicio).all()
+    visitas = VisitaPrestador.query.options(joinedload(VisitaPrestador.prestador)) \
+        .filter_by(solicitud_id=id).order_by(VisitaPrestador.hora_inicio).all()
     return render_template('admin/solicitud_detalle.html',
                            solicitud=solicitud,
                            seleccionados=seleccionados,
@@ -93,6 +149,7 @@ def aprobar_solicitud(id):
         solicitud.estado = 'CONFIRMADA'
         solicitud.fecha_respuesta = datetime.utcnow()
         db.session.add(solicitud)
+        encolar_confirmacion(solicitud)
         db.session.commit()
         flash('✅ Solicitud marcada como CONFIRMADA', 'success')
     except Exception as e:
@@ -116,6 +173,7 @@ def rechazar_solicitud(id):
         solicitud.estado = 'RECHAZADA'
         solicitud.fecha_respuesta = datetime.now()
         solicitud.motivo_rechazo = motivo
+        encolar_rechazo(solicitud)
         db.session.commit()
         flash('⚠️ Solicitud rechazada', 'warning')
     except Exception as e:
@@ -124,12 +182,40 @@ def rechazar_solicitud(id):
     
     return redirect(url_for('admin.ver_solicitud', id=id))
 
+@bp.route('/solicitudes/lote', methods=['POST'])
+@login_required
+@admin_required
+def solicitudes_en_lote():
+    """Aprueba, rechaza o elimina varias solicitudes en una transacción (JSON).
+
+    Espera {"accion": "aprobar"|"rechazar"|"eliminar", "ids": [...],
+    "motivo_rechazo": "..."} y devuelve un resultado por id, la tarjeta
+    actualizada de las que cambiaron y los contadores por estado.
+    """
+    datos = request.get_json(silent=True) or {}
+    try:
+        resultados, cambiadas = lote_solicitudes.aplicar(datos.get('accion'), datos.get('ids') or [],
+                                                         motivo=datos.get('motivo_rechazo'))
+        db.session.commit()
+    except lote_solicitudes.LoteInvalido as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Error al procesar las solicitudes: {e}'}), 500
+
+    tarjetas = dict(zip((s.id for s in cambiadas), tarjetas_solicitudes(cambiadas)))
+    for resultado in resultados:
+        if resultado['id'] in tarjetas:
+            resultado['tarjeta'] = str(tarjetas[resultado['id']])
+    return jsonify({'resultados': resultados, 'conteo': ContadorEstado.get_conteo()})
+
 @bp.route('/solicitudes/<int:id>/horarios')
 @login_required
 @admin_required
 def asignar_horarios(id):
     # ...existing code...
-    solicitud = SolicitudVisita.query.get_or_404(id)
+    solicitud = SolicitudVisita.query.options(selectinload(SolicitudVisita.prestadores)).get_or_404(id)
     try:
         seleccionados = solicitud.get_prestadores_seleccionados()
     except Exception:
@@ -142,35 +228,30 @@ def asignar_horarios(id):
     # obtenemos todos los prestadores disponibles ordenados por razon_social
     disponibles = query.order_by(Prestador.razon_social).all()
 
-    # Reordenar para mostrar primero los seleccionados
-    # soporta seleccionados como: ['Nombre A', 'Nombre B'] o [{'prestador_nombre':'Nombre A'}, ...] o lista de ids
-    sel_names = set()
-    sel_ids = set()
-    for item in (seleccionados or []):
-        if isinstance(item, dict):
-            nombre = item.get('prestador_nombre') or item.get('razon_social')
-            if nombre:
-                sel_names.add(nombre)
-            if 'prestador_id' in item:
-                try:
-                    sel_ids.add(int(item.get('prestador_id')))
-                except Exception:
-                    pass
-        else:
-            # puede ser string (nombre) o numero (id)
-            try:
-                # si item puede ser int, considerarlo id
-                sel_ids.add(int(item))
-            except Exception:
-                sel_names.add(str(item))
-
-    # ordenar: primeros los seleccionados (por nombre o id), luego el resto; todos por razon_social
-    disponibles.sort(key=lambda p: (0 if (p.id in sel_ids or p.razon_social in sel_names or getattr(p,'email',None) in sel_names) else 1, (p.razon_social or '').lower()))
+    # Orden: pedidos primero, luego los elegibles según disponibilidad (máscaras), luego el resto
+    sel_ids = {p.id for p in solicitud.prestadores}
+    motivos = elegibilidad.elegibles(disponibles, solicitud)
+    disponibles.sort(key=lambda p: (0 if p.id in sel_ids else 1, len(motivos[p.id]),
+                                    (p.razon_social or '').lower()))
 
     return render_template('admin/asignar_horarios.html',
                            solicitud=solicitud,
                            seleccionados=seleccionados,
-                           disponibles=disponibles)
+                           disponibles=disponibles,
+                           motivos=motivos)
+
+@bp.route('/solicitudes/<int:id>/proponer')
+@login_required
+@admin_required
+def proponer_horarios(id):
+    """Propone un itinerario sin superposiciones para los prestadores pedidos (JSON)"""
+    solicitud = SolicitudVisita.query.options(selectinload(SolicitudVisita.prestadores),
+                                              selectinload(SolicitudVisita.visitas_asignadas)).get_or_404(id)
+    if not solicitud.fecha_solicitada:
+        return jsonify({'error': 'La solicitud no tiene fecha de visita'}), 400
+    itinerario, sin_lugar = proponer_itinerario(
+        solicitud, traslado=current_app.config.get('ITINERARIO_TRASLADO_MIN', 15))
+    return jsonify({'itinerario': itinerario, 'sin_lugar': sin_lugar})
 
 @bp.route('/solicitudes/<int:id>/horarios', methods=['POST'])
 @login_required
@@ -208,20 +289,27 @@ def guardar_horarios(id):
         return redirect(url_for('admin.asignar_horarios', id=id))
 
     try:
-        solicitud.prestadores_solicitados = json.dumps(seleccionados)
+        # selección y horarios se guardan en una única transacción
+        solicitud.set_prestadores_seleccionados(seleccionados)
         db.session.add(solicitud)
-        db.session.commit()
 
-        ok = solicitud.confirmar_con_horarios(horarios_prestadores,
-                                             admin_id=(current_user.id if hasattr(current_user,'id') else None),
-                                             confirm=confirm_all)
-        if ok:
+        resultados = solicitud.programar_horarios(horarios_prestadores,
+                                                  admin_id=(current_user.id if hasattr(current_user,'id') else None),
+                                                  confirm=confirm_all)
+        errores = [r for r in resultados if not r['ok']]
+        if resultados and len(errores) < len(resultados):
             msg = 'Horarios procesados.'
             if confirm_all:
                 msg += ' Solicitud confirmada y visitas creadas.'
             flash(msg, 'success')
+        elif not resultados:
+            db.session.commit()
+            flash('Selección de prestadores guardada.', 'success')
         else:
+            db.session.commit()
             flash('No se pudieron crear las visitas. Revisa los datos.', 'warning')
+        for r in errores:
+            flash(f"{r['prestador_nombre']}: {r['mensaje']}", 'warning')
     except Exception as e:
         db.session.rollback()
         flash(f'Error al asignar horarios: {e}', 'danger')
@@ -235,7 +323,12 @@ def eliminar_solicitud(id):
     solicitud = SolicitudVisita.query.get_or_404(id)
     nombre_institucion = solicitud.nombre_institucion
     try:
-        VisitaPrestador.query.filter_by(solicitud_id=id).delete(synchronize_session=False)
+        # DELETE por conjunto: no pasa por los eventos del ORM, la agenda se marca a mano
+        visitas = VisitaPrestador.__table__
+        agendas = db.session.execute(
+            visitas.delete().where(visitas.c.solicitud_id == id).returning(visitas.c.prestador_id)
+        ).scalars().all()
+        marcar_agendas(db.session.connection(), agendas)
         db.session.delete(solicitud)
         db.session.commit()
         flash(f'🗑️ Solicitud #{id} de \"{nombre_institucion}\" eliminada correctamente', 'success')
@@ -276,6 +369,16 @@ def editar_visita(id):
         flash('Formato de hora inválido. Usa HH:MM.', 'danger')
         return redirect(url_for('admin.ver_solicitud', id=visita.solicitud_id))
 
+    if visita.hora_inicio:
+        conflicto = Agenda.cargar([visita.prestador], [visita.fecha_confirmada]).verificar(
+            visita.prestador_id, visita.fecha_confirmada, visita.hora_inicio, visita.hora_fin,
+            visitantes=visita.visitantes_reales or visita.solicitud.get_total_visitantes(),
+            excluir=visita.id)
+        if conflicto:
+            db.session.rollback()
+            flash(f'No se actualizó el horario: {conflicto}', 'danger')
+            return redirect(url_for('admin.ver_solicitud', id=visita.solicitud_id))
+
     visita.observaciones_prestador = obs
     try:
         db.session.add(visita)
@@ -287,13 +390,47 @@ def editar_visita(id):
 
     return redirect(url_for('admin.ver_solicitud', id=visita.solicitud_id))
 
+@bp.route('/agenda/validar', methods=['POST'])
+@login_required
+@admin_required
+def validar_agenda():
+    """Valida en una llamada el tablero de asignaciones de un día (JSON).
+
+    Espera {"fecha": "AAAA-MM-DD", "asignaciones": [{"prestador_id", "hora_inicio",
+    "hora_fin", "visitantes", "visita_id"}]} y devuelve un resultado por asignación.
+    """
+    datos = request.get_json(silent=True) or {}
+    try:
+        fecha = datetime.strptime(datos.get('fecha') or '', '%Y-%m-%d').date()
+        propuestas = [{
+            'prestador_id': int(a['prestador_id']),
+            'fecha': fecha,
+            'hora_inicio': datetime.strptime(a['hora_inicio'], '%H:%M').time(),
+            'hora_fin': datetime.strptime(a['hora_fin'], '%H:%M').time() if a.get('hora_fin') else None,
+            'visitantes': int(a.get('visitantes') or 0),
+            'clave': int(a['visita_id']) if a.get('visita_id') else None,
+        } for a in datos.get('asignaciones') or []]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Datos inválidos'}), 400
+
+    prestadores = Prestador.query.filter(Prestador.id.in_({p['prestador_id'] for p in propuestas})).all()
+    errores = Agenda.cargar(prestadores, [fecha]).validar_tablero(propuestas)
+    return jsonify({'resultados': [{'ok': e is None, 'mensaje': e} for e in errores]})
+
 @bp.route('/prestadores')
 @login_required
 @admin_required
 def prestadores():
-    """Lista todos los prestadores de servicios turísticos"""
-    prestadores = Prestador.query.filter_by(activo=True).order_by(Prestador.razon_social).all()
-    return render_template('admin/prestadores.html', prestadores=prestadores)
+    """Lista todos los prestadores de servicios turísticos (o los que coinciden con ?q=)"""
+    q = (request.args.get('q') or '').strip()
+    if q:
+        prestadores = Prestador.buscar(q)
+    else:
+        prestadores = Prestador.query.filter_by(activo=True).order_by(Prestador.razon_social).all()
+    return render_template('admin/prestadores.html',
+                           prestadores=prestadores,
+                           q=q,
+                           demanda=SolicitudVisita.get_demanda_por_prestador())
 
 @bp.route('/prestadores/nuevo')
 @login_required
@@ -321,20 +458,36 @@ def asignar_prestador(id):
         flash('Prestador no encontrado.', 'danger')
         return redirect(url_for('admin.asignar_horarios', id=id))
 
+    try:
+        inicio = datetime.strptime(hora_inicio, '%H:%M').time()
+        fin = datetime.strptime(hora_fin, '%H:%M').time()
+    except ValueError:
+        flash('Formato de hora inválido. Usa HH:MM.', 'danger')
+        return redirect(url_for('admin.asignar_horarios', id=id))
+
     try:
         existente = VisitaPrestador.query.filter_by(solicitud_id=solicitud.id, prestador_id=prestador.id).first()
+        fecha = existente.fecha_confirmada if existente else (solicitud.fecha_solicitada if getattr(solicitud,'fecha_solicitada',None) else datetime.utcnow().date())
+        conflicto = Agenda.cargar([prestador], [fecha]).verificar(
+            prestador.id, fecha, inicio, fin,
+            visitantes=solicitud.get_total_visitantes(),
+            excluir=existente.id if existente else None)
+        if conflicto:
+            flash(f'{prestador_nombre}: {conflicto}', 'danger')
+            return redirect(url_for('admin.asignar_horarios', id=id))
+
         if existente:
-            existente.hora_inicio = hora_inicio
-            existente.hora_fin = hora_fin
+            existente.hora_inicio = inicio
+            existente.hora_fin = fin
             existente.observaciones_prestador = obs
             db.session.add(existente)
         else:
             visita = VisitaPrestador(
                 solicitud_id=solicitud.id,
                 prestador_id=prestador.id,
-                fecha_confirmada=(solicitud.fecha_solicitada if getattr(solicitud,'fecha_solicitada',None) else datetime.utcnow().date()),
-                hora_inicio=hora_inicio,
-                hora_fin=hora_fin,
+                fecha_confirmada=fecha,
+                hora_inicio=inicio,
+                hora_fin=fin,
                 observaciones_prestador=obs,
                 asignado_por_admin_id=(current_user.id if hasattr(current_user,'id') else None)
             )
@@ -386,6 +539,34 @@ def crear_prestador():
         db.session.rollback()
         return redirect(url_for('admin.nuevo_prestador'))
 
+@bp.route('/prestadores/importar', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def importar_prestadores():
+    """Alta masiva de prestadores desde un CSV o XLSX, con el detalle de las filas rechazadas"""
+    from app.importacion import importar, ImportacionInvalida, COLUMNAS, OBLIGATORIAS  # sólo la usa esta vista
+
+    resultado = None
+    simular = bool(request.form.get('simular'))
+    if request.method == 'POST':
+        archivo = request.files.get('archivo')
+        if not archivo or not archivo.filename:
+            flash('Seleccioná un archivo CSV o XLSX.', 'danger')
+            return redirect(url_for('admin.importar_prestadores'))
+        try:
+            resultado = importar(archivo.stream, archivo.filename,
+                                 lote=current_app.config['IMPORTACION_LOTE'],
+                                 procesos=current_app.config['IMPORTACION_PROCESOS'],
+                                 simular=simular)
+        except ImportacionInvalida as e:
+            flash(f'❌ {e}', 'danger')
+            return redirect(url_for('admin.importar_prestadores'))
+        except Exception as e:
+            flash(f'❌ Error al importar prestadores: {str(e)}', 'error')
+            return redirect(url_for('admin.importar_prestadores'))
+    return render_template('admin/importar_prestadores.html', resultado=resultado, simular=simular,
+                           columnas=COLUMNAS, obligatorias=OBLIGATORIAS)
+
 @bp.route('/prestadores/<int:id>')
 @login_required
 @admin_required
@@ -408,6 +589,7 @@ def editar_prestador(id):
         prestador.direccion = request.form.get('direccion')
         db.session.add(prestador)
         db.session.commit()
+        invalidar_identidad(prestador.id)
         flash('Prestador actualizado.', 'success')
         return redirect(url_for('admin.prestadores'))
     return render_template('admin/prestador_form.html', prestador=prestador, action_url=url_for('admin.editar_prestador', id=prestador.id))
@@ -439,6 +621,7 @@ def actualizar_prestador(id):
         prestador.costo_referencia = request.form.get('costo_referencia')
         
         db.session.commit()
+        invalidar_identidad(id)
         flash(f'✅ Prestador "{prestador.razon_social}" actualizado correctamente', 'success')
         return redirect(url_for('admin.ver_prestador', id=id))
         
@@ -455,6 +638,7 @@ def eliminar_prestador(id):
         prestador = Prestador.query.get_or_404(id)
         prestador.activo = False
         db.session.commit()
+        invalidar_identidad(id)
         
         flash(f'🗑️ Prestador "{prestador.razon_social}" eliminado correctamente', 'success')
         
@@ -468,8 +652,38 @@ def eliminar_prestador(id):
 @login_required
 @admin_required
 def reportes():
-    """Reportes y estadísticas"""
-    return render_template('admin/reportes.html')
+    """Reportes por mes desde resumen_diario (no recorre solicitudes ni visitas)"""
+    dimensiones = {'prestador': 'Prestador', 'nivel': 'Nivel educativo', 'localidad': 'Localidad', 'total': 'Total'}
+    metricas = {'alumnos': 'Alumnos', 'docentes': 'Docentes', 'solicitudes': 'Solicitudes',
+                'confirmadas': 'Confirmadas', 'rechazadas': 'Rechazadas'}
+    dimension = request.args.get('dimension', 'prestador')
+    metrica = request.args.get('metrica', 'alumnos')
+    if dimension not in dimensiones or metrica not in metricas:
+        flash('Reporte inválido.', 'warning')
+        return redirect(url_for('admin.reportes'))
+    anios = ResumenDiario.anios() or [datetime.now().year]
+    anio = request.args.get('anio', type=int) or (datetime.now().year if datetime.now().year in anios else anios[-1])
+
+    tabla = ResumenDiario.por_mes(dimension, anio, metrica)
+    nombres = {}
+    if dimension == 'prestador' and tabla:
+        nombres = dict(db.session.query(Prestador.id, Prestador.razon_social)
+                       .filter(Prestador.id.in_([int(v) for v in tabla])).all())
+    filas = sorted(
+        ({'nombre': nombres.get(int(valor), f'#{valor}') if dimension == 'prestador' else (valor or 'Total'),
+          'meses': meses, 'total': sum(meses.values())} for valor, meses in tabla.items()),
+        key=lambda f: -f['total'])
+    totales_mes = {m: sum(f['meses'].get(m, 0) for f in filas) for m in range(1, 13)}
+
+    return render_template('admin/reportes.html',
+                           filas=filas,
+                           totales_mes=totales_mes,
+                           anio=anio,
+                           anios=anios,
+                           dimension=dimension,
+                           metrica=metrica,
+                           dimensiones=dimensiones,
+                           metricas=metricas)
 
 @bp.route('/configuracion')
 @login_required
@@ -477,3 +691,28 @@ def reportes():
 def configuracion():
     """Configuración del sistema"""
     return render_template('admin/configuracion.html')
+
+@bp.route('/cache/estadisticas')
+@login_required
+@admin_required
+def estadisticas_cache():
+    """Aciertos y fallos de las caches en memoria de este proceso"""
+    return jsonify({'identidades': identidades.estadisticas(),
+                    'catalogo': catalogo.estadisticas()})
+
+
+@bp.route('/limites/estadisticas')
+@login_required
+@admin_required
+def estadisticas_limites():
+    """Envíos del formulario público permitidos, rechazados por límite y descartados por carga"""
+    return jsonify(limitador.estadisticas())
+
+
+@bp.route('/metrics')
+@login_required
+@admin_required
+def metrics():
+    """Métricas del proceso en formato de texto de Prometheus"""
+    return current_app.response_class(metricas.registro.exponer(),
+                                      mimetype='text/plain; version=0.0.4')
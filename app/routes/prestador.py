@@ -1,12 +1,14 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort, Response, stream_with_context, current_app
 from flask_login import login_user, login_required, current_user
 from app.models.prestador import Prestador
 from werkzeug.security import check_password_hash
 from app.models.visita_prestador import VisitaPrestador
 from sqlalchemy.orm import joinedload
 from app import db
-from datetime import datetime
+from datetime import date, datetime, time
 from app.decorators import prestador_required
+from app.paginacion import TAMANIO_PAGINA, codificar_cursor, decodificar_cursor
+from app.calendario import dia_calendario, nuevo_token, obtener_ics
 
 bp = Blueprint('prestador', __name__)
 
@@ -28,15 +30,57 @@ def login():
             flash('Correo o contraseña incorrectos', 'danger')
     return render_template('prestador/login.html')
 
+def _filtros_visitas():
+    """Lee estado/desde/hasta de la query string.
+
+    Devuelve (filtros, fecha_desde, fecha_hasta); `filtros` tiene solo los
+    valores no vacíos, para reenviarlos en los enlaces.
+    """
+    filtros = {k: v for k, v in {
+        'estado': request.args.get('estado'),
+        'desde': request.args.get('desde'),
+        'hasta': request.args.get('hasta'),
+    }.items() if v}
+    try:
+        fecha_desde = datetime.strptime(filtros['desde'], '%Y-%m-%d').date() if 'desde' in filtros else None
+        fecha_hasta = datetime.strptime(filtros['hasta'], '%Y-%m-%d').date() if 'hasta' in filtros else None
+    except ValueError:
+        flash('Formato de fecha inválido. Usa AAAA-MM-DD.', 'warning')
+        fecha_desde = fecha_hasta = None
+    return filtros, fecha_desde, fecha_hasta
+
 @bp.route('/mis-visitas', methods=['GET'])
 @login_required
 @prestador_required
 def mis_visitas():
     prestador_id = getattr(current_user, 'prestador_id', None) or current_user.id
-    visitas = VisitaPrestador.query.options(
-        joinedload(VisitaPrestador.solicitud)
-    ).filter_by(prestador_id=prestador_id).order_by(VisitaPrestador.fecha_confirmada.desc()).all()
-    return render_template('prestador/mis_visitas.html', visitas=visitas)
+    filtros, fecha_desde, fecha_hasta = _filtros_visitas()
+
+    cursor = request.args.get('cursor')
+    visitas, hay_mas = VisitaPrestador.get_visitas_por_prestador(
+        prestador_id,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        estado=filtros.get('estado'),
+        descendente=True,
+        despues_de=decodificar_cursor(cursor, (date, time, int)),
+        limite=TAMANIO_PAGINA,
+        opciones=(joinedload(VisitaPrestador.solicitud),)
+    )
+
+    siguiente = None
+    if hay_mas:
+        ultima = visitas[-1]
+        siguiente = codificar_cursor(ultima.fecha_confirmada, ultima.hora_inicio, ultima.id)
+
+    token = db.session.query(Prestador.token_calendario).filter(Prestador.id == prestador_id).scalar()
+
+    return render_template('prestador/mis_visitas.html',
+                           visitas=visitas,
+                           filtros=filtros,
+                           cursor_actual=cursor,
+                           siguiente=siguiente,
+                           url_calendario=url_for('prestador.calendario', token=token, _external=True) if token else None)
 
 @bp.route('/visita/<int:id>/realizada', methods=['POST'])
 @login_required
@@ -53,10 +97,92 @@ def marcar_realizada(id):
     flash('Visita marcada como realizada.', 'success')
     return redirect(url_for('prestador.mis_visitas'))
 
+@bp.route('/calendario/<token>.ics')
+def calendario(token):
+    """Feed iCalendar de las visitas del prestador (sin login: el token es la credencial)"""
+    prestador = Prestador.query.filter_by(token_calendario=token, activo=True).first()
+    if prestador is None:
+        abort(404)
+
+    # un solo día para el ETag y la cache del .ics, aunque el pedido cruce la medianoche
+    hoy = dia_calendario()
+    respuesta = Response(mimetype='text/calendar')
+    respuesta.set_etag(f'{prestador.id}-{prestador.agenda_version or 0}-{hoy.isoformat()}')
+    if prestador.agenda_actualizada:
+        respuesta.last_modified = prestador.agenda_actualizada
+    respuesta.cache_control.private = True
+    respuesta.cache_control.max_age = 300
+    # 304 sin leer visitas si el cliente ya tiene esta versión
+    respuesta.make_conditional(request)
+    if respuesta.status_code == 304:
+        return respuesta
+
+    respuesta.set_data(obtener_ics(prestador, hoy))
+    respuesta.headers['Content-Disposition'] = 'inline; filename="visitas.ics"'
+    return respuesta
+
+@bp.route('/calendario/regenerar', methods=['POST'])
+@login_required
+@prestador_required
+def regenerar_calendario():
+    """Crea (o renueva, invalidando el anterior) el enlace de suscripción al calendario"""
+    prestador = Prestador.query.get_or_404(getattr(current_user, 'prestador_id', None) or current_user.id)
+    try:
+        prestador.token_calendario = nuevo_token()
+        db.session.commit()
+        flash('Enlace de calendario generado. Copialo en tu aplicación de calendario.', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error al generar el enlace: {e}', 'danger')
+    return redirect(url_for('prestador.mis_visitas'))
+
 @bp.route('/perfil')
 def perfil():
     return "<h1>Mi Perfil</h1><p>Actualizar datos personales</p>"
 
+ENCABEZADOS_EXPORTACION = ['Fecha', 'Hora inicio', 'Hora fin', 'Institución', 'Localidad', 'Nivel',
+                           'Alumnos', 'Docentes', 'Grupo', 'Estado', 'Responsable', 'Teléfono',
+                           'Observaciones']
+
+def _filas_exportacion(visitas):
+    for v in visitas:
+        s = v.solicitud
+        yield (v.fecha_confirmada, v.hora_inicio, v.hora_fin, s.nombre_institucion, s.localidad,
+               s.nivel_educativo, s.cantidad_alumnos, s.cantidad_docentes, v.grupo, v.estado_visita,
+               s.responsable_nombre, s.responsable_telefono, v.observaciones_prestador)
+
 @bp.route('/exportar')
+@login_required
+@prestador_required
 def exportar():
-    return "<h1>Exportar Datos</h1><p>Descargar mis visitas en PDF/Excel</p>"
\ No newline at end of file
+    """Descarga el historial de visitas (CSV o XLSX) en streaming, con los mismos filtros que mis_visitas"""
+    prestador_id = getattr(current_user, 'prestador_id', None) or current_user.id
+    filtros, fecha_desde, fecha_hasta = _filtros_visitas()
+    formato = request.args.get('formato', 'csv')
+    if formato not in ('csv', 'xlsx'):
+        abort(400)
+
+    visitas = VisitaPrestador.get_visitas_por_prestador(
+        prestador_id,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        estado=filtros.get('estado'),
+        opciones=(joinedload(VisitaPrestador.solicitud),),
+        por_lotes=current_app.config['EXPORTACION_LOTE'],
+        cursor_servidor=current_app.config['EXPORTACION_CURSOR_SERVIDOR']
+    )
+    from app.exportacion import generar_csv, generar_xlsx  # sólo la usa esta vista
+
+    filas = _filas_exportacion(visitas)
+    nombre = f"visitas_{date.today().strftime('%Y%m%d')}.{formato}"
+    if formato == 'xlsx':
+        cuerpo = generar_xlsx(ENCABEZADOS_EXPORTACION, filas, hoja='Visitas')
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    else:
+        cuerpo = generar_csv(ENCABEZADOS_EXPORTACION, filas)
+        mimetype = 'text/csv'
+
+    respuesta = Response(stream_with_context(cuerpo), mimetype=mimetype)
+    respuesta.headers['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    respuesta.headers['X-Accel-Buffering'] = 'no'
+    return respuesta
\ No newline at end of file
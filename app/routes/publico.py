@@ -1,83 +1,21 @@
-import json
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
 from app.models.solicitud_visita import SolicitudVisita
 from app import db
+from app.catalogo import obtener_catalogo
+from app.limites import limitador
 from datetime import datetime
 
 
 bp = Blueprint('publico', __name__)
 
-PRESTADORES_FILTRO = {
-    ("Primaria", "Interior"): [
-        # Prestadores para Primaria de Esperanza
-        'Museo de la Colonización',
-        'Casco Histórico',
-        'Museo de Ciencias Naturales',
-        'Cuartel de Bomberos Voluntarios',
-        'Sala de Extracción de Miel',
-        'Fábrica de Dulce de Leche Bourquín',
-        'Country Pujol',
-        'Tanto Antón',
-        'Emax Cine',
-        'Biblioteca Municipal',
-        'Museo de la Máquina Agrícola',
-        'Taller de Educación Vial (Ciudad de los Niños)',
-        'Casa de la Colonia - Museo de Arte H. Borla',
-        'Concejo Municipal',
-        'Intendencia'
-        ],
 
-    ("Primaria", "Exterior"): [
-        # Prestadores para Primaria de afuera de Esperanza
-        'Museo de la Colonización',
-        'Casco Histórico',
-        'Museo de Ciencias Naturales',
-        'Cuartel de Bomberos Voluntarios',
-        'Sala de Extracción de Miel',
-        'Fábrica de Dulce de Leche Bourquín',
-        'Country Pujol',
-        'Emax Cine',
-        'Museo de la Máquina Agrícola',
-        'Casa de la Colonia - Museo de Arte H. Borla'
-        # ...agregá los que correspondan
-    ],
+def _demasiadas(mensaje, espera):
+    """Vuelve a mostrar el formulario con 429 y Retry-After"""
+    flash(mensaje, 'error')
+    respuesta = current_app.make_response((render_template('publico/solicitar_visita.html'), 429))
+    respuesta.headers['Retry-After'] = str(espera)
+    return respuesta
 
-    ("Secundaria", "Interior"): [
-        # Prestadores para Secundaria de Esperanza
-        'Museo de la Colonización',
-        'Casco Histórico',
-        'Museo de Ciencias Naturales',
-        'Cuartel de Bomberos Voluntarios',
-        'Sala de Extracción de Miel',
-        'Fábrica de Dulce de Leche Bourquín',
-        'Country Pujol',
-        'Tanto Antón',
-        'Emax Cine',
-        'Biblioteca Municipal',
-        'Museo de la Máquina Agrícola',
-        'Casa de la Colonia - Museo de Arte H. Borla',
-        'Laboratorio Alecol',
-        'Concejo Municipal',
-        'Intendencia',
-        'Taller de Educación Vial (Ciudad de los Niños)'
-        # ...agregá los que correspondan
-    ],
-
-    ("Secundaria", "Exterior"): [
-        # Prestadores para Secundaria de afuera de Esperanza
-        'Museo de la Colonización',
-        'Casco Histórico',
-        'Museo de Ciencias Naturales',
-        'Cuartel de Bomberos Voluntarios',
-        'Sala de Extracción de Miel',
-        'Fábrica de Dulce de Leche Bourquín',
-        'Country Pujol',
-        'Emax Cine',
-        'Museo de la Máquina Agrícola',
-        'Casa de la Colonia - Museo de Arte H. Borla'
-        # ...agregá los que correspondan
-    ]
-}
 
 @bp.route('/')
 @bp.route('/solicitar-visita', methods=['GET', 'POST'])
@@ -113,20 +51,33 @@ def solicitar_visita():
                 # Fecha
                 fecha_solicitada=datetime.strptime(request.form['fecha_visita'], '%Y-%m-%d').date(),
                 
-                # Prestadores (NOMBRE CORRECTO)
-                prestadores_solicitados=json.dumps(request.form.getlist('lugares')),
-                
                 # Observaciones
                 observaciones=request.form.get('observaciones', ''),
                 
                 # Estado inicial
                 estado='PENDIENTE',
-                fecha_solicitud=datetime.now()
+                fecha_solicitud=datetime.now(),
+                ip_origen=request.remote_addr
             )
+            # Prestadores (se asocian por id en solicitud_prestador)
+            solicitud.set_prestadores_seleccionados(request.form.getlist('lugares'))
+
+            # el límite se aplica recién con el formulario válido: un error de carga no gasta fichas
+            espera = limitador.verificar(request.remote_addr, request.form.get('email_director'))
+            if espera:
+                db.session.rollback()
+                minutos = max(1, round(espera / 60))
+                return _demasiadas(f'Se recibieron demasiadas solicitudes desde su conexión o correo. '
+                                   f'Intente nuevamente en {minutos} minuto(s).', espera)
             
-            # Guardar en base de datos
-            db.session.add(solicitud)
-            db.session.commit()
+            # Guardar en base de datos (si hay demasiadas escrituras en curso se pide reintentar)
+            with limitador.turno_escritura() as turno:
+                if not turno:
+                    db.session.rollback()
+                    return _demasiadas('El sistema está recibiendo muchas solicitudes en este momento. '
+                                       'Intente nuevamente en unos segundos.', 5)
+                db.session.add(solicitud)
+                db.session.commit()
             
             print("GUARDADO OK - REDIRIGIENDO")
             
@@ -140,6 +91,16 @@ def solicitar_visita():
     # Si es GET, mostrar formulario
     return render_template('publico/solicitar_visita.html')
 
+@bp.route('/catalogo.json')
+def catalogo():
+    """Lugares disponibles por nivel y origen (lo consume el formulario público)"""
+    cuerpo, etag = obtener_catalogo()
+    respuesta = current_app.response_class(cuerpo, mimetype='application/json')
+    respuesta.set_etag(etag)
+    respuesta.cache_control.public = True
+    respuesta.cache_control.max_age = current_app.config.get('CATALOGO_MAX_AGE', 60)
+    return respuesta.make_conditional(request)
+
 @bp.route('/gracias')
 def gracias():
     """Página de confirmación"""
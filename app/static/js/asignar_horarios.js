@@ -0,0 +1,41 @@
+// Asignación de horarios de una solicitud (admin/asignar_horarios.html)
+
+function guardarBorrador(){
+  document.getElementById('confirm_all').value = '';
+  document.getElementById('asignar-horarios-form').submit();
+}
+function proponerHorarios(){
+  const avisos = document.getElementById('propuesta-avisos');
+  fetch(document.getElementById('asignar-horarios-form').dataset.propuesta)
+    .then(r => r.json())
+    .then(datos => {
+      avisos.innerHTML = '';
+      if (datos.error) {
+        avisos.innerHTML = '<div class="alert alert-warning">' + datos.error + '</div>';
+        return;
+      }
+      const campo = (nombre, sufijo) => document.querySelector('[name="' + CSS.escape(nombre + sufijo) + '"]');
+      datos.itinerario.forEach(item => {
+        const inicio = campo(item.prestador_nombre, '_inicio');
+        const fin = campo(item.prestador_nombre, '_fin');
+        if (inicio) inicio.value = item.hora_inicio;
+        if (fin) fin.value = item.hora_fin;
+        const check = document.querySelector('input[name="prestadores[]"][value="' + CSS.escape(item.prestador_nombre) + '"]');
+        if (check) check.checked = true;
+      });
+      datos.sin_lugar.forEach(item => {
+        const aviso = document.createElement('div');
+        aviso.className = 'alert alert-warning py-1';
+        aviso.textContent = item.prestador_nombre + ': ' + item.motivo;
+        avisos.appendChild(aviso);
+      });
+      if (!datos.itinerario.length && !datos.sin_lugar.length) {
+        avisos.innerHTML = '<div class="alert alert-info py-1">La solicitud no tiene prestadores pedidos.</div>';
+      }
+    })
+    .catch(() => { avisos.innerHTML = '<div class="alert alert-danger">No se pudo calcular la propuesta.</div>'; });
+}
+function confirmarYEnviar(){
+  document.getElementById('confirm_all').value = '1';
+  document.getElementById('asignar-horarios-form').submit();
+}
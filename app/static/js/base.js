@@ -0,0 +1,12 @@
+// Confirmación al hacer click en "Salir"
+document.addEventListener('DOMContentLoaded', function () {
+  document.querySelectorAll('.logout-confirm').forEach(function(el){
+    el.addEventListener('click', function(e){
+      if (!confirm('¿Estás seguro que deseas salir?')) {
+        e.preventDefault();
+      } else {
+        /* Si preferís usar POST para logout, reemplazá el enlace por un form y submit aquí */
+      }
+    });
+  });
+});
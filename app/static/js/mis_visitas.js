@@ -0,0 +1,9 @@
+// Filtro en pantalla de la agenda del prestador (prestador/mis_visitas.html)
+
+function filtrarVisitas(){
+  const q = document.getElementById('filtro-visitas').value.toLowerCase().trim();
+  document.querySelectorAll('#tabla-visitas tbody tr').forEach(r=>{
+    if (!r.querySelector('td')) return;
+    r.style.display = q === '' ? '' : (r.innerText.toLowerCase().includes(q) ? '' : 'none');
+  });
+}
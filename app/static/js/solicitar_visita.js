@@ -0,0 +1,68 @@
+// Formulario público de solicitud de visita (publico/solicitar_visita.html)
+
+// Lugares disponibles según localidad y nivel (catálogo servido desde la base)
+let lugaresPorTipo = {};
+fetch(document.getElementById('solicitud-form').dataset.catalogo)
+    .then(r => r.json())
+    .then(datos => { lugaresPorTipo = datos.lugares || {}; actualizarLugares(); })
+    .catch(() => { lugaresPorTipo = {}; });
+
+function actualizarLugares() {
+    const localidad = document.getElementById('localidad').value;
+    const nivel = document.getElementById('nivel').value;
+    const tabla = document.getElementById('lugares-tabla');
+    
+    tabla.innerHTML = '';
+    
+    if (!localidad || !nivel) return;
+    
+    // Unificamos la clave como en el backend
+    const tipoLocalidad = (localidad === 'ESPERANZA') ? 'Interior' : 'Exterior';
+    const tipoNivel = (nivel === 'PRIMARIA') ? 'Primaria' : (nivel === 'SECUNDARIA' ? 'Secundaria' : nivel);
+    const clave = `${tipoNivel}_${tipoLocalidad}`; // Ejemplo: "Primaria_Interior"
+    
+    const lugares = lugaresPorTipo[clave] || [];
+    
+    lugares.forEach(lugar => {
+        const fila = document.createElement('tr');
+        fila.innerHTML = `
+            <td class="text-center">
+                <input type="checkbox" name="lugares" value="${lugar}" class="form-check-input">
+            </td>
+            <td>${lugar}</td>
+            <td><input type="time" class="form-control form-control-sm" name="hora1_${lugar.replace(/\s+/g, '_')}"></td>
+            <td><input type="time" class="form-control form-control-sm" name="hora2_${lugar.replace(/\s+/g, '_')}"></td>
+            <td><input type="text" class="form-control form-control-sm" name="obs_${lugar.replace(/\s+/g, '_')}" placeholder="Obs."></td>
+        `;
+        tabla.appendChild(fila);
+    });
+}
+
+// Event listeners
+document.getElementById('localidad').addEventListener('change', actualizarLugares);
+document.getElementById('nivel').addEventListener('change', actualizarLugares);
+
+document.getElementById('discapacidad').addEventListener('change', function() {
+    const detalle = document.getElementById('detalle-discapacidad');
+    detalle.style.display = this.value === 'SI' ? 'block' : 'none';
+});
+
+function limpiarFormulario() {
+    if (confirm('¿Está seguro que desea limpiar el formulario?')) {
+        document.getElementById('solicitud-form').reset();
+        actualizarLugares();
+    }
+}
+
+document.getElementById('solicitud-form').addEventListener('submit', function(e) {
+    e.preventDefault();
+    
+    const lugaresSeleccionados = document.querySelectorAll('input[name="lugares"]:checked');
+    if (lugaresSeleccionados.length === 0) {
+        alert('Debe seleccionar al menos un lugar para visitar.');
+        return;
+    }
+    
+    // Enviar formulario a la base de datos
+    this.submit();
+});
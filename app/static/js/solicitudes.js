@@ -0,0 +1,84 @@
+// Aprobar, rechazar o eliminar varias solicitudes sin recargar (admin/solicitudes.html)
+
+(function () {
+  const barra = document.getElementById('acciones-lote');
+  if (!barra) return;
+  const lista = document.getElementById('lista-solicitudes');
+  const avisos = document.getElementById('lote-avisos');
+  const todas = document.getElementById('seleccionar-todas');
+  const botones = barra.querySelectorAll('button[data-accion]');
+
+  const seleccionadas = () => Array.from(lista.querySelectorAll('.seleccion-lote:checked')).map(c => parseInt(c.value, 10));
+
+  function actualizarBarra() {
+    const cantidad = seleccionadas().length;
+    botones.forEach(b => { b.disabled = cantidad === 0; });
+    document.getElementById('lote-seleccionadas').textContent = cantidad ? cantidad + ' seleccionada(s)' : '';
+    todas.checked = cantidad > 0 && cantidad === lista.querySelectorAll('.seleccion-lote').length;
+  }
+
+  function aviso(clase, texto) {
+    const div = document.createElement('div');
+    div.className = 'alert alert-' + clase + ' alert-dismissible fade show py-2';
+    div.textContent = texto;
+    const cerrar = document.createElement('button');
+    cerrar.type = 'button';
+    cerrar.className = 'btn-close';
+    cerrar.setAttribute('data-bs-dismiss', 'alert');
+    div.appendChild(cerrar);
+    avisos.appendChild(div);
+  }
+
+  function aplicarResultados(datos) {
+    let hechas = 0;
+    const fallidas = [];
+    datos.resultados.forEach(r => {
+      const tarjeta = lista.querySelector('[data-solicitud="' + r.id + '"]');
+      if (!r.ok) { fallidas.push('#' + r.id + ': ' + r.mensaje); return; }
+      hechas += 1;
+      if (!tarjeta) return;
+      // aprobar/rechazar traen la tarjeta nueva; eliminar sólo la quita
+      if (r.tarjeta) tarjeta.insertAdjacentHTML('afterend', r.tarjeta);
+      tarjeta.remove();
+    });
+    Object.entries(datos.conteo || {}).forEach(([estado, cantidad]) => {
+      document.querySelectorAll('[data-conteo="' + estado + '"]').forEach(el => { el.textContent = cantidad; });
+    });
+    if (hechas) aviso('success', hechas + ' solicitud(es) procesada(s).');
+    if (fallidas.length) aviso('warning', 'Sin cambios: ' + fallidas.join('; '));
+    actualizarBarra();
+  }
+
+  function enviar(accion) {
+    const ids = seleccionadas();
+    if (!ids.length) return;
+    const cuerpo = {accion: accion, ids: ids};
+    if (accion === 'rechazar') {
+      const motivo = prompt('Motivo del rechazo (se envía a las ' + ids.length + ' instituciones):');
+      if (!motivo || !motivo.trim()) return;
+      cuerpo.motivo_rechazo = motivo.trim();
+    } else if (accion === 'eliminar' &&
+               !confirm('¿Eliminar ' + ids.length + ' solicitud(es)? También se eliminarán sus visitas.')) {
+      return;
+    }
+    botones.forEach(b => { b.disabled = true; });
+    fetch(barra.dataset.url, {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json', 'Accept': 'application/json'},
+      body: JSON.stringify(cuerpo)
+    })
+      .then(r => r.json().then(datos => ({ok: r.ok, datos: datos})))
+      .then(({ok, datos}) => {
+        if (!ok) { aviso('danger', datos.error || 'No se pudieron procesar las solicitudes.'); actualizarBarra(); return; }
+        aplicarResultados(datos);
+      })
+      .catch(() => { aviso('danger', 'No se pudieron procesar las solicitudes.'); actualizarBarra(); });
+  }
+
+  lista.addEventListener('change', e => { if (e.target.classList.contains('seleccion-lote')) actualizarBarra(); });
+  todas.addEventListener('change', () => {
+    lista.querySelectorAll('.seleccion-lote').forEach(c => { c.checked = todas.checked; });
+    actualizarBarra();
+  });
+  botones.forEach(b => b.addEventListener('click', () => enviar(b.dataset.accion)));
+})();
@@ -4,11 +4,28 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _url_base_datos(por_defecto):
+    """DATABASE_URL del entorno; acepta el esquema postgres:// que usan algunos proveedores"""
+    url = os.environ.get('DATABASE_URL') or por_defecto
+    if url and url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     basedir = os.path.abspath(os.path.dirname(__file__))
-    SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(basedir, 'instance', 'app.db')}"
+    SQLALCHEMY_DATABASE_URI = _url_base_datos(f"sqlite:///{os.path.join(basedir, 'instance', 'app.db')}")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Pragmas que se aplican a cada conexión SQLite (app/base_datos.py)
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000)
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', 'true').lower() in ['true', 'on', '1']
+
+    # Filas por lote al exportar visitas (con PostgreSQL se leen con un cursor del servidor)
+    EXPORTACION_LOTE = int(os.environ.get('EXPORTACION_LOTE') or 500)
+    EXPORTACION_CURSOR_SERVIDOR = os.environ.get('EXPORTACION_CURSOR_SERVIDOR', 'true').lower() in ['true', 'on', '1']
     
     # Configuración de Mail
     MAIL_SERVER = os.environ.get('MAIL_SERVER') or 'smtp.gmail.com'
@@ -16,6 +33,116 @@ class Config:
     MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() in ['true', 'on', '1']
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or MAIL_USERNAME
+
+    # Bandeja de salida (app/correo.py)
+    CORREO_EN_SEGUNDO_PLANO = os.environ.get('CORREO_EN_SEGUNDO_PLANO', 'true').lower() in ['true', 'on', '1']
+    CORREO_LOTE = int(os.environ.get('CORREO_LOTE') or 50)
+    CORREO_INTERVALO_SEGUNDOS = int(os.environ.get('CORREO_INTERVALO_SEGUNDOS') or 30)
+    CORREO_REINTENTO_SEGUNDOS = int(os.environ.get('CORREO_REINTENTO_SEGUNDOS') or 60)
+    CORREO_MAX_INTENTOS = int(os.environ.get('CORREO_MAX_INTENTOS') or 5)
+    CORREO_RESERVA_SEGUNDOS = int(os.environ.get('CORREO_RESERVA_SEGUNDOS') or 300)
     
     # Configuración de sesión
-    PERMANENT_SESSION_LIFETIME = timedelta(hours=2)
\ No newline at end of file
+    PERMANENT_SESSION_LIFETIME = timedelta(hours=2)
+
+    # Cache de identidades del user_loader (segundos / cantidad de usuarios)
+    IDENTIDAD_CACHE_TTL = int(os.environ.get('IDENTIDAD_CACHE_TTL') or 60)
+    IDENTIDAD_CACHE_MAX = int(os.environ.get('IDENTIDAD_CACHE_MAX') or 1024)
+
+    # Minutos de traslado entre un prestador y el siguiente al proponer itinerarios
+    ITINERARIO_TRASLADO_MIN = int(os.environ.get('ITINERARIO_TRASLADO_MIN') or 15)
+
+    # Catálogo público de lugares (segundos en cache del proceso / max-age para navegadores)
+    CATALOGO_CACHE_TTL = int(os.environ.get('CATALOGO_CACHE_TTL') or 300)
+    CATALOGO_MAX_AGE = int(os.environ.get('CATALOGO_MAX_AGE') or 60)
+
+    # Plantillas compiladas en disco (vacío: sin cache); ver app/arranque.py
+    PLANTILLAS_CACHE = os.environ.get('PLANTILLAS_CACHE', os.path.join(basedir, 'instance', 'jinja'))
+    # Forzar Flask-Migrate fuera de la línea de comandos (scripts que migran desde Python)
+    CARGAR_MIGRACIONES = os.environ.get('CARGAR_MIGRACIONES', 'false').lower() in ['true', 'on', '1']
+
+    # URLs con huella y cache inmutable para app/static (requiere `flask estaticos construir`)
+    ESTATICOS_CON_HUELLA = os.environ.get('ESTATICOS_CON_HUELLA', 'true').lower() in ['true', 'on', '1']
+
+    # Alta masiva de prestadores (app/importacion.py): filas por INSERT y
+    # procesos para hashear contraseñas (0: uno por CPU)
+    IMPORTACION_LOTE = int(os.environ.get('IMPORTACION_LOTE') or 200)
+    IMPORTACION_PROCESOS = int(os.environ.get('IMPORTACION_PROCESOS') or 0)
+
+    # Tarjetas del listado de solicitudes cacheadas por (id, version_fila)
+    FRAGMENTOS_CACHE_MAX = int(os.environ.get('FRAGMENTOS_CACHE_MAX') or 2000)
+    FRAGMENTOS_CACHE_TTL = int(os.environ.get('FRAGMENTOS_CACHE_TTL') or 3600)
+
+    # Proxies confiables delante de la app (nginx: 1). Con 0 se usa la IP de la
+    # conexión; con N se toma de X-Forwarded-For la que agregó el N-ésimo proxy.
+    PROXY_SALTOS = int(os.environ.get('PROXY_SALTOS') or 0)
+
+    # Límite de envíos del formulario público (app/limites.py). El almacén
+    # 'sqlite:///...' se comparte entre workers; 'memoria' es por proceso.
+    LIMITES_ALMACEN = os.environ.get('LIMITES_ALMACEN') or f"sqlite:///{os.path.join(basedir, 'instance', 'limites.db')}"
+    LIMITE_IP_CAPACIDAD = int(os.environ.get('LIMITE_IP_CAPACIDAD') or 5)
+    LIMITE_IP_PERIODO = int(os.environ.get('LIMITE_IP_PERIODO') or 600)
+    LIMITE_EMAIL_CAPACIDAD = int(os.environ.get('LIMITE_EMAIL_CAPACIDAD') or 3)
+    LIMITE_EMAIL_PERIODO = int(os.environ.get('LIMITE_EMAIL_PERIODO') or 3600)
+    LIMITE_ESCRITURAS_SIMULTANEAS = int(os.environ.get('LIMITE_ESCRITURAS_SIMULTANEAS') or 4)
+    LIMITE_ESPERA_TURNO = float(os.environ.get('LIMITE_ESPERA_TURNO') or 2)
+
+    # Latencia, SQL y plantillas por endpoint en /admin/metrics (app/metricas.py)
+    METRICAS_HABILITADAS = os.environ.get('METRICAS_HABILITADAS', 'true').lower() in ['true', 'on', '1']
+
+    # Error ante cargas perezosas de relaciones en pedidos GET (app/carga_relaciones.py)
+    CARGA_ESTRICTA = os.environ.get('CARGA_ESTRICTA', 'false').lower() in ['true', 'on', '1']
+
+    # `flask datos sembrar` (crea un administrador con clave conocida)
+    DATOS_SINTETICOS = True
+
+
+class DevelopmentConfig(Config):
+    """SQLite en instance/app.db salvo que se defina DATABASE_URL"""
+    CARGA_ESTRICTA = os.environ.get('CARGA_ESTRICTA', 'true').lower() in ['true', 'on', '1']
+    # en desarrollo se editan los originales: un dist/ viejo los taparía
+    ESTATICOS_CON_HUELLA = os.environ.get('ESTATICOS_CON_HUELLA', 'false').lower() in ['true', 'on', '1']
+
+
+class ProductionConfig(Config):
+    """PostgreSQL con un pool acotado por worker: con N workers de gunicorn el
+    máximo de conexiones es N * (DB_POOL_SIZE + DB_MAX_OVERFLOW)"""
+    PROXY_SALTOS = int(os.environ.get('PROXY_SALTOS') or 1)  # detrás de nginx
+    DATOS_SINTETICOS = False
+    SQLALCHEMY_DATABASE_URI = _url_base_datos(None)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or 5),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or 5),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT') or 10),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 1800),
+        'pool_pre_ping': True,
+        'connect_args': {
+            'options': f"-c statement_timeout={int(os.environ.get('DB_STATEMENT_TIMEOUT_MS') or 30000)}",
+            'application_name': 'turismo-esperanza',
+        },
+    }
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    LIMITES_ALMACEN = 'memoria'
+    CORREO_EN_SEGUNDO_PLANO = False
+    CARGA_ESTRICTA = True
+
+
+# Se elige con la variable de entorno APP_ENV
+configuraciones = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
+
+
+def obtener_config(nombre=None):
+    nombre = nombre or os.environ.get('APP_ENV') or 'development'
+    try:
+        return configuraciones[nombre]
+    except KeyError:
+        raise ValueError(f'APP_ENV desconocido: {nombre} (opciones: {", ".join(configuraciones)})')
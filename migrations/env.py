@@ -51,6 +51,22 @@ def get_metadata():
     return target_db.metadata
 
 
+def include_name(name, type_, parent_names):
+    """Deja fuera del autogenerate lo que mantiene app/busqueda.py: las tablas
+    FTS5 (y sus tablas internas) en SQLite, y la columna `busqueda` con su
+    índice GIN en PostgreSQL. No están en los modelos y, si no se excluyen,
+    `flask db migrate` genera una migración que borra el índice de búsqueda."""
+    from app.busqueda import INDICES
+
+    if type_ == 'table':
+        return not any(name == indice or name.startswith(f'{indice}_') for indice, _ in INDICES.values())
+    if type_ == 'column':
+        return not (name == 'busqueda' and parent_names.get('table_name') in INDICES)
+    if type_ == 'index':
+        return name not in {f'ix_{tabla}_busqueda' for tabla in INDICES}
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -93,6 +109,8 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_name") is None:
+        conf_args["include_name"] = include_name
 
     connectable = get_engine()
 
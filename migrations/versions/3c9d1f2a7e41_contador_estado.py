@@ -0,0 +1,34 @@
+"""Tabla contador_estado para el dashboard
+
+Revision ID: 3c9d1f2a7e41
+Revises: 65470dbbce87
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9d1f2a7e41'
+down_revision = '65470dbbce87'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('contador_estado',
+    sa.Column('estado', sa.String(length=20), nullable=False),
+    sa.Column('cantidad', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('estado')
+    )
+    # Carga inicial desde las solicitudes existentes
+    op.execute(
+        "INSERT INTO contador_estado (estado, cantidad) "
+        "SELECT COALESCE(estado, 'PENDIENTE'), COUNT(*) FROM solicitud_visita "
+        "GROUP BY COALESCE(estado, 'PENDIENTE')"
+    )
+
+
+def downgrade():
+    op.drop_table('contador_estado')
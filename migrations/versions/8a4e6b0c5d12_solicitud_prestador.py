@@ -0,0 +1,87 @@
+"""Tabla solicitud_prestador con carga desde prestadores_solicitados
+
+Revision ID: 8a4e6b0c5d12
+Revises: 3c9d1f2a7e41
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6b0c5d12'
+down_revision = '3c9d1f2a7e41'
+branch_labels = None
+depends_on = None
+
+LOTE = 500
+
+
+def _ids_desde_json(texto, por_nombre, ids_validos):
+    """Resuelve el JSON guardado (nombres, ids o dicts) a ids de prestador"""
+    try:
+        items = json.loads(texto) if texto else []
+    except Exception:
+        return set()
+    ids = set()
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict):
+            nombre = item.get('prestador_nombre') or item.get('razon_social')
+            if nombre in por_nombre:
+                ids.add(por_nombre[nombre])
+            try:
+                if int(item.get('prestador_id')) in ids_validos:
+                    ids.add(int(item.get('prestador_id')))
+            except (TypeError, ValueError):
+                pass
+        elif isinstance(item, int):
+            if item in ids_validos:
+                ids.add(item)
+        elif item in por_nombre:
+            ids.add(por_nombre[item])
+    return ids
+
+
+def upgrade():
+    tabla = op.create_table('solicitud_prestador',
+    sa.Column('solicitud_id', sa.Integer(), nullable=False),
+    sa.Column('prestador_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['prestador_id'], ['prestador.id'], ),
+    sa.ForeignKeyConstraint(['solicitud_id'], ['solicitud_visita.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('solicitud_id', 'prestador_id')
+    )
+    op.create_index('ix_solicitud_prestador_prestador_id', 'solicitud_prestador',
+                    ['prestador_id', 'solicitud_id'], unique=False)
+
+    # Carga inicial por lotes, recorriendo solicitud_visita por id
+    conn = op.get_bind()
+    por_nombre = {}
+    ids_validos = set()
+    for pid, nombre in conn.execute(sa.text('SELECT id, razon_social FROM prestador ORDER BY id')):
+        por_nombre.setdefault(nombre, pid)
+        ids_validos.add(pid)
+
+    ultimo_id = 0
+    while True:
+        filas = conn.execute(sa.text(
+            'SELECT id, prestadores_solicitados FROM solicitud_visita '
+            'WHERE id > :ultimo ORDER BY id LIMIT :lote'
+        ), {'ultimo': ultimo_id, 'lote': LOTE}).fetchall()
+        if not filas:
+            break
+        asociaciones = [
+            {'solicitud_id': sid, 'prestador_id': pid}
+            for sid, texto in filas
+            for pid in _ids_desde_json(texto, por_nombre, ids_validos)
+        ]
+        if asociaciones:
+            op.bulk_insert(tabla, asociaciones)
+        ultimo_id = filas[-1][0]
+
+
+def downgrade():
+    op.drop_index('ix_solicitud_prestador_prestador_id', table_name='solicitud_prestador')
+    op.drop_table('solicitud_prestador')
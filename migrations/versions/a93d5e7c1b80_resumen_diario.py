@@ -0,0 +1,70 @@
+"""Tabla resumen_diario para reportes
+
+Revision ID: a93d5e7c1b80
+Revises: f18b3e6a9d27
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from collections import Counter, defaultdict
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93d5e7c1b80'
+down_revision = 'f18b3e6a9d27'
+branch_labels = None
+depends_on = None
+
+METRICAS = ('solicitudes', 'alumnos', 'docentes', 'confirmadas', 'rechazadas')
+
+
+def upgrade():
+    resumen = op.create_table('resumen_diario',
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('valor', sa.String(length=100), nullable=False),
+    sa.Column('fecha', sa.Date(), nullable=False),
+    sa.Column('anio', sa.Integer(), nullable=False),
+    sa.Column('mes', sa.Integer(), nullable=False),
+    sa.Column('solicitudes', sa.Integer(), nullable=False),
+    sa.Column('alumnos', sa.Integer(), nullable=False),
+    sa.Column('docentes', sa.Integer(), nullable=False),
+    sa.Column('confirmadas', sa.Integer(), nullable=False),
+    sa.Column('rechazadas', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('dimension', 'valor', 'fecha')
+    )
+    op.create_index('ix_resumen_diario_periodo', 'resumen_diario', ['dimension', 'anio', 'mes', 'valor'], unique=False)
+
+    # Carga inicial desde las solicitudes existentes
+    conn = op.get_bind()
+    prestadores = defaultdict(list)
+    for solicitud_id, prestador_id in conn.execute(sa.text('SELECT solicitud_id, prestador_id FROM solicitud_prestador')):
+        prestadores[solicitud_id].append(prestador_id)
+
+    solicitud = sa.table('solicitud_visita', sa.column('id', sa.Integer), sa.column('fecha_solicitada', sa.Date),
+                         sa.column('estado', sa.String), sa.column('cantidad_alumnos', sa.Integer),
+                         sa.column('cantidad_docentes', sa.Integer), sa.column('nivel_educativo', sa.String),
+                         sa.column('localidad', sa.String))
+    totales = defaultdict(Counter)
+    for f in conn.execute(sa.select(solicitud).where(solicitud.c.fecha_solicitada.isnot(None))):
+        fecha = f.fecha_solicitada if isinstance(f.fecha_solicitada, date) else date.fromisoformat(str(f.fecha_solicitada)[:10])
+        estado = f.estado or 'PENDIENTE'
+        metricas = Counter(solicitudes=1, alumnos=f.cantidad_alumnos or 0, docentes=f.cantidad_docentes or 0,
+                           confirmadas=1 if estado in ('CONFIRMADA', 'FINALIZADA') else 0,
+                           rechazadas=1 if estado == 'RECHAZADA' else 0)
+        claves = [('total', ''), ('nivel', f.nivel_educativo or 'Sin dato'), ('localidad', f.localidad or 'Sin dato')]
+        claves += [('prestador', str(pid)) for pid in prestadores.get(f.id, [])]
+        for dimension, valor in claves:
+            totales[(dimension, valor, fecha)].update(metricas)
+
+    filas = [dict(dimension=d, valor=v, fecha=fe, anio=fe.year, mes=fe.month, **{m: c[m] for m in METRICAS})
+             for (d, v, fe), c in totales.items()]
+    if filas:
+        op.bulk_insert(resumen, filas)
+
+
+def downgrade():
+    op.drop_index('ix_resumen_diario_periodo', table_name='resumen_diario')
+    op.drop_table('resumen_diario')
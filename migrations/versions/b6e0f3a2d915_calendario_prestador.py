@@ -0,0 +1,32 @@
+"""Token de calendario y versión de agenda en prestador
+
+Revision ID: b6e0f3a2d915
+Revises: a93d5e7c1b80
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e0f3a2d915'
+down_revision = 'a93d5e7c1b80'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('prestador', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_calendario', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('agenda_version', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('agenda_actualizada', sa.DateTime(), nullable=True))
+        batch_op.create_unique_constraint('uq_prestador_token_calendario', ['token_calendario'])
+
+
+def downgrade():
+    with op.batch_alter_table('prestador', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_prestador_token_calendario', type_='unique')
+        batch_op.drop_column('agenda_actualizada')
+        batch_op.drop_column('agenda_version')
+        batch_op.drop_column('token_calendario')
@@ -0,0 +1,41 @@
+"""Bandeja de salida de correos
+
+Revision ID: c27f8b4e6a13
+Revises: b6e0f3a2d915
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c27f8b4e6a13'
+down_revision = 'b6e0f3a2d915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('correo_saliente',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('destinatario', sa.String(length=120), nullable=False),
+    sa.Column('asunto', sa.String(length=200), nullable=False),
+    sa.Column('cuerpo', sa.Text(), nullable=False),
+    sa.Column('estado', sa.String(length=20), nullable=False),
+    sa.Column('intentos', sa.Integer(), nullable=False),
+    sa.Column('proximo_intento', sa.DateTime(), nullable=False),
+    sa.Column('lote', sa.String(length=32), nullable=True),
+    sa.Column('ultimo_error', sa.Text(), nullable=True),
+    sa.Column('fecha_creacion', sa.DateTime(), nullable=True),
+    sa.Column('fecha_envio', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_correo_saliente_pendientes', 'correo_saliente', ['estado', 'proximo_intento'], unique=False)
+    op.create_index('ix_correo_saliente_lote', 'correo_saliente', ['lote'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_correo_saliente_lote', table_name='correo_saliente')
+    op.drop_index('ix_correo_saliente_pendientes', table_name='correo_saliente')
+    op.drop_table('correo_saliente')
@@ -0,0 +1,39 @@
+"""Índices para las consultas frecuentes
+
+Revision ID: d41f7a9b2c63
+Revises: 8a4e6b0c5d12
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41f7a9b2c63'
+down_revision = '8a4e6b0c5d12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Listado admin: orden por fecha_solicitud (keyset) y filtro por estado
+    op.create_index('ix_solicitud_visita_fecha_solicitud', 'solicitud_visita', ['fecha_solicitud', 'id'], unique=False)
+    op.create_index('ix_solicitud_visita_estado_fecha', 'solicitud_visita', ['estado', 'fecha_solicitud', 'id'], unique=False)
+    # Agenda del prestador y visitas de una solicitud
+    op.create_index('ix_visita_prestador_agenda', 'visita_prestador', ['prestador_id', 'fecha_confirmada', 'hora_inicio'], unique=False)
+    op.create_index('ix_visita_prestador_solicitud', 'visita_prestador', ['solicitud_id', 'prestador_id'], unique=False)
+    # Login y búsqueda de prestadores por nombre
+    op.create_index('ix_prestador_email', 'prestador', ['email'], unique=False)
+    op.create_index('ix_prestador_razon_social', 'prestador', ['razon_social'], unique=False)
+    op.create_index('ix_prestador_activo_razon_social', 'prestador', ['activo', 'razon_social'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_prestador_activo_razon_social', table_name='prestador')
+    op.drop_index('ix_prestador_razon_social', table_name='prestador')
+    op.drop_index('ix_prestador_email', table_name='prestador')
+    op.drop_index('ix_visita_prestador_solicitud', table_name='visita_prestador')
+    op.drop_index('ix_visita_prestador_agenda', table_name='visita_prestador')
+    op.drop_index('ix_solicitud_visita_estado_fecha', table_name='solicitud_visita')
+    op.drop_index('ix_solicitud_visita_fecha_solicitud', table_name='solicitud_visita')
@@ -0,0 +1,95 @@
+"""Búsqueda de texto completo en solicitudes y prestadores
+
+Revision ID: d83a1c5f7b24
+Revises: c27f8b4e6a13
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd83a1c5f7b24'
+down_revision = 'c27f8b4e6a13'
+branch_labels = None
+depends_on = None
+
+
+# Copia congelada del DDL de app/busqueda.py al momento de esta migración.
+# tabla: (índice, [(columna, peso)])
+INDICES = {
+    'solicitud_visita': ('solicitud_fts', [('nombre_institucion', 10.0), ('localidad', 2.0),
+                                           ('responsable_nombre', 5.0), ('observaciones', 1.0),
+                                           ('necesidades_especiales', 1.0)]),
+    'prestador': ('prestador_fts', [('razon_social', 10.0), ('descripcion_visita', 1.0)]),
+}
+_CLASES_PG = ((10.0, 'A'), (5.0, 'B'), (2.0, 'C'), (0.0, 'D'))
+
+
+def _ddl_sqlite(tabla, indice, campos):
+    columnas = ', '.join(c for c, _ in campos)
+    nuevos = ', '.join(f'new.{c}' for c, _ in campos)
+    viejos = ', '.join(f'old.{c}' for c, _ in campos)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5({columnas}, content='{tabla}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_ai AFTER INSERT ON {tabla} BEGIN "
+        f"INSERT INTO {indice}(rowid, {columnas}) VALUES (new.id, {nuevos}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_ad AFTER DELETE ON {tabla} BEGIN "
+        f"INSERT INTO {indice}({indice}, rowid, {columnas}) VALUES ('delete', old.id, {viejos}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {indice}_au AFTER UPDATE OF {columnas} ON {tabla} BEGIN "
+        f"INSERT INTO {indice}({indice}, rowid, {columnas}) VALUES ('delete', old.id, {viejos}); "
+        f"INSERT INTO {indice}(rowid, {columnas}) VALUES (new.id, {nuevos}); END",
+        f"INSERT INTO {indice}({indice}) VALUES ('rebuild')",
+    ]
+
+
+def _vector_pg(campos, prefijo):
+    partes = []
+    for columna, peso in campos:
+        clase = next(c for minimo, c in _CLASES_PG if peso >= minimo)
+        partes.append(f"setweight(to_tsvector('simple', unaccent(coalesce({prefijo}{columna}, ''))), '{clase}')")
+    return ' || '.join(partes)
+
+
+def _ddl_postgresql(tabla, indice, campos):
+    columnas = ', '.join(c for c, _ in campos)
+    return [
+        'CREATE EXTENSION IF NOT EXISTS unaccent',
+        f'ALTER TABLE {tabla} ADD COLUMN IF NOT EXISTS busqueda tsvector',
+        f"CREATE OR REPLACE FUNCTION {indice}_actualizar() RETURNS trigger AS $$ BEGIN "
+        f"NEW.busqueda := {_vector_pg(campos, 'NEW.')}; RETURN NEW; END $$ LANGUAGE plpgsql",
+        f'DROP TRIGGER IF EXISTS {indice}_actualizar ON {tabla}',
+        f'CREATE TRIGGER {indice}_actualizar BEFORE INSERT OR UPDATE OF {columnas} ON {tabla} '
+        f'FOR EACH ROW EXECUTE FUNCTION {indice}_actualizar()',
+        f'CREATE INDEX IF NOT EXISTS ix_{tabla}_busqueda ON {tabla} USING GIN (busqueda)',
+        f'UPDATE {tabla} SET busqueda = {_vector_pg(campos, "")}',
+    ]
+
+
+def upgrade():
+    conn = op.get_bind()
+    dialecto = conn.dialect.name
+    for tabla, (indice, campos) in INDICES.items():
+        if dialecto == 'sqlite':
+            sentencias = _ddl_sqlite(tabla, indice, campos)
+        elif dialecto == 'postgresql':
+            sentencias = _ddl_postgresql(tabla, indice, campos)
+        else:
+            continue
+        for sentencia in sentencias:
+            conn.exec_driver_sql(sentencia)
+
+
+def downgrade():
+    conn = op.get_bind()
+    for tabla, (indice, _) in INDICES.items():
+        if conn.dialect.name == 'sqlite':
+            for sufijo in ('ai', 'ad', 'au'):
+                conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {indice}_{sufijo}')
+            conn.exec_driver_sql(f'DROP TABLE IF EXISTS {indice}')
+        elif conn.dialect.name == 'postgresql':
+            conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {indice}_actualizar ON {tabla}')
+            conn.exec_driver_sql(f'DROP FUNCTION IF EXISTS {indice}_actualizar()')
+            conn.exec_driver_sql(f'DROP INDEX IF EXISTS ix_{tabla}_busqueda')
+            conn.exec_driver_sql(f'ALTER TABLE {tabla} DROP COLUMN IF EXISTS busqueda')
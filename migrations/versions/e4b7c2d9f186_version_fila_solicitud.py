@@ -0,0 +1,26 @@
+"""Versión de fila en solicitud_visita para la cache de tarjetas
+
+Revision ID: e4b7c2d9f186
+Revises: d83a1c5f7b24
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7c2d9f186'
+down_revision = 'd83a1c5f7b24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('solicitud_visita', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version_fila', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('solicitud_visita', schema=None) as batch_op:
+        batch_op.drop_column('version_fila')
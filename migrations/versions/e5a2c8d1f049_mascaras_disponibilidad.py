@@ -0,0 +1,102 @@
+"""Máscaras de bits de disponibilidad en prestador
+
+Revision ID: e5a2c8d1f049
+Revises: d41f7a9b2c63
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+import json
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a2c8d1f049'
+down_revision = 'd41f7a9b2c63'
+branch_labels = None
+depends_on = None
+
+# Copia congelada de app/elegibilidad.py al momento de esta migración: la
+# carga inicial no debe cambiar si después cambia el módulo de la app.
+MESES = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio',
+         'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
+DIAS = ['lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo']
+EDADES = ['inicial', 'primaria', 'secundaria', 'terciaria', 'adultos']
+TURNOS = ['mañana', 'tarde']
+_ALIAS = {
+    'setiembre': 'septiembre',
+    'jardin': 'inicial',
+    'nivel inicial': 'inicial',
+    'universitario': 'terciaria',
+    'terciario': 'terciaria',
+    'adulto': 'adultos',
+    'manana': 'mañana',
+}
+
+
+def _normalizar(texto):
+    """Minúsculas y sin tildes (conserva la ñ)"""
+    texto = (texto or '').strip().lower().replace('ñ', '\0')
+    texto = ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
+    return texto.replace('\0', 'ñ')
+
+
+def _items(valor):
+    if not valor:
+        return []
+    try:
+        datos = json.loads(valor)
+    except (TypeError, ValueError):
+        datos = valor.replace(';', ',').split(',')
+    if isinstance(datos, str):
+        datos = [datos]
+    return [_normalizar(str(d)) for d in datos if d] if isinstance(datos, list) else []
+
+
+def _mascara(valor, nombres):
+    todos = (1 << len(nombres)) - 1
+    mascara = 0
+    for item in _items(valor):
+        item = _ALIAS.get(item, item)
+        if item in ('todos', 'todas', 'ambos', 'indistinto'):
+            return todos
+        for bit, nombre in enumerate(nombres):
+            if nombre == item or (len(item) > 3 and nombre.startswith(item)):
+                mascara |= 1 << bit
+    return mascara or todos
+
+
+def upgrade():
+    with op.batch_alter_table('prestador', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('mascara_meses', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('mascara_dias', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('mascara_edades', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('mascara_turnos', sa.Integer(), nullable=True))
+
+    conn = op.get_bind()
+    prestador = sa.table('prestador', sa.column('id', sa.Integer),
+                         sa.column('meses_disponibles', sa.String), sa.column('dias_disponibles', sa.String),
+                         sa.column('edades_recomendadas', sa.String), sa.column('horarios_sugeridos', sa.String),
+                         sa.column('mascara_meses', sa.Integer), sa.column('mascara_dias', sa.Integer),
+                         sa.column('mascara_edades', sa.Integer), sa.column('mascara_turnos', sa.Integer))
+    filas = conn.execute(sa.select(prestador.c.id, prestador.c.meses_disponibles, prestador.c.dias_disponibles,
+                                   prestador.c.edades_recomendadas, prestador.c.horarios_sugeridos)).fetchall()
+    valores = [{
+        'pid': f.id,
+        'mascara_meses': _mascara(f.meses_disponibles, MESES),
+        'mascara_dias': _mascara(f.dias_disponibles, DIAS),
+        'mascara_edades': _mascara(f.edades_recomendadas, EDADES),
+        'mascara_turnos': _mascara(f.horarios_sugeridos, TURNOS),
+    } for f in filas]
+    if valores:
+        conn.execute(prestador.update().where(prestador.c.id == sa.bindparam('pid')), valores)
+
+
+def downgrade():
+    with op.batch_alter_table('prestador', schema=None) as batch_op:
+        batch_op.drop_column('mascara_turnos')
+        batch_op.drop_column('mascara_edades')
+        batch_op.drop_column('mascara_dias')
+        batch_op.drop_column('mascara_meses')
@@ -0,0 +1,96 @@
+"""Columna recibe_externas y carga del catálogo que estaba fijo en el código
+
+Revision ID: f18b3e6a9d27
+Revises: e5a2c8d1f049
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+import json
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f18b3e6a9d27'
+down_revision = 'e5a2c8d1f049'
+branch_labels = None
+depends_on = None
+
+# Copia congelada de app/elegibilidad.py (sólo edades) al momento de esta migración
+EDADES = ['inicial', 'primaria', 'secundaria', 'terciaria', 'adultos']
+_ALIAS = {
+    'setiembre': 'septiembre',
+    'jardin': 'inicial',
+    'nivel inicial': 'inicial',
+    'universitario': 'terciaria',
+    'terciario': 'terciaria',
+    'adulto': 'adultos',
+    'manana': 'mañana',
+}
+
+
+def _normalizar(texto):
+    """Minúsculas y sin tildes (conserva la ñ)"""
+    texto = (texto or '').strip().lower().replace('ñ', '\0')
+    texto = ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
+    return texto.replace('\0', 'ñ')
+
+
+def _items(valor):
+    if not valor:
+        return []
+    try:
+        datos = json.loads(valor)
+    except (TypeError, ValueError):
+        datos = valor.replace(';', ',').split(',')
+    if isinstance(datos, str):
+        datos = [datos]
+    return [_normalizar(str(d)) for d in datos if d] if isinstance(datos, list) else []
+
+
+def _mascara(valor, nombres):
+    todos = (1 << len(nombres)) - 1
+    mascara = 0
+    for item in _items(valor):
+        item = _ALIAS.get(item, item)
+        if item in ('todos', 'todas', 'ambos', 'indistinto'):
+            return todos
+        for bit, nombre in enumerate(nombres):
+            if nombre == item or (len(item) > 3 and nombre.startswith(item)):
+                mascara |= 1 << bit
+    return mascara or todos
+
+# Lugares que sólo se ofrecían a instituciones de Esperanza (antes PRESTADORES_FILTRO)
+SOLO_LOCALES = [
+    'Tanto Antón',
+    'Biblioteca Municipal',
+    'Taller de Educación Vial (Ciudad de los Niños)',
+    'Concejo Municipal',
+    'Intendencia',
+    'Laboratorio Alecol',
+]
+# Lugares que sólo se ofrecían a un nivel
+SOLO_NIVEL = {
+    'Laboratorio Alecol': ['secundaria'],
+}
+
+
+def upgrade():
+    with op.batch_alter_table('prestador', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recibe_externas', sa.Boolean(), nullable=True, server_default=sa.true()))
+
+    prestador = sa.table('prestador', sa.column('razon_social', sa.String), sa.column('recibe_externas', sa.Boolean),
+                         sa.column('edades_recomendadas', sa.String), sa.column('mascara_edades', sa.Integer))
+    op.execute(prestador.update().where(prestador.c.razon_social.in_(SOLO_LOCALES)).values(recibe_externas=False))
+    for nombre, edades in SOLO_NIVEL.items():
+        op.execute(prestador.update().where(
+            prestador.c.razon_social == nombre,
+            prestador.c.edades_recomendadas.is_(None),
+        ).values(edades_recomendadas=json.dumps(edades), mascara_edades=_mascara(json.dumps(edades), EDADES)))
+
+
+def downgrade():
+    with op.batch_alter_table('prestador', schema=None) as batch_op:
+        batch_op.drop_column('recibe_externas')
@@ -1,10 +1,15 @@
 from app import create_app, db
+from app.arranque import verificar_revision
 
 app = create_app()
 
-with app.app_context():
-    db.create_all()
-    print("✅ Base de datos creada correctamente")
+# `python run.py` es el servidor de desarrollo (debug): con la base atrasada
+# sólo avisa. Importado por gunicorn, app.debug decide.
+desarrollo = __name__ == '__main__'
 
-if __name__ == '__main__':
-    app.run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
+# Sólo se compara la revisión de la base con la última migración (una
+# consulta); el esquema se crea y actualiza con `flask db upgrade`.
+verificar_revision(app, db, debug=desarrollo or None)
+
+if desarrollo:
+    app.run(debug=True, host='127.0.0.1', port=5000)